@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Ablate rule_based_solution's bonuses and penalties: score every on/off subset.
+
+apply_bonuses_and_penalties stacks seven multiplicative adjustments (5-day
+bonus, sweet-spot combo, vacation penalty, efficiency bonus, medium-trip
+bonus, short-trip penalty, long-trip bonus). This scores all 2^7 subsets
+and ranks them by eval.sh score.
+
+Each adjustment becomes a per-case multiplier array (its multiplier where
+the rule applies, else 1), and the subsets are the rows of a (2^k, k) on/off
+mask. Starting from the base amount broadcast to every subset, each
+adjustment is applied to the rows that switch it on, in the original order.
+k array steps then give every subset's amounts, bit-identical to running
+the rule system with those rules deleted. Scoring the (2^k, cases) result is
+one more array operation.
+
+Usage:
+    python3 ablation_rule_based.py                  # with the current (tuned) parameters
+    python3 ablation_rule_based.py --defaults       # with the original interview constants
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import rule_based_solution
+from case_records import load_case_array
+from fixed_point import UNITS_PER_DOLLAR, to_units
+from optimize_rule_based import RuleBasedEvaluator
+from scoring import EXACT_THRESHOLD
+
+
+def subset_masks(k):
+    """(2^k, k) boolean matrix; row i switches on the bits of i"""
+    return ((np.arange(2 ** k)[:, None] >> np.arange(k)) & 1).astype(bool)
+
+
+def ablate(cases, params):
+    """(adjustment names, masks, predictions (2^k, cases)) for every subset"""
+    evaluator = RuleBasedEvaluator(cases)
+    p = dict(rule_based_solution.DEFAULT_PARAMS, **params)
+    adjustments = evaluator.adjustments(p)
+    masks = subset_masks(len(adjustments))
+
+    amounts = np.broadcast_to(evaluator.base_amount(p), (len(masks), len(cases)))
+    for j, (_, applies, multiplier) in enumerate(adjustments):
+        factor = np.where(applies, multiplier, 1.0)
+        amounts = np.where(masks[:, j:j + 1] & applies, amounts * factor, amounts)
+    return [name for name, _, _ in adjustments], masks, evaluator.finish(amounts, p)
+
+
+def score_rows(expected, predictions):
+    """eval.sh score, average error and exact matches for each row of predictions"""
+    errors = np.abs(to_units(predictions) - to_units(expected))
+    n = predictions.shape[1]
+    avg_error = errors.mean(axis=1) / UNITS_PER_DOLLAR
+    exact = (errors < round(EXACT_THRESHOLD * UNITS_PER_DOLLAR)).sum(axis=1)
+    return avg_error * 100 + (n - exact) * 0.1, avg_error, exact
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every on/off subset of the rule-based adjustments")
+    parser.add_argument('--cases', default='public_cases.json')
+    parser.add_argument('--defaults', action='store_true', help="use DEFAULT_PARAMS instead of the tuned file")
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    cases = load_case_array(args.cases)
+    params = rule_based_solution.DEFAULT_PARAMS if args.defaults else rule_based_solution.PARAMS
+
+    start = time.perf_counter()
+    names, masks, predictions = ablate(cases, params)
+    scores, avg_errors, exact = score_rows(cases['expected'], predictions)
+    elapsed = time.perf_counter() - start
+
+    # The all-on row must be the rule system itself
+    reference = RuleBasedEvaluator(cases).predict(params)
+    if (predictions[-1] != reference).any():
+        raise SystemExit("All-on subset does not reproduce rule_based_solution")
+
+    print("🧪 RULE-BASED ADJUSTMENT ABLATION")
+    print("=" * 78)
+    print(f"{len(masks)} subsets of {len(names)} adjustments x {len(cases)} cases in {elapsed * 1000:.1f}ms "
+          f"({'default' if args.defaults else 'current'} parameters)\n")
+
+    print(f"{'Score':>9s} {'Avg err':>8s} {'Exact':>5s}  " + ' '.join(f"{n[:11]:>11s}" for n in names))
+    order = np.argsort(scores, kind='stable')
+    for i in order[:args.top]:
+        print(f"{scores[i]:9.2f} {avg_errors[i]:8.2f} {exact[i]:5d}  "
+              + ' '.join(f"{'on' if on else '-':>11s}" for on in masks[i]))
+    all_on, all_off = len(masks) - 1, 0
+    print(f"\n  All on:  score {scores[all_on]:.2f} (rank {int(np.flatnonzero(order == all_on)[0]) + 1})")
+    print(f"  All off: score {scores[all_off]:.2f} (rank {int(np.flatnonzero(order == all_off)[0]) + 1})")
+
+    print("\nMain effect of switching each adjustment on (mean over all other subsets):")
+    print(f"{'Adjustment':14s} {'Cases':>6s} {'Score Δ':>9s}  verdict")
+    adjustments = RuleBasedEvaluator(cases).adjustments(dict(rule_based_solution.DEFAULT_PARAMS, **params))
+    for j, (name, applies, _) in enumerate(adjustments):
+        delta = scores[masks[:, j]].mean() - scores[~masks[:, j]].mean()
+        verdict = "helps" if delta < 0 else "hurts" if delta > 0 else "no effect"
+        print(f"{name:14s} {int(applies.sum()):6d} {delta:+9.2f}  {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Small pure-Python replacements for the pandas/sklearn calls the analysis
+scripts make: reading a CSV into records, grouping, summary statistics and
+least-squares fits.
+
+Nothing here imports anything outside the standard library, so a script
+built on it starts in tens of milliseconds. Results follow the library
+conventions they replace: quantile() interpolates linearly like
+pandas.Series.quantile, polynomial_features() orders terms like
+sklearn's PolynomialFeatures, and linear_fit() is ordinary least squares
+with an intercept like LinearRegression.
+"""
+
+import csv
+import math
+from collections import defaultdict
+from itertools import combinations_with_replacement
+
+
+# --- Records --------------------------------------------------------------------
+
+def _convert(text):
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            return text
+
+
+def read_csv_records(path):
+    """CSV rows as dicts, with numeric fields converted to int or float"""
+    with open(path, newline='') as f:
+        return [{key: _convert(value) for key, value in row.items()} for row in csv.DictReader(f)]
+
+
+def group_by(records, key):
+    """Dict of key value -> records, in first-seen order"""
+    groups = defaultdict(list)
+    for record in records:
+        groups[record[key]].append(record)
+    return dict(groups)
+
+
+def column(records, key):
+    return [record[key] for record in records]
+
+
+# --- Statistics -----------------------------------------------------------------
+
+def mean(values):
+    values = list(values)
+    return sum(values) / len(values) if values else float('nan')
+
+
+def quantile(values, q):
+    """Linear-interpolation quantile (pandas' default)"""
+    ordered = sorted(values)
+    if not ordered:
+        return float('nan')
+    position = (len(ordered) - 1) * q
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def median(values):
+    return quantile(values, 0.5)
+
+
+def correlation(xs, ys):
+    """Pearson correlation coefficient"""
+    mx, my = mean(xs), mean(ys)
+    sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    sxx = sum((x - mx) ** 2 for x in xs)
+    syy = sum((y - my) ** 2 for y in ys)
+    return sxy / math.sqrt(sxx * syy)
+
+
+# --- Least squares --------------------------------------------------------------
+
+def lstsq(rows, targets):
+    """Least-squares coefficients for rows @ coef ~ targets.
+
+    Householder QR on column-scaled data, so badly scaled designs (e.g.
+    miles^2 next to a constant) stay accurate without forming X^T X.
+    """
+    m, n = len(rows), len(rows[0])
+    if m < n:
+        raise ValueError(f"Need at least {n} rows for {n} coefficients, got {m}")
+    scales = [max(abs(row[j]) for row in rows) or 1.0 for j in range(n)]
+    a = [[row[j] / scales[j] for j in range(n)] for row in rows]
+    b = list(targets)
+
+    for k in range(n):
+        norm = math.sqrt(sum(a[i][k] ** 2 for i in range(k, m)))
+        if norm == 0:
+            continue
+        alpha = -norm if a[k][k] >= 0 else norm
+        v = [0.0] * k + [a[k][k] - alpha] + [a[i][k] for i in range(k + 1, m)]
+        vv = sum(x * x for x in v[k:])
+        if vv == 0:
+            continue
+        for j in range(k, n):
+            factor = 2 * sum(v[i] * a[i][j] for i in range(k, m)) / vv
+            for i in range(k, m):
+                a[i][j] -= factor * v[i]
+        factor = 2 * sum(v[i] * b[i] for i in range(k, m)) / vv
+        for i in range(k, m):
+            b[i] -= factor * v[i]
+
+    coef = [0.0] * n
+    for k in reversed(range(n)):
+        if abs(a[k][k]) < 1e-12:
+            continue  # rank-deficient column: leave its coefficient at zero
+        coef[k] = (b[k] - sum(a[k][j] * coef[j] for j in range(k + 1, n))) / a[k][k]
+    return [c / s for c, s in zip(coef, scales)]
+
+
+def linear_fit(rows, targets):
+    """Ordinary least squares with an intercept: returns (intercept, coefficients)"""
+    coef = lstsq([[1.0] + list(row) for row in rows], targets)
+    return coef[0], coef[1:]
+
+
+def predict_linear(intercept, coefficients, rows):
+    return [intercept + sum(c * x for c, x in zip(coefficients, row)) for row in rows]
+
+
+def polynomial_features(rows, degree=2):
+    """All monomials up to degree, constant first, in PolynomialFeatures order"""
+    n = len(rows[0])
+    terms = [()] + [combo for d in range(1, degree + 1)
+                    for combo in combinations_with_replacement(range(n), d)]
+    return [[math.prod(row[i] for i in term) for term in terms] for row in rows]
@@ -5,9 +5,10 @@ Deep analysis of day 1 data to find the exact pattern
 
 import json
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.pipeline import make_pipeline
+
+from analysis_toolkit import linear_fit, lstsq, polynomial_features
+from case_records import load_case_array
+from sufficient_stats import SufficientStats
 
 # Read public cases
 with open('public_cases.json', 'r') as f:
@@ -32,23 +33,20 @@ y = np.array([case['expected'] for case in day1_cases])
 
 # Try different regression models
 print("\n1. Simple Linear Regression:")
-lr = LinearRegression()
-lr.fit(X, y)
-coef = lr.coef_
-intercept = lr.intercept_
+intercept, coef = linear_fit(X.tolist(), y.tolist())
 print(f"Formula: {intercept:.2f} + {coef[0]:.4f} * miles + {coef[1]:.4f} * receipts")
 
 # Test this formula
-predictions_lr = lr.predict(X)
+predictions_lr = intercept + X @ np.array(coef)
 errors_lr = np.abs(predictions_lr - y)
 print(f"Average error: ${np.mean(errors_lr):.2f}")
 print(f"Perfect matches: {np.sum(errors_lr <= 0.01)}")
 
 # Try polynomial features
 print("\n2. Polynomial Features (degree 2):")
-poly_model = make_pipeline(PolynomialFeatures(2), LinearRegression())
-poly_model.fit(X, y)
-predictions_poly = poly_model.predict(X)
+X_poly = np.array(polynomial_features(X.tolist(), 2))
+poly_coef = lstsq(X_poly.tolist(), y.tolist())
+predictions_poly = X_poly @ np.array(poly_coef)
 errors_poly = np.abs(predictions_poly - y)
 print(f"Average error: ${np.mean(errors_poly):.2f}")
 print(f"Perfect matches: {np.sum(errors_poly <= 0.01)}")
@@ -65,27 +63,28 @@ print(f"Correlation between miles and expected: {np.corrcoef(miles, y)[0,1]:.3f}
 print(f"Correlation between receipts and expected: {np.corrcoef(receipts, y)[0,1]:.3f}")
 
 # Check for different patterns in different ranges
+# Range fits come from per-cell sufficient statistics (bucket edges at 200 and 800)
+stats = SufficientStats.build(load_case_array('public_cases.json'))
+RANGE_TERMS = ('const', 'miles', 'receipts')
+
 low_mile_mask = miles < 200
 med_mile_mask = (miles >= 200) & (miles < 800)
 high_mile_mask = miles >= 800
 
 print(f"\nLow miles (<200): {np.sum(low_mile_mask)} cases")
 if np.sum(low_mile_mask) > 0:
-    lr_low = LinearRegression()
-    lr_low.fit(X[low_mile_mask], y[low_mile_mask])
-    print(f"  Formula: {lr_low.intercept_:.2f} + {lr_low.coef_[0]:.4f} * miles + {lr_low.coef_[1]:.4f} * receipts")
+    fit_low = stats.fit(stats.cells(days=1, miles=(0, 200)), RANGE_TERMS)['coefficients']
+    print(f"  Formula: {fit_low['const']:.2f} + {fit_low['miles']:.4f} * miles + {fit_low['receipts']:.4f} * receipts")
 
 print(f"\nMedium miles (200-800): {np.sum(med_mile_mask)} cases")
 if np.sum(med_mile_mask) > 0:
-    lr_med = LinearRegression()
-    lr_med.fit(X[med_mile_mask], y[med_mile_mask])
-    print(f"  Formula: {lr_med.intercept_:.2f} + {lr_med.coef_[0]:.4f} * miles + {lr_med.coef_[1]:.4f} * receipts")
+    fit_med = stats.fit(stats.cells(days=1, miles=(200, 800)), RANGE_TERMS)['coefficients']
+    print(f"  Formula: {fit_med['const']:.2f} + {fit_med['miles']:.4f} * miles + {fit_med['receipts']:.4f} * receipts")
 
 print(f"\nHigh miles (>=800): {np.sum(high_mile_mask)} cases")
 if np.sum(high_mile_mask) > 0:
-    lr_high = LinearRegression()
-    lr_high.fit(X[high_mile_mask], y[high_mile_mask])
-    print(f"  Formula: {lr_high.intercept_:.2f} + {lr_high.coef_[0]:.4f} * miles + {lr_high.coef_[1]:.4f} * receipts")
+    fit_high = stats.fit(stats.cells(days=1, miles=(800, None)), RANGE_TERMS)['coefficients']
+    print(f"  Formula: {fit_high['const']:.2f} + {fit_high['miles']:.4f} * miles + {fit_high['receipts']:.4f} * receipts")
 
 # Show worst performing cases for analysis
 print("\n4. Worst Cases Analysis:")
@@ -5,6 +5,9 @@ Analyze exact patterns by looking at successful cases and working backwards
 
 import json
 
+from case_query import query
+from range_aggregation import BinScheme, aggregate
+
 # Read public cases
 with open('public_cases.json', 'r') as f:
     public_cases = json.load(f)
@@ -65,32 +68,6 @@ receipt_ranges = [
     (1500, 3000, "Very High")
 ]
 
-for min_r, max_r, label in receipt_ranges:
-    cases_in_range = [case for case in day1_cases if min_r <= case['receipts'] < max_r]
-    if cases_in_range:
-        print(f"\n{label} receipts (${min_r}-${max_r}): {len(cases_in_range)} cases")
-        
-        # Calculate average ratios within this range
-        avg_expected = sum(case['expected'] for case in cases_in_range) / len(cases_in_range)
-        avg_miles = sum(case['miles'] for case in cases_in_range) / len(cases_in_range)
-        avg_receipts = sum(case['receipts'] for case in cases_in_range) / len(cases_in_range)
-        
-        print(f"  Average: {avg_miles:.0f}mi, ${avg_receipts:.0f}r → ${avg_expected:.2f}")
-        
-        # Show ratios
-        if avg_miles > 0:
-            print(f"  Expected/Miles ratio: {avg_expected/avg_miles:.3f}")
-        if avg_receipts > 0:
-            print(f"  Expected/Receipts ratio: {avg_expected/avg_receipts:.3f}")
-        
-        # Show a few examples
-        for case in cases_in_range[:3]:
-            print(f"    Case {case['case']}: {case['miles']}mi, ${case['receipts']:.0f}r → ${case['expected']:.2f}")
-
-# Check for patterns based on mileage ranges
-print(f"\n" + "-"*40)
-print("MILEAGE RANGE ANALYSIS")
-
 mileage_ranges = [
     (0, 100, "Very Low"),
     (100, 300, "Low"),
@@ -99,22 +76,48 @@ mileage_ranges = [
     (900, 1200, "Very High")
 ]
 
-for min_m, max_m, label in mileage_ranges:
-    cases_in_range = [case for case in day1_cases if min_m <= case['miles'] < max_m]
-    if cases_in_range:
-        print(f"\n{label} mileage ({min_m}-{max_m}mi): {len(cases_in_range)} cases")
-        
-        avg_expected = sum(case['expected'] for case in cases_in_range) / len(cases_in_range)
-        avg_miles = sum(case['miles'] for case in cases_in_range) / len(cases_in_range)
-        avg_receipts = sum(case['receipts'] for case in cases_in_range) / len(cases_in_range)
-        
-        print(f"  Average: {avg_miles:.0f}mi, ${avg_receipts:.0f}r → ${avg_expected:.2f}")
-        
-        # Show ratios
-        if avg_miles > 0:
-            print(f"  Expected/Miles ratio: {avg_expected/avg_miles:.3f}")
-        if avg_receipts > 0:
-            print(f"  Expected/Receipts ratio: {avg_expected/avg_receipts:.3f}")
+# Both range tables in one pass over the day 1 cases
+ranges = aggregate(query('public_cases.json').where('days == 1'), [
+    BinScheme.from_ranges('receipts', 'receipts', receipt_ranges),
+    BinScheme.from_ranges('mileage', 'miles', mileage_ranges),
+], values=('expected', 'miles', 'receipts'))
+day1_by_row = {case['case'] - 1: case for case in day1_cases}
+
+
+def print_range_averages(stats, i):
+    avg_expected = stats.stat('expected', 'mean')[i]
+    avg_miles = stats.stat('miles', 'mean')[i]
+    avg_receipts = stats.stat('receipts', 'mean')[i]
+
+    print(f"  Average: {avg_miles:.0f}mi, ${avg_receipts:.0f}r → ${avg_expected:.2f}")
+
+    # Show ratios
+    if avg_miles > 0:
+        print(f"  Expected/Miles ratio: {avg_expected/avg_miles:.3f}")
+    if avg_receipts > 0:
+        print(f"  Expected/Receipts ratio: {avg_expected/avg_receipts:.3f}")
+
+
+receipt_stats = ranges['receipts']
+for i in receipt_stats.nonempty():
+    min_r, max_r, label = receipt_ranges[i]
+    print(f"\n{label} receipts (${min_r}-${max_r}): {receipt_stats.counts[i]} cases")
+    print_range_averages(receipt_stats, i)
+
+    # Show a few examples
+    for row in receipt_stats.members(i)[:3]:
+        case = day1_by_row[row]
+        print(f"    Case {case['case']}: {case['miles']}mi, ${case['receipts']:.0f}r → ${case['expected']:.2f}")
+
+# Check for patterns based on mileage ranges
+print(f"\n" + "-"*40)
+print("MILEAGE RANGE ANALYSIS")
+
+mileage_stats = ranges['mileage']
+for i in mileage_stats.nonempty():
+    min_m, max_m, label = mileage_ranges[i]
+    print(f"\n{label} mileage ({min_m}-{max_m}mi): {mileage_stats.counts[i]} cases")
+    print_range_averages(mileage_stats, i)
 
 # Let's look at specific extreme cases to understand them
 print(f"\n" + "="*60)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Throughput and latency benchmark for the reimbursement predictors.
+
+Generates synthetic (days, miles, receipts) workloads that follow the public
+case distributions (optionally scaled up), then times each predictor in three
+modes:
+
+    cold   - a fresh process per case, the way eval.sh calls ./run.sh
+    warm   - one case at a time inside an already-loaded process
+    batch  - the whole workload through the batch predictor in one call
+
+plus a predictor-independent startup mode that compares the per-call wall
+time of ./run.sh against the bare interpreter floor (`python3 -S -E -c pass`).
+
+Results (p50/p99 latency and cases/sec) are written to a versioned JSON file
+with stable key order so runs can be diffed between commits.
+
+Usage:
+    python3 benchmark_predictors.py
+    python3 benchmark_predictors.py --predictors rule_based pattern_matching --modes warm batch
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from case_records import Case, load_case_array
+from predictors import BATCH_PREDICTORS, XGBOOST_MODEL_FILE, get_batch_predictor
+
+RESULTS_FILE = 'benchmark_results.json'
+RESULTS_SCHEMA_VERSION = 1
+
+MODES = ('cold', 'warm', 'batch', 'startup')
+
+# Default workload sizes per mode; cold runs pay a process start per case
+DEFAULT_SIZES = {'cold': 50, 'warm': 2000, 'batch': 20000, 'startup': 50}
+
+
+# --- Synthetic workloads -------------------------------------------------------
+
+def generate_workload(n, seed=0, scale=1.0, source='public_cases.json'):
+    """Draw n synthetic cases shaped like the public cases.
+
+    Each case resamples a public case and jitters its miles and receipts by up
+    to ±10%, so per-duration joint distributions and the share of fractional
+    mileages are preserved. scale > 1 stretches miles and receipts beyond the
+    observed range to stress extrapolation.
+    """
+    rng = np.random.default_rng(seed)
+    public = load_case_array(source)
+    rows = public[rng.integers(0, len(public), size=n)]
+
+    miles = rows['miles'] * rng.uniform(0.9, 1.1, size=n) * scale
+    whole = rows['miles'] == np.floor(rows['miles'])
+    miles = np.where(whole, np.round(miles), np.round(miles, 2))
+    receipts = np.round(rows['receipts'] * rng.uniform(0.9, 1.1, size=n) * scale, 2)
+
+    return [
+        Case(int(d), int(m) if w else float(m), float(r))
+        for d, m, r, w in zip(rows['days'], miles, receipts, whole)
+    ]
+
+
+# --- Predictor adapters --------------------------------------------------------
+
+def warm_run_sh():
+    import fast_predictor
+    return lambda c: fast_predictor.predict_reimbursement(c.days, c.miles, c.receipts)
+
+
+def warm_rule_based():
+    import rule_based_solution
+    return lambda c: rule_based_solution.predict_reimbursement(c.days, c.miles, c.receipts)
+
+
+def warm_pattern_matching():
+    import pattern_matching_solution
+    training_data = pattern_matching_solution.load_training_data()
+    return lambda c: pattern_matching_solution.predict_reimbursement(
+        c.days, c.miles, c.receipts, training_data)
+
+
+def warm_xgboost():
+    import xgboost as xgb
+    import xgboost_solution
+    model = xgb.Booster(model_file=XGBOOST_MODEL_FILE)
+    return lambda c: xgboost_solution.predict_reimbursement(model, c.days, c.miles, c.receipts)
+
+
+def warm_xgboost_compiled():
+    predict_batch = get_batch_predictor('xgboost_compiled')
+    return lambda c: predict_batch([c])[0]
+
+
+def registry_batch(name):
+    return lambda: get_batch_predictor(name)
+
+
+def _cold_python(setup, call):
+    """Command template for a fresh interpreter that imports, predicts and exits"""
+    code = f"import sys; {setup}; d, m, r = int(sys.argv[1]), float(sys.argv[2]), float(sys.argv[3]); print({call})"
+    return [sys.executable, '-c', code]
+
+
+PREDICTORS = {
+    'run_sh': {
+        'cold': ['./run.sh'],
+        'warm': warm_run_sh,
+        'batch': registry_batch('knn'),
+    },
+    'rule_based': {
+        'cold': _cold_python('import rule_based_solution as s',
+                             's.predict_reimbursement(d, m, r)'),
+        'warm': warm_rule_based,
+        'batch': registry_batch('rule_based'),
+    },
+    'pattern_matching': {
+        'cold': _cold_python('import pattern_matching_solution as s; t = s.load_training_data()',
+                             's.predict_reimbursement(d, m, r, t)'),
+        'warm': warm_pattern_matching,
+        'batch': registry_batch('pattern_matching'),
+    },
+    'xgboost': {
+        'cold': _cold_python(f"import xgboost as xgb, xgboost_solution as s; b = xgb.Booster(model_file='{XGBOOST_MODEL_FILE}')",
+                             's.predict_reimbursement(b, d, m, r)'),
+        'warm': warm_xgboost,
+        'batch': registry_batch('xgboost'),
+        'requires': 'xgboost',
+    },
+    'xgboost_compiled': {
+        'cold': _cold_python("import predictors; p = predictors.get_batch_predictor('xgboost_compiled'); "
+                             "from case_records import Case",
+                             'p([Case(d, m, r)])[0]'),
+        'warm': warm_xgboost_compiled,
+        'batch': registry_batch('xgboost_compiled'),
+        'requires': 'xgboost_compiled',
+    },
+}
+
+
+def available_predictors():
+    """Benchmarks whose engine is registered (the xgboost ones need a trained model)"""
+    return [name for name, spec in PREDICTORS.items()
+            if spec.get('requires') in (None, *BATCH_PREDICTORS)]
+
+
+# --- Timing ---------------------------------------------------------------------
+
+def summarize(latencies_ns, total_seconds, n, failures=0):
+    """Latency percentiles in milliseconds plus overall throughput"""
+    latencies_ms = np.asarray(latencies_ns, dtype=np.float64) / 1e6
+    summary = {
+        'cases': n,
+        'failures': failures,
+        'total_seconds': round(total_seconds, 4),
+        'cases_per_sec': round(n / total_seconds, 1) if total_seconds > 0 else None,
+    }
+    if len(latencies_ms):
+        summary.update({
+            'p50_ms': round(float(np.percentile(latencies_ms, 50)), 4),
+            'p99_ms': round(float(np.percentile(latencies_ms, 99)), 4),
+            'mean_ms': round(float(latencies_ms.mean()), 4),
+            'max_ms': round(float(latencies_ms.max()), 4),
+        })
+    return summary
+
+
+def bench_cold(command, cases):
+    """One process per case; latency is full process wall time"""
+    latencies = []
+    failures = 0
+    start = time.perf_counter()
+    for c in cases:
+        t0 = time.perf_counter_ns()
+        result = subprocess.run(command + [str(c.days), str(c.miles), str(c.receipts)],
+                                capture_output=True, text=True)
+        latencies.append(time.perf_counter_ns() - t0)
+        if result.returncode != 0:
+            failures += 1
+    return summarize(latencies, time.perf_counter() - start, len(cases), failures)
+
+
+def bench_warm(make_predictor, cases):
+    """Setup once, then time each single-case call"""
+    t0 = time.perf_counter_ns()
+    predict = make_predictor()
+    setup_ms = (time.perf_counter_ns() - t0) / 1e6
+
+    latencies = []
+    start = time.perf_counter()
+    for c in cases:
+        t0 = time.perf_counter_ns()
+        predict(c)
+        latencies.append(time.perf_counter_ns() - t0)
+    summary = summarize(latencies, time.perf_counter() - start, len(cases))
+    summary['setup_ms'] = round(setup_ms, 3)
+    return summary
+
+
+def bench_batch(make_predictor, cases, batch_size):
+    """Time the batch predictor over fixed-size batches"""
+    predict_batch = make_predictor()
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(cases), batch_size):
+        t0 = time.perf_counter_ns()
+        predict_batch(cases[i:i + batch_size])
+        latencies.append(time.perf_counter_ns() - t0)
+    summary = summarize(latencies, time.perf_counter() - start, len(cases))
+    summary['batch_size'] = batch_size
+    return summary
+
+
+STARTUP_COMMANDS = {
+    'interpreter_floor': [sys.executable, '-S', '-E', '-c', 'pass'],
+    'interpreter_default': [sys.executable, '-c', 'pass'],
+    'run_sh': ['./run.sh', '5', '250', '150.75'],
+}
+
+
+def bench_startup(repeats):
+    """Per-call wall time of run.sh next to bare interpreter start-up"""
+    results = {}
+    for name, command in STARTUP_COMMANDS.items():
+        subprocess.run(command, capture_output=True)  # warm the OS and bytecode caches
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(repeats):
+            t0 = time.perf_counter_ns()
+            subprocess.run(command, capture_output=True)
+            latencies.append(time.perf_counter_ns() - t0)
+        results[name] = summarize(latencies, time.perf_counter() - start, repeats)
+    floor = results['interpreter_floor']['p50_ms']
+    results['run_sh']['overhead_over_floor_ms'] = round(results['run_sh']['p50_ms'] - floor, 4)
+    return results
+
+
+def run_benchmarks(predictors, modes, sizes, seed=0, scale=1.0, batch_size=1000):
+    workloads = {mode: generate_workload(sizes[mode], seed=seed, scale=scale)
+                 for mode in modes if mode != 'startup'}
+    results = {}
+    if 'startup' in modes:
+        results['startup'] = bench_startup(sizes['startup'])
+        for name, summary in results['startup'].items():
+            print(f"  startup {name:19s} p50 {summary['p50_ms']:9.3f}ms  p99 {summary['p99_ms']:9.3f}ms")
+        modes = [mode for mode in modes if mode != 'startup']
+    for name in predictors:
+        spec = PREDICTORS[name]
+        required = spec.get('requires')
+        if required and required not in BATCH_PREDICTORS:
+            print(f"  {name}: skipped, no trained model (run xgboost_solution.py)")
+            continue
+        results[name] = {}
+        for mode in modes:
+            try:
+                if mode == 'cold':
+                    summary = bench_cold(spec['cold'], workloads[mode])
+                elif mode == 'warm':
+                    summary = bench_warm(spec['warm'], workloads[mode])
+                else:
+                    summary = bench_batch(spec['batch'], workloads[mode], batch_size)
+            except ImportError as e:
+                summary = {'skipped': str(e)}
+            results[name][mode] = summary
+            print(f"  {name:17s} {mode:5s} " + (
+                f"p50 {summary['p50_ms']:9.3f}ms  p99 {summary['p99_ms']:9.3f}ms  "
+                f"{summary['cases_per_sec']:>12,.1f} cases/sec"
+                + (f"  ({summary['failures']} failed)" if summary.get('failures') else '')
+                if 'p50_ms' in summary else summary.get('skipped', '')))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(results, config, path=RESULTS_FILE):
+    report = {
+        'schema_version': RESULTS_SCHEMA_VERSION,
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': config,
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark predictor latency and throughput")
+    parser.add_argument('--predictors', nargs='+', default=available_predictors(), choices=list(PREDICTORS))
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    parser.add_argument('--cold-cases', type=int, default=DEFAULT_SIZES['cold'])
+    parser.add_argument('--warm-cases', type=int, default=DEFAULT_SIZES['warm'])
+    parser.add_argument('--batch-cases', type=int, default=DEFAULT_SIZES['batch'])
+    parser.add_argument('--startup-runs', type=int, default=DEFAULT_SIZES['startup'])
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--scale', type=float, default=1.0, help="stretch miles/receipts beyond the public range")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    sizes = {'cold': args.cold_cases, 'warm': args.warm_cases, 'batch': args.batch_cases,
+             'startup': args.startup_runs}
+    config = {
+        'modes': args.modes,
+        'sizes': {mode: sizes[mode] for mode in args.modes},
+        'batch_size': args.batch_size,
+        'scale': args.scale,
+        'seed': args.seed,
+    }
+
+    print("⏱️  PREDICTOR BENCHMARK")
+    print("=" * 50)
+    results = run_benchmarks(args.predictors, args.modes, sizes, args.seed, args.scale, args.batch_size)
+    write_results(results, config, args.output)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Generate fast_predictor_data.py, the embedded training set behind run.sh.
+
+The public cases are written out as a single tuple-of-tuples literal. Python
+folds such a literal into one constant in the module's cached bytecode, so at
+run time the whole training set is restored by a single unmarshal with no
+JSON parsing. The modules are byte-compiled here so the first run.sh call
+does not pay for compilation either.
+
+The kNN parameters from knn_params.json (or the original run.sh defaults)
+are embedded as PARAMS.
+
+Re-run this whenever public_cases.json or knn_params.json changes.
+"""
+
+import py_compile
+
+from case_records import iter_cases
+from knn_config import load_knn_params
+
+DATA_MODULE = 'fast_predictor_data.py'
+
+
+def build(source='public_cases.json', target=DATA_MODULE):
+    lines = [
+        f"# Generated by build_fast_predictor.py from {source} -- do not edit.",
+        f"PARAMS = {load_knn_params()!r}",
+        "",
+        "# (trip_duration_days, miles_traveled, total_receipts_amount, expected_output)",
+        "CASES = (",
+    ]
+    count = 0
+    for case in iter_cases(source):
+        lines.append(f"    ({case.days!r}, {case.miles!r}, {case.receipts!r}, {case.expected!r}),")
+        count += 1
+    lines.append(")")
+    with open(target, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    for module in (target, 'fast_predictor.py'):
+        py_compile.compile(module, doraise=True)
+    return count
+
+
+if __name__ == "__main__":
+    count = build()
+    print(f"Embedded {count} cases in {DATA_MODULE}")
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Case and prediction file formats with auto-detection.
+
+Supported formats:
+    json     - a single JSON array (public_cases.json / private_cases.json)
+    jsonl    - one case object per line; appendable and trivially splittable
+    csv      - trip_duration_days,miles_traveled,total_receipts_amount[,expected_output]
+    npz      - NumPy columnar arrays (days, miles, receipts, expected)
+    parquet  - Arrow columnar file, requires pyarrow
+    txt      - predictions only, one amount per line (private_results.txt)
+
+Row formats stream; columnar formats load whole columns at once. Large batches
+are best kept as a directory of jsonl/csv/parquet shards (see split_case_file)
+so they can be appended to and read in parallel.
+"""
+
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from case_records import (
+    CASE_DTYPE, Case, array_to_cases, batched, case_to_json, cases_to_array, iter_cases,
+)
+
+CASE_FORMATS = ('json', 'jsonl', 'csv', 'npz', 'parquet')
+PREDICTION_FORMATS = ('txt', 'jsonl', 'csv', 'npz', 'parquet')
+
+EXTENSIONS = {
+    '.json': 'json',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.csv': 'csv',
+    '.npz': 'npz',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.txt': 'txt',
+}
+
+CSV_COLUMNS = ['trip_duration_days', 'miles_traveled', 'total_receipts_amount', 'expected_output']
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet support requires pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def detect_format(path):
+    """Work out a file's format from its extension, falling back to its first bytes"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in EXTENSIONS:
+        return EXTENSIONS[ext]
+    with open(path, 'rb') as f:
+        head = f.read(512)
+    if head.startswith(b'PAR1'):
+        return 'parquet'
+    if head.startswith(b'PK'):
+        return 'npz'
+    stripped = head.lstrip()
+    if stripped.startswith(b'['):
+        return 'json'
+    if stripped.startswith(b'{'):
+        return 'jsonl'
+    return 'csv'
+
+
+# --- Reading -----------------------------------------------------------------
+
+def _parse_number(text):
+    """Parse a CSV field as int when it is written as one, like json does"""
+    return float(text) if '.' in text or 'e' in text.lower() else int(text)
+
+
+def _iter_csv_cases(path):
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            expected = row.get('expected_output')
+            yield Case(
+                int(row['trip_duration_days']),
+                _parse_number(row['miles_traveled']),
+                float(row['total_receipts_amount']),
+                float(expected) if expected not in (None, '') else None,
+            )
+
+
+def _read_npz(path):
+    with np.load(path) as data:
+        array = np.empty(len(data['days']), dtype=CASE_DTYPE)
+        for name in CASE_DTYPE.names:
+            array[name] = data[name] if name in data else np.nan
+    return array
+
+
+def _read_parquet(path):
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+    table = pq.read_table(path)
+    array = np.empty(table.num_rows, dtype=CASE_DTYPE)
+    for name in CASE_DTYPE.names:
+        if name in table.column_names:
+            array[name] = table.column(name).to_numpy()
+        else:
+            array[name] = np.nan
+    return array
+
+
+def iter_cases_any(path, fmt=None):
+    """Stream Case records from a file in any supported case format"""
+    fmt = fmt or detect_format(path)
+    if fmt in ('json', 'jsonl'):
+        return iter_cases(path)
+    if fmt == 'csv':
+        return _iter_csv_cases(path)
+    if fmt == 'npz':
+        return array_to_cases(_read_npz(path))
+    if fmt == 'parquet':
+        return array_to_cases(_read_parquet(path))
+    raise ValueError(f"Cannot read cases from format '{fmt}'")
+
+
+def read_case_array(path, fmt=None):
+    """Read a case file into a structured array, using the columnar path when possible"""
+    fmt = fmt or detect_format(path)
+    if fmt == 'npz':
+        return _read_npz(path)
+    if fmt == 'parquet':
+        return _read_parquet(path)
+    return cases_to_array(iter_cases_any(path, fmt))
+
+
+def read_shards_parallel(paths, max_workers=None):
+    """Read many case shards concurrently and concatenate them in order"""
+    paths = list(paths)
+    if len(paths) == 1:
+        return read_case_array(paths[0])
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        arrays = list(pool.map(read_case_array, paths))
+    return np.concatenate(arrays) if arrays else np.empty(0, dtype=CASE_DTYPE)
+
+
+# --- Writing -----------------------------------------------------------------
+
+class CaseWriter:
+    """Incremental writer for case or prediction batches.
+
+    Row formats (txt, jsonl, csv) are written through as each batch arrives
+    and support append mode. Parquet writes one row group per batch. npz has
+    no incremental form, so its batches are held until close().
+    """
+
+    def __init__(self, path, fmt=None, append=False, predictions=False):
+        self.path = path
+        self.fmt = fmt or EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'txt' if predictions else 'jsonl')
+        self.predictions = predictions
+        allowed = PREDICTION_FORMATS if predictions else CASE_FORMATS
+        if self.fmt not in allowed:
+            raise ValueError(f"Cannot write {'predictions' if predictions else 'cases'} as '{self.fmt}'")
+        if append and self.fmt in ('json', 'npz', 'parquet'):
+            raise ValueError(f"Format '{self.fmt}' cannot be appended to; write a new shard instead")
+
+        self._file = None
+        self._csv = None
+        self._parquet = None
+        self._columns = []
+        self._json_first = True
+
+        if self.fmt in ('txt', 'jsonl', 'csv', 'json'):
+            write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+            self._file = open(path, 'a' if append else 'w', newline='' if self.fmt == 'csv' else None)
+            if self.fmt == 'csv':
+                self._csv = csv.writer(self._file)
+                if write_header:
+                    self._csv.writerow(CSV_COLUMNS + (['reimbursement'] if predictions else []))
+            elif self.fmt == 'json':
+                self._file.write('[')
+
+    def write_batch(self, cases, predictions=None):
+        """Write one batch of cases, with their predictions when writing results"""
+        if self.predictions and predictions is None:
+            raise ValueError("Prediction writers need a predictions list")
+        if self.fmt == 'txt':
+            self._file.writelines(f"{p:.2f}\n" for p in predictions)
+        elif self.fmt in ('jsonl', 'json'):
+            for i, case in enumerate(cases):
+                obj = case_to_json(case)
+                if self.predictions:
+                    obj = {'input': obj.get('input', obj), 'reimbursement': round(predictions[i], 2)}
+                if self.fmt == 'jsonl':
+                    self._file.write(json.dumps(obj) + '\n')
+                else:
+                    self._file.write(('\n  ' if self._json_first else ',\n  ') + json.dumps(obj))
+                    self._json_first = False
+        elif self.fmt == 'csv':
+            for i, case in enumerate(cases):
+                row = [case.days, case.miles, case.receipts, '' if case.expected is None else case.expected]
+                if self.predictions:
+                    row.append(f"{predictions[i]:.2f}")
+                self._csv.writerow(row)
+        else:
+            array = cases_to_array(cases, count=len(cases))
+            columns = {name: array[name] for name in CASE_DTYPE.names}
+            if self.predictions:
+                columns['reimbursement'] = np.round(np.asarray(predictions, dtype=np.float64), 2)
+            if self.fmt == 'npz':
+                self._columns.append(columns)
+            else:
+                self._write_parquet(columns)
+
+    def _write_parquet(self, columns):
+        pa = _require_pyarrow()
+        import pyarrow.parquet as pq
+        table = pa.table(columns)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.path, table.schema)
+        self._parquet.write_table(table)
+
+    def close(self):
+        if self._file is not None:
+            if self.fmt == 'json':
+                self._file.write('\n]\n')
+            self._file.close()
+        if self._parquet is not None:
+            self._parquet.close()
+        if self.fmt == 'npz':
+            names = self._columns[0].keys() if self._columns else CASE_DTYPE.names
+            np.savez(self.path, **{
+                name: np.concatenate([c[name] for c in self._columns]) if self._columns else np.empty(0)
+                for name in names
+            })
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_cases(cases, path, fmt=None, append=False):
+    """Write Case records to a file in any supported case format"""
+    with CaseWriter(path, fmt, append) as writer:
+        writer.write_batch(list(cases))
+
+
+def split_case_file(path, out_dir, rows_per_shard=100_000, fmt='jsonl'):
+    """Split a case file into numbered shards that can be read in parallel"""
+    os.makedirs(out_dir, exist_ok=True)
+    shard_paths = []
+    for n, batch in enumerate(batched(iter_cases_any(path), rows_per_shard)):
+        shard_path = os.path.join(out_dir, f"cases-{n:05d}.{fmt}")
+        write_cases(batch, shard_path, fmt)
+        shard_paths.append(shard_path)
+    return shard_paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert or split case files between formats")
+    parser.add_argument('input')
+    parser.add_argument('output', help="output file, or directory when --split is given")
+    parser.add_argument('--to', choices=CASE_FORMATS, help="output format (default: from extension)")
+    parser.add_argument('--split', type=int, metavar='ROWS', help="write shards of ROWS cases each")
+    args = parser.parse_args()
+
+    if args.split:
+        shards = split_case_file(args.input, args.output, args.split, args.to or 'jsonl')
+        print(f"Wrote {len(shards)} shards to {args.output}")
+    else:
+        with CaseWriter(args.output, args.to) as writer:
+            total = 0
+            for batch in batched(iter_cases_any(args.input), 10_000):
+                writer.write_batch(batch)
+                total += len(batch)
+        print(f"Converted {total} cases from {detect_format(args.input)} to {writer.fmt}")
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+A small query language over the columnar case store.
+
+The analysis scripts filter cases with list comprehensions like
+
+    [c for c in data if c['input']['trip_duration_days'] == 3 and c['input']['miles_traveled'] > 500]
+
+Here the same thing is
+
+    query().where('days == 3 and miles > 500').order_by('miles').rows('miles', 'receipts', 'expected')
+
+Expressions are Python expression syntax over column names. They are
+parsed with ast and compiled to NumPy operations, never eval'd:
+
+    columns     case (1-based), days, miles, receipts, expected, plus DERIVED
+                (miles_per_day, receipts_per_day, output_per_day, receipt_ratio)
+    operators   + - * / // % **, comparisons (chained too), and / or / not, x in (1, 2)
+    functions   abs(x), min(x, y), max(x, y), round(x[, places]), floor(x), ceil(x)
+
+A Query is immutable; where / order_by / limit / top return new queries.
+Results come out as columns (arrays), rows (tuples), a count, or grouped
+aggregates:
+
+    query().where('miles >= 800').group_by('days').agg(n='count', low='min(expected)', avg='mean(expected)')
+
+Aggregates: count, sum, mean, min, max, median, std. group_by() with no keys
+aggregates the whole result as a single group.
+
+Caching: compiled expressions are cached by text, every expression evaluated
+over a table is cached on it (so 'miles / days' is computed once per
+table however many queries use it), and finished results are cached by query.
+Cached arrays are read-only.
+
+Usage:
+    python3 case_query.py "days == 3 and miles > 500" --order miles --columns miles receipts expected
+    python3 case_query.py "miles >= 800" --group-by days --agg "n=count" "avg=mean(expected)"
+"""
+
+import argparse
+import ast
+from functools import lru_cache
+
+import numpy as np
+
+from case_records import load_case_array
+
+BASE_COLUMNS = ('days', 'miles', 'receipts', 'expected')
+DERIVED = {
+    'miles_per_day': 'miles / days',
+    'receipts_per_day': 'receipts / days',
+    'output_per_day': 'expected / days',
+    'receipt_ratio': 'expected / receipts',
+}
+
+_BINARY = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide, ast.Mod: np.mod, ast.Pow: np.power,
+}
+_COMPARE = {
+    ast.Eq: np.equal, ast.NotEq: np.not_equal, ast.Lt: np.less, ast.LtE: np.less_equal,
+    ast.Gt: np.greater, ast.GtE: np.greater_equal,
+}
+_FUNCTIONS = {
+    'abs': np.abs, 'min': np.minimum, 'max': np.maximum, 'round': np.round,
+    'floor': np.floor, 'ceil': np.ceil,
+}
+_ARITY = {'abs': (1,), 'min': (2,), 'max': (2,), 'round': (1, 2), 'floor': (1,), 'ceil': (1,)}
+AGGREGATES = ('count', 'sum', 'mean', 'min', 'max', 'median', 'std')
+
+
+class QueryError(ValueError):
+    pass
+
+
+# --- Expressions ----------------------------------------------------------------
+
+def _compile_node(node, text):
+    """AST node -> function(table) returning an array or scalar"""
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, text)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+            and not isinstance(node.value, bool):
+        value = node.value
+        return lambda table: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda table: table.column(name)
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        op = _BINARY[type(node.op)]
+        left, right = _compile_node(node.left, text), _compile_node(node.right, text)
+        return lambda table: op(left(table), right(table))
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand, text)
+        if isinstance(node.op, ast.USub):
+            return lambda table: np.negative(operand(table))
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        if isinstance(node.op, ast.Not):
+            return lambda table: np.logical_not(operand(table))
+    if isinstance(node, ast.BoolOp):
+        op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        parts = [_compile_node(v, text) for v in node.values]
+
+        def boolean(table):
+            result = parts[0](table)
+            for part in parts[1:]:
+                result = op(result, part(table))
+            return result
+        return boolean
+    if isinstance(node, ast.Compare):
+        return _compile_compare(node, text)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS \
+            and not node.keywords:
+        name = node.func.id
+        if len(node.args) not in _ARITY[name]:
+            expected = ' or '.join(str(n) for n in _ARITY[name])
+            raise QueryError(f"{name}() takes {expected} argument(s), got {len(node.args)} in: {text}")
+        if name == 'round' and len(node.args) == 2 and not (
+                isinstance(node.args[1], ast.Constant) and type(node.args[1].value) is int):
+            raise QueryError(f"round() needs a whole number of decimals in: {text}")
+        func = _FUNCTIONS[name]
+        args = [_compile_node(a, text) for a in node.args]
+        return lambda table: func(*(arg(table) for arg in args))
+    raise QueryError(f"Unsupported expression '{ast.unparse(node)}' in: {text}")
+
+
+def _isin(values, invert):
+    return lambda a, _: np.isin(a, values, invert=invert)
+
+
+def _compile_compare(node, text):
+    """Chained comparison: a < b <= c is (a < b) & (b <= c)"""
+    operands = [node.left] + node.comparators
+    compiled = {}
+    tests = []
+    for i, op in enumerate(node.ops):
+        if type(op) in _COMPARE:
+            tests.append((_COMPARE[type(op)], i))
+        elif isinstance(op, (ast.In, ast.NotIn)):
+            if not isinstance(operands[i + 1], (ast.Tuple, ast.List)):
+                raise QueryError(f"'in' needs a literal tuple or list in: {text}")
+            try:
+                values = [ast.literal_eval(e) for e in operands[i + 1].elts]
+            except (ValueError, TypeError, SyntaxError):
+                raise QueryError(f"'in' needs literal numbers in: {text}") from None
+            if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                raise QueryError(f"'in' needs literal numbers in: {text}")
+            tests.append((_isin(values, isinstance(op, ast.NotIn)), i))
+            compiled[i + 1] = lambda table: None
+        else:
+            raise QueryError(f"Unsupported comparison in: {text}")
+    for i, operand in enumerate(operands):
+        if i not in compiled:
+            compiled[i] = _compile_node(operand, text)
+
+    def compare(table):
+        values = [compiled[i](table) for i in range(len(operands))]
+        result = True
+        for op, i in tests:
+            result = np.logical_and(result, op(values[i], values[i + 1]))
+        return result
+    return compare
+
+
+@lru_cache(maxsize=None)
+def compile_expression(text):
+    """Expression text -> function(table)"""
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+    except SyntaxError as e:
+        raise QueryError(f"Cannot parse '{text}': {e.msg}") from None
+    return _compile_node(tree, text)
+
+
+@lru_cache(maxsize=None)
+def parse_aggregate(spec):
+    """'count' or 'func(expression)' -> (func, expression text or None)"""
+    spec = spec.strip()
+    if spec in ('count', 'count()'):
+        return 'count', None
+    try:
+        tree = ast.parse(spec, mode='eval').body
+    except SyntaxError as e:
+        raise QueryError(f"Cannot parse aggregate '{spec}': {e.msg}") from None
+    if not (isinstance(tree, ast.Call) and isinstance(tree.func, ast.Name)
+            and tree.func.id in AGGREGATES and len(tree.args) == 1):
+        raise QueryError(f"Aggregate must be count or one of {', '.join(AGGREGATES[1:])}(expression): {spec}")
+    return tree.func.id, ast.unparse(tree.args[0])
+
+
+# --- Table ----------------------------------------------------------------------
+
+class CaseTable:
+    """Case columns plus a cache of every expression evaluated over them"""
+
+    def __init__(self, cases):
+        self.size = len(cases)
+        self._columns = {'case': np.arange(1, self.size + 1)}
+        for name in BASE_COLUMNS:
+            self._columns[name] = np.array(cases[name])
+        for values in self._columns.values():
+            values.flags.writeable = False
+        self._expressions = {}
+        self._results = {}
+
+    def column(self, name):
+        if name in self._columns:
+            return self._columns[name]
+        if name in DERIVED:
+            return self.evaluate(DERIVED[name])
+        raise QueryError(f"Unknown column '{name}', choose from: "
+                         f"{', '.join(list(self._columns) + list(DERIVED))}")
+
+    def evaluate(self, text):
+        """An expression over every row (cached; read-only)"""
+        if text not in self._expressions:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                value = compile_expression(text)(self)
+            value = np.array(np.broadcast_to(value, (self.size,)))
+            value.flags.writeable = False
+            self._expressions[text] = value
+        return self._expressions[text]
+
+    def cache_info(self):
+        return {'expressions': len(self._expressions), 'results': len(self._results)}
+
+
+_tables = {}
+
+
+def load_table(path='public_cases.json'):
+    """The CaseTable for a case file, loaded once per process"""
+    if path not in _tables:
+        _tables[path] = CaseTable(load_case_array(path))
+    return _tables[path]
+
+
+def _stable_order(values, descending):
+    """argsort that keeps equal values in row order either way, like list.sort(reverse=...);
+    works for any dtype (bools included) and leaves NaNs last"""
+    if not descending:
+        return np.argsort(values, kind='stable')
+    # A stable sort of the reversed array, read backwards, is a stable descending sort
+    order = len(values) - 1 - np.argsort(values[::-1], kind='stable')[::-1]
+    if values.dtype.kind == 'f':
+        missing = np.isnan(values[order])
+        order = np.concatenate([order[~missing], order[missing]])
+    return order
+
+
+# --- Queries --------------------------------------------------------------------
+
+class Query:
+    """An immutable filter / order / limit over a CaseTable"""
+
+    def __init__(self, table, filters=(), order=None, descending=False, limit_to=None):
+        self.table = table
+        self.filters = filters
+        self.order = order
+        self.descending = descending
+        self.limit_to = limit_to
+
+    def _replace(self, **changes):
+        state = {'filters': self.filters, 'order': self.order, 'descending': self.descending,
+                 'limit_to': self.limit_to}
+        state.update(changes)
+        return Query(self.table, **state)
+
+    def where(self, expression):
+        compile_expression(expression)  # fail early on bad syntax
+        return self._replace(filters=self.filters + (expression,))
+
+    def order_by(self, expression, descending=False):
+        """Stable sort, like list.sort(key=..., reverse=...)"""
+        compile_expression(expression)
+        return self._replace(order=expression, descending=descending)
+
+    def limit(self, n):
+        return self._replace(limit_to=n)
+
+    def top(self, k, expression):
+        return self.order_by(expression, descending=True).limit(k)
+
+    def _key(self, *extra):
+        return (self.filters, self.order, self.descending, self.limit_to) + extra
+
+    def indices(self):
+        """Row numbers of the result, in order"""
+        key = self._key('indices')
+        cache = self.table._results
+        if key not in cache:
+            mask = np.ones(self.table.size, dtype=bool)
+            for expression in self.filters:
+                mask &= self.table.evaluate(expression).astype(bool)
+            rows = np.flatnonzero(mask)
+            if self.order is not None:
+                values = self.table.evaluate(self.order)[rows]
+                rows = rows[_stable_order(values, self.descending)]
+            if self.limit_to is not None:
+                rows = rows[:self.limit_to]
+            rows.flags.writeable = False
+            cache[key] = rows
+        return cache[key]
+
+    def count(self):
+        return len(self.indices())
+
+    def column(self, expression):
+        return self.table.evaluate(expression)[self.indices()]
+
+    def columns(self, *expressions):
+        """{expression: array} for the result rows"""
+        return {e: self.column(e) for e in expressions}
+
+    def rows(self, *expressions):
+        """Result rows as tuples of Python numbers"""
+        return list(zip(*(self.column(e).tolist() for e in expressions)))
+
+    def group_by(self, *keys):
+        return GroupedQuery(self, keys)
+
+
+class GroupedQuery:
+    def __init__(self, query, keys):
+        self.query = query
+        self.keys = keys
+
+    def agg(self, **specs):
+        """{key: array of group keys (sorted), name: array of aggregates, ...}"""
+        cache_key = self.query._key('agg', self.keys, tuple(sorted(specs.items())))
+        cache = self.query.table._results
+        if cache_key in cache:
+            return cache[cache_key]
+
+        key_values = [self.query.column(k) for k in self.keys]
+        if not self.keys:
+            # No keys: the whole result is one group
+            groups, inverse = np.empty((1, 0)), np.zeros(self.query.count(), dtype=np.intp)
+        elif len(key_values[0]):
+            stacked = np.column_stack(key_values)
+            groups, inverse = np.unique(stacked, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+        else:
+            groups, inverse = np.empty((0, len(self.keys))), np.empty(0, dtype=np.intp)
+        n_groups = len(groups)
+        counts = np.bincount(inverse, minlength=n_groups)
+
+        result = {k: groups[:, i] for i, k in enumerate(self.keys)}
+        # Rows sorted by group for the order-based aggregates
+        order = np.argsort(inverse, kind='stable')
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.intp)
+        for name, spec in specs.items():
+            func, expression = parse_aggregate(spec)
+            if func == 'count':
+                result[name] = counts
+                continue
+            values = self.query.column(expression).astype(np.float64)
+            if func in ('sum', 'mean', 'std'):
+                sums = np.bincount(inverse, weights=values, minlength=n_groups)
+                if func == 'sum':
+                    result[name] = sums
+                    continue
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    means = sums / counts
+                if func == 'mean':
+                    result[name] = means
+                    continue
+                squares = np.bincount(inverse, weights=(values - means[inverse]) ** 2, minlength=n_groups)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    result[name] = np.sqrt(squares / counts)
+            elif func in ('min', 'max'):
+                reduce = np.minimum if func == 'min' else np.maximum
+                result[name] = np.full(n_groups, np.nan)
+                filled = counts > 0
+                if filled.any():
+                    result[name][filled] = reduce.reduceat(values[order], starts[filled])
+            else:  # median
+                sorted_values = values[np.lexsort((values, inverse))]
+                result[name] = np.array([np.median(sorted_values[s:s + c]) if c else np.nan
+                                         for s, c in zip(starts, counts)])
+        for values in result.values():
+            values.flags.writeable = False
+        cache[cache_key] = result
+        return result
+
+
+def query(source='public_cases.json'):
+    """A Query over a case file path or an existing CaseTable"""
+    table = source if isinstance(source, CaseTable) else load_table(source)
+    return Query(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the case store")
+    parser.add_argument('where', nargs='*', help="filter expressions (ANDed)")
+    parser.add_argument('--cases', default='public_cases.json')
+    parser.add_argument('--columns', nargs='+', default=['case', 'days', 'miles', 'receipts', 'expected'])
+    parser.add_argument('--order', help="sort expression")
+    parser.add_argument('--desc', action='store_true')
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--group-by', nargs='+')
+    parser.add_argument('--agg', nargs='+', default=['n=count'], help="name=aggregate, e.g. avg=mean(expected)")
+    args = parser.parse_args()
+
+    specs = {}
+    for spec in args.agg:
+        name, sep, aggregate = spec.partition('=')
+        if not (sep and name.strip() and aggregate.strip()):
+            parser.error(f"--agg expects name=aggregate, e.g. avg=mean(expected), got '{spec}'")
+        specs[name.strip()] = aggregate
+
+    try:
+        q = query(args.cases)
+        for expression in args.where:
+            q = q.where(expression)
+        if args.order:
+            q = q.order_by(args.order, args.desc)
+        if args.limit is not None:
+            q = q.limit(args.limit)
+
+        if args.group_by:
+            result = q.group_by(*args.group_by).agg(**specs)
+            names = list(result)
+        else:
+            result = q.columns(*args.columns)
+            names = args.columns
+    except QueryError as e:
+        parser.error(str(e))
+    print('  '.join(f"{name:>14s}" for name in names))
+    for row in zip(*(result[name].tolist() for name in names)):
+        print('  '.join(f"{value:14.2f}" if isinstance(value, float) else f"{value:14d}" for value in row))
+    print(f"\n{len(next(iter(result.values())))} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Compact record types for reimbursement cases.
+
+Public cases arrive as nested `{'input': {...}, 'expected_output': ...}` dicts
+and private cases as flat input dicts. Both are normalised into a `Case`
+NamedTuple for per-case code, or into a structured NumPy array (`CASE_DTYPE`,
+28 bytes per row) for bulk work over thousands or millions of cases.
+"""
+
+import json
+from itertools import islice
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+# Bulk layout: one row per case. Private cases store NaN as expected output.
+CASE_DTYPE = np.dtype([
+    ('days', np.int32),
+    ('miles', np.float64),
+    ('receipts', np.float64),
+    ('expected', np.float64),
+])
+
+
+class Case(NamedTuple):
+    """A single trip: the three system inputs plus the known output, if any"""
+    days: int
+    miles: float
+    receipts: float
+    expected: Optional[float] = None
+
+
+class CaseResult(NamedTuple):
+    """A case scored against a predictor (replaces the per-case result dicts)"""
+    case: int
+    days: int
+    miles: float
+    receipts: float
+    expected: float
+    calculated: float
+    error: float
+
+
+def case_from_json(obj):
+    """Build a Case from either the public (nested) or private (flat) JSON layout"""
+    input_data = obj.get('input', obj)
+    return Case(
+        input_data['trip_duration_days'],
+        input_data['miles_traveled'],
+        input_data['total_receipts_amount'],
+        obj.get('expected_output'),
+    )
+
+
+def case_to_json(case):
+    """Inverse of case_from_json; cases without an output use the private layout"""
+    input_data = {
+        'trip_duration_days': case.days,
+        'miles_traveled': case.miles,
+        'total_receipts_amount': case.receipts,
+    }
+    if case.expected is None:
+        return input_data
+    return {'input': input_data, 'expected_output': case.expected}
+
+
+# Bytes read per chunk when streaming a JSON array
+STREAM_CHUNK_SIZE = 1 << 16
+
+
+def _iter_json_array(f, first_chunk):
+    """Yield the elements of a top-level JSON array one at a time, holding
+    at most one element plus one chunk in memory"""
+    decoder = json.JSONDecoder()
+    buffer = first_chunk[first_chunk.index('[') + 1:]
+    pos = 0
+    eof = False
+    while True:
+        # Skip separators between elements
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("Unterminated JSON array")
+            buffer, pos = f.read(STREAM_CHUNK_SIZE), 0
+            eof = not buffer
+            continue
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = None
+        if end is None or (end == len(buffer) and not eof):
+            # Element straddles the chunk boundary: pull in more input
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield obj
+        pos = end
+
+
+def iter_json_records(filename):
+    """Stream raw case dicts from a JSON array or JSON Lines file.
+
+    The layout is detected from the first non-blank character, so the same
+    call handles `public_cases.json` and multi-million-row `.jsonl` exports
+    with flat memory use.
+    """
+    with open(filename, 'r') as f:
+        first_chunk = f.read(STREAM_CHUNK_SIZE)
+        stripped = first_chunk.lstrip()
+        if stripped.startswith('['):
+            yield from _iter_json_array(f, first_chunk)
+            return
+        # JSON Lines: one object per line
+        pending = first_chunk
+        while True:
+            *lines, pending = pending.split('\n')
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            pending += chunk
+        if pending.strip():
+            yield json.loads(pending)
+
+
+def iter_cases(filename):
+    """Stream Case records from a JSON array or JSON Lines file"""
+    for obj in iter_json_records(filename):
+        yield case_from_json(obj)
+
+
+def load_cases(filename='public_cases.json'):
+    """Load a case file as a list of Case records"""
+    return list(iter_cases(filename))
+
+
+def cases_to_array(cases, count=-1):
+    """Pack an iterable of Case records into a structured array without
+    building intermediate lists"""
+    rows = (
+        (c.days, c.miles, c.receipts, np.nan if c.expected is None else c.expected)
+        for c in cases
+    )
+    return np.fromiter(rows, dtype=CASE_DTYPE, count=count)
+
+
+def array_to_cases(array):
+    """Iterate over a structured case array as Case records"""
+    has_expected = ~np.isnan(array['expected'])
+    for days, miles, receipts, expected, known in zip(
+        array['days'].tolist(),
+        array['miles'].tolist(),
+        array['receipts'].tolist(),
+        array['expected'].tolist(),
+        has_expected.tolist(),
+    ):
+        # Most mileages are whole numbers; keep them as ints like the JSON does
+        if miles.is_integer():
+            miles = int(miles)
+        yield Case(days, miles, receipts, expected if known else None)
+
+
+def load_case_array(filename='public_cases.json'):
+    """Load a case file straight into a structured array"""
+    return cases_to_array(iter_cases(filename))
+
+
+def batched(iterable, batch_size):
+    """Yield lists of up to batch_size items from an iterable"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def score_case(case_num, case, calculated):
+    """Build a CaseResult for one prediction"""
+    return CaseResult(
+        case_num, case.days, case.miles, case.receipts,
+        case.expected, calculated, abs(calculated - case.expected),
+    )
+
+
+if __name__ == "__main__":
+    public = load_case_array('public_cases.json')
+    private = load_case_array('private_cases.json')
+    print(f"Public cases:  {len(public):5d} rows, {public.nbytes:7d} bytes")
+    print(f"Private cases: {len(private):5d} rows, {private.nbytes:7d} bytes")
+    for days in np.unique(public['days']):
+        day_rows = public[public['days'] == days]
+        print(f"  {days:2d} days: {len(day_rows):3d} cases, "
+              f"avg output ${day_rows['expected'].mean():8.2f}")
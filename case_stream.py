@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Streaming prediction pipeline for arbitrarily large case files.
+
+Cases are read incrementally from a JSON array or JSON Lines file, pushed
+through a batch predictor in fixed-size batches, and each batch of results is
+appended to the output file before the next one is read. Memory stays flat
+whatever the size of the input. Input and output formats are auto-detected
+(JSON, JSON Lines, CSV, npz, Parquet; see case_formats).
+
+Usage:
+    python3 case_stream.py private_cases.json private_results.txt --predictor rule_based
+"""
+
+import argparse
+import sys
+import time
+
+from case_formats import CASE_FORMATS, PREDICTION_FORMATS, CaseWriter, iter_cases_any
+from case_records import batched
+from fixed_point import ROUNDING_MODES
+from predictors import BATCH_PREDICTORS, get_batch_predictor
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def run_pipeline(input_file, output_file, predictor='rule_based', batch_size=DEFAULT_BATCH_SIZE,
+                 input_format=None, output_format=None, append=False, rounding=None):
+    """Stream input_file through the named predictor into output_file.
+
+    Formats default to auto-detection from the file names; see case_formats.
+    rounding re-rounds every prediction to the cent with a fixed_point mode.
+    """
+    predict_batch = get_batch_predictor(predictor, rounding)
+    cases = iter_cases_any(input_file, input_format)
+    count = 0
+    start = time.perf_counter()
+    with CaseWriter(output_file, output_format, append=append, predictions=True) as writer:
+        for batch in batched(cases, batch_size):
+            writer.write_batch(batch, predict_batch(batch))
+            count += len(batch)
+    elapsed = time.perf_counter() - start
+    return count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream cases through a predictor in batches")
+    parser.add_argument('input', nargs='?', default='private_cases.json')
+    parser.add_argument('output', nargs='?', default='private_results.txt')
+    parser.add_argument('--predictor', default='rule_based', choices=sorted(BATCH_PREDICTORS))
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--input-format', choices=CASE_FORMATS, help="default: auto-detect")
+    parser.add_argument('--output-format', choices=PREDICTION_FORMATS, help="default: from extension")
+    parser.add_argument('--append', action='store_true', help="append to an existing row-format output")
+    parser.add_argument('--rounding', choices=ROUNDING_MODES, help="re-round predictions to the cent in fixed point")
+    args = parser.parse_args()
+
+    count, elapsed = run_pipeline(args.input, args.output, args.predictor, args.batch_size,
+                                  args.input_format, args.output_format, args.append, args.rounding)
+    rate = count / elapsed if elapsed > 0 else float('inf')
+    print(f"Wrote {count} predictions to {args.output} in {elapsed:.2f}s ({rate:,.0f} cases/sec)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
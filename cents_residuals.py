@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Measure cents-level effects in model residuals with permutation tests.
+
+rule_based_solution adjusts the amount by its cents_bonus parameter (an
+interview-derived $5, tuned since) when the receipt cents are 49 or 99, and
+pattern_matching_solution adds $15/$20. This checks that and similar
+hunches against the data. Residuals
+(expected - baseline prediction, where the baseline never saw the case) are
+grouped by each pattern in PATTERNS - receipt cents, the .49/.99 cents,
+output cents, and modular patterns of each input - and two things are
+tested by permutation:
+
+    pattern   does the grouping explain any residual variance?  (between-group
+              sum of squares vs residuals shuffled across groups)
+    group     is this group's mean residual away from the overall mean?
+              (Holm-adjusted across the pattern's groups)
+
+Permutations are evaluated as a matrix product: a block of shuffled residual
+vectors (permutations x cases) times the one-hot group matrix gives every
+group sum for every permutation at once. Blocks run in a process pool.
+
+Usage:
+    python3 cents_residuals.py                          # kNN leave-one-out residuals, 10,000 permutations
+    python3 cents_residuals.py --baseline tree_cv --permutations 50000
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import rule_based_solution
+from fixed_point import to_cents
+
+PERMUTATIONS = 10000
+BLOCK_SIZE = 1000
+ALPHA = 0.05
+MIN_GROUP = 5  # smaller groups are tested but not listed
+
+
+def _cents(values):
+    return to_cents(values, 'half_even')
+
+
+PATTERNS = {
+    'receipt_cents': lambda c: _cents(c['receipts']) % 100,
+    'receipt_cents_49_99': lambda c: np.select([_cents(c['receipts']) % 100 == 49,
+                                                _cents(c['receipts']) % 100 == 99], [49, 99], 0),
+    'receipt_cents_last_digit': lambda c: _cents(c['receipts']) % 10,
+    'receipt_dollars_mod_10': lambda c: _cents(c['receipts']) // 100 % 10,
+    'output_cents': lambda c: _cents(c['expected']) % 100,
+    'miles_mod_10': lambda c: _cents(c['miles']) // 100 % 10,
+    'miles_fractional': lambda c: (_cents(c['miles']) % 100 != 0).astype(np.int64),
+    'days_mod_2': lambda c: c['days'].astype(np.int64) % 2,
+}
+
+
+def _knn_loo(cases):
+    import knn_loo
+    return knn_loo.loo_predictions(cases, 'run_sh')
+
+
+def _tree_cv(cases):
+    import tree_induction
+    return tree_induction.cross_validate(cases, 10)
+
+
+# Out-of-sample baselines, so a case's own quirk never leaks into its prediction
+BASELINES = {
+    'knn_loo': _knn_loo,
+    'tree_cv': _tree_cv,
+}
+
+
+def group_matrix(labels):
+    """(group values, one-hot (cases, groups) matrix, group sizes)"""
+    groups, index = np.unique(labels, return_inverse=True)
+    onehot = np.zeros((len(labels), len(groups)))
+    onehot[np.arange(len(labels)), index] = 1.0
+    return groups, onehot, onehot.sum(axis=0)
+
+
+def group_statistics(residual_rows, onehot, sizes, overall):
+    """Between-group sum of squares and |group mean - overall| for each row
+    of residuals (rows are the observed vector or permutations of it)"""
+    deviation = (residual_rows @ onehot) / sizes - overall
+    return (sizes * deviation ** 2).sum(axis=-1), np.abs(deviation)
+
+
+def holm(p_values):
+    """Holm step-down adjusted p-values"""
+    p_values = np.asarray(p_values)
+    order = np.argsort(p_values)
+    m = len(p_values)
+    adjusted = np.minimum(1.0, np.maximum.accumulate(p_values[order] * (m - np.arange(m))))
+    result = np.empty(m)
+    result[order] = adjusted
+    return result
+
+
+_residuals = None
+_matrices = None
+
+
+def _init_worker(residuals, labels):
+    global _residuals, _matrices
+    _residuals = residuals
+    _matrices = {name: group_matrix(values) for name, values in labels.items()}
+
+
+def _permutation_block(job):
+    """Counts of permutations at least as extreme as observed, for one block"""
+    pattern, seed, count = job
+    _, onehot, sizes = _matrices[pattern]
+    overall = _residuals.mean()
+    observed_stat, observed_dev = group_statistics(_residuals, onehot, sizes, overall)
+    rng = np.random.default_rng(seed)
+    shuffled = _residuals[rng.permuted(np.tile(np.arange(len(_residuals)), (count, 1)), axis=1)]
+    stats, devs = group_statistics(shuffled, onehot, sizes, overall)
+    # Small tolerance so ties from float summation order count as ties
+    tolerance = 1e-9
+    return (pattern, int((stats >= observed_stat * (1 - tolerance)).sum()),
+            (devs >= observed_dev * (1 - tolerance)).sum(axis=0))
+
+
+def analyze(residuals, labels, permutations=PERMUTATIONS, seed=0, workers=None):
+    """Per pattern: (groups, sizes, mean residuals, variance share, p-value, group p-values)"""
+    jobs = []
+    for p, name in enumerate(labels):
+        for block, start in enumerate(range(0, permutations, BLOCK_SIZE)):
+            jobs.append((name, seed * 1_000_003 + p * 1009 + block, min(BLOCK_SIZE, permutations - start)))
+
+    pattern_counts = {name: 0 for name in labels}
+    group_counts = {}
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(residuals, labels)) as pool:
+        for name, count, per_group in pool.map(_permutation_block, jobs):
+            pattern_counts[name] += count
+            group_counts[name] = group_counts.get(name, 0) + per_group
+
+    overall = residuals.mean()
+    total_ss = ((residuals - overall) ** 2).sum()
+    results = {}
+    for name, values in labels.items():
+        groups, onehot, sizes = group_matrix(values)
+        stat, _ = group_statistics(residuals, onehot, sizes, overall)
+        results[name] = {
+            'groups': groups,
+            'sizes': sizes.astype(int),
+            'means': (residuals @ onehot) / sizes,
+            'variance_share': float(stat / total_ss),
+            'p_value': (pattern_counts[name] + 1) / (permutations + 1),
+            'group_p': holm((group_counts[name] + 1) / (permutations + 1)),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Permutation tests for cents-level residual effects")
+    parser.add_argument('--cases', default='public_cases.json')
+    parser.add_argument('--baseline', default='knn_loo', choices=sorted(BASELINES))
+    parser.add_argument('--permutations', type=int, default=PERMUTATIONS)
+    parser.add_argument('--alpha', type=float, default=ALPHA)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    from case_records import load_case_array
+    cases = load_case_array(args.cases)
+    residuals = cases['expected'] - np.asarray(BASELINES[args.baseline](cases), dtype=np.float64)
+    labels = {name: pattern(cases) for name, pattern in PATTERNS.items()}
+
+    print("🪙 CENTS-PATTERN RESIDUAL ANALYSIS")
+    print("=" * 78)
+    print(f"Baseline {args.baseline}: mean residual ${residuals.mean():.2f}, "
+          f"std ${residuals.std():.2f} over {len(cases)} cases")
+    start = time.perf_counter()
+    results = analyze(residuals, labels, args.permutations, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{args.permutations:,} permutations x {len(labels)} patterns in {elapsed:.1f}s\n")
+
+    pattern_p = holm([r['p_value'] for r in results.values()])
+    print(f"{'Pattern':26s} {'Groups':>6s} {'Var share':>9s} {'p':>8s} {'Holm p':>8s}")
+    for (name, r), adjusted in zip(results.items(), pattern_p):
+        verdict = "✅ real" if adjusted < args.alpha else "❌ noise"
+        print(f"{name:26s} {len(r['groups']):6d} {r['variance_share']:9.2%} {r['p_value']:8.4f} "
+              f"{adjusted:8.4f}  {verdict}")
+
+    print(f"\nGroups with Holm-adjusted p < {args.alpha} (at least {MIN_GROUP} cases):")
+    found = False
+    for name, r in results.items():
+        for g, n, m, p in zip(r['groups'], r['sizes'], r['means'], r['group_p']):
+            if p < args.alpha and n >= MIN_GROUP:
+                found = True
+                print(f"  {name} = {g}: {n} cases, mean residual ${m:+.2f} (p = {p:.4f})")
+    if not found:
+        print("  none")
+
+    r = results['receipt_cents_49_99']
+    print("\n🔍 The .49/.99 rounding-bug hypothesis:")
+    for g, n, m, p in zip(r['groups'], r['sizes'], r['means'], r['group_p']):
+        label = 'other cents' if g == 0 else f".{g} receipts"
+        print(f"  {label:14s} {n:4d} cases, mean residual ${m:+8.2f} (group p = {p:.4f})")
+    bonus = rule_based_solution.PARAMS['cents_bonus']
+    print(f"  rule_based_solution adds {'-' if bonus < 0 else '+'}${abs(bonus):.2f} to both; "
+          "pattern_matching_solution adds $15 (.49) / $20 (.99)")
+
+
+if __name__ == "__main__":
+    main()
@@ -48,7 +48,54 @@ if [ ! -f "public_cases.json" ]; then
     exit 1
 fi
 
+# Per-case time budget in seconds (the README requires under 5 seconds)
+CASE_TIMEOUT=${CASE_TIMEOUT:-5}
+
+# Prefer coreutils timeout (gtimeout on macOS); otherwise fall back to a watchdog
+TIMEOUT_CMD=""
+if command -v timeout &> /dev/null; then
+    TIMEOUT_CMD="timeout"
+elif command -v gtimeout &> /dev/null; then
+    TIMEOUT_CMD="gtimeout"
+fi
+
+# Current time in microseconds, stored in NOW_US (no subshell on bash 5+)
+now_us() {
+    if [ -n "${EPOCHREALTIME:-}" ]; then
+        NOW_US=${EPOCHREALTIME/[.,]/}
+    elif command -v perl &> /dev/null; then
+        NOW_US=$(perl -MTime::HiRes=time -e 'printf "%d", time * 1000000')
+    else
+        NOW_US=$(( $(date +%s) * 1000000 ))
+    fi
+}
+
+# Run ./run.sh with the time budget; exits 124 if the case was killed
+run_case() {
+    if [ -n "$TIMEOUT_CMD" ]; then
+        "$TIMEOUT_CMD" "$CASE_TIMEOUT" ./run.sh "$@"
+        return $?
+    fi
+    ./run.sh "$@" &
+    local pid=$!
+    ( trap 'kill $sleeper 2>/dev/null; exit 0' TERM
+      sleep "$CASE_TIMEOUT" & sleeper=$!
+      wait $sleeper
+      children=$(pgrep -P "$pid")
+      kill -TERM "$pid" $children 2>/dev/null ) > /dev/null 2>&1 &
+    local watchdog=$!
+    wait "$pid"
+    local status=$?
+    kill -TERM "$watchdog" 2>/dev/null
+    wait "$watchdog" 2>/dev/null
+    if [ $status -eq 143 ]; then
+        return 124
+    fi
+    return $status
+}
+
 echo "📊 Running evaluation against 1,000 test cases..."
+echo "⏱️  Per-case time budget: ${CASE_TIMEOUT}s (set CASE_TIMEOUT to change)"
 echo
 
 # Extract all test data upfront in a single jq call for better performance
@@ -71,6 +118,8 @@ max_error="0"
 max_error_case=""
 results_array=()
 errors_array=()
+latency_array=()
+timeouts=0
 
 # Process each test case
 for ((i=0; i<num_cases; i++)); do
@@ -81,8 +130,17 @@ for ((i=0; i<num_cases; i++)); do
     # Extract test case data from pre-loaded array
     IFS=':' read -r trip_duration miles_traveled receipts_amount expected <<< "${test_cases[i]}"
     
-    # Run the user's implementation
-    if script_output=$(./run.sh "$trip_duration" "$miles_traveled" "$receipts_amount" 2>/dev/null); then
+    # Run the user's implementation, timing it against the budget
+    now_us; start_us=$NOW_US
+    run_status=0
+    script_output=$(run_case "$trip_duration" "$miles_traveled" "$receipts_amount" 2>/dev/null) || run_status=$?
+    now_us; elapsed_us=$((NOW_US - start_us))
+    latency_array+=("$elapsed_us:$((i+1)):$trip_duration:$miles_traveled:$receipts_amount")
+    
+    if [ $run_status -eq 124 ]; then
+        timeouts=$((timeouts + 1))
+        errors_array+=("Case $((i+1)): Timed out after ${CASE_TIMEOUT}s")
+    elif [ $run_status -eq 0 ]; then
         # Check if output is a valid number
         output=$(echo "$script_output" | tr -d '[:space:]')
         if [[ $output =~ ^-?[0-9]+\.?[0-9]*$ ]]; then
@@ -120,7 +178,7 @@ for ((i=0; i<num_cases; i++)); do
         fi
     else
         # Capture stderr for error reporting
-        error_msg=$(./run.sh "$trip_duration" "$miles_traveled" "$receipts_amount" 2>&1 >/dev/null | tr -d '\n')
+        error_msg=$(run_case "$trip_duration" "$miles_traveled" "$receipts_amount" 2>&1 >/dev/null | tr -d '\n')
         errors_array+=("Case $((i+1)): Script failed with error: $error_msg")
     fi
 done
@@ -187,6 +245,30 @@ else
     fi
 fi
 
+# Latency report: percentiles over every case that was run, plus the slowest ones
+if [ ${#latency_array[@]} -gt 0 ]; then
+    echo
+    echo "⏱️  Latency per case (wall time of ./run.sh):"
+    printf '%s\n' "${latency_array[@]}" | cut -d: -f1 | sort -n | awk -v budget="$CASE_TIMEOUT" '
+        { v[NR] = $1; sum += $1; if ($1 > budget * 1000000) over++ }
+        function pct(p,   k) { k = int(p * NR + 0.999999); if (k < 1) k = 1; if (k > NR) k = NR; return v[k] / 1000 }
+        END {
+            printf "  p50: %.1fms  p90: %.1fms  p99: %.1fms  max: %.1fms  mean: %.1fms\n",
+                pct(0.50), pct(0.90), pct(0.99), v[NR] / 1000, sum / NR / 1000
+            printf "  Total run time: %.1fs over %d cases\n", sum / 1000000, NR
+            printf "  Over %ss budget: %d\n", budget, over + 0
+        }'
+    echo "  Timed out (killed at ${CASE_TIMEOUT}s): $timeouts"
+    echo "  Slowest cases:"
+    IFS=$'\n' slowest_cases=($(printf '%s\n' "${latency_array[@]}" | sort -t: -k1 -nr | head -5))
+    for entry in "${slowest_cases[@]}"; do
+        IFS=: read -r elapsed_us case_num trip_duration miles_traveled receipts_amount <<< "$entry"
+        printf "    Case %s: %s days, %s miles, \$%s receipts - %s\n" "$case_num" "$trip_duration" "$miles_traveled" "$receipts_amount" \
+            "$(awk -v us="$elapsed_us" 'BEGIN { printf "%.1fms", us / 1000 }')"
+    done
+    unset IFS
+fi
+
 # Show errors if any
 if [ ${#errors_array[@]} -gt 0 ]; then
     echo
@@ -1,6 +1,11 @@
 import json
 
-with open('/Users/raoufrahiche/IdeaProjects/top-coder-challenge/public_cases.json', 'r') as f:
+import numpy as np
+
+from case_query import query
+from range_aggregation import BinScheme, aggregate
+
+with open('public_cases.json', 'r') as f:
     data = json.load(f)
 
 print("=== FINAL ANALYSIS: EFFECTIVE MILEAGE RATES BY RANGE (NON-CAPPED CASES) ===")
@@ -16,41 +21,30 @@ mileage_ranges = [
     (1200, float('inf'), "1200+ miles")
 ]
 
-for min_miles, max_miles, label in mileage_ranges:
-    # Get non-capped cases in this range
-    range_cases = []
-    for case in data:
-        miles = case['input']['miles_traveled']
-        receipts = case['input']['total_receipts_amount']
-        output = case['expected_output']
-        
-        # Only include non-capped cases
-        if min_miles <= miles < max_miles and receipts <= output:
-            days = case['input']['trip_duration_days']
-            miles_component = output - receipts
-            rate = miles_component / miles
-            range_cases.append({
-                'miles': miles,
-                'days': days,
-                'receipts': receipts,
-                'output': output,
-                'rate': rate
-            })
-    
-    if range_cases:
-        rates = [c['rate'] for c in range_cases]
-        avg_rate = sum(rates) / len(rates)
-        min_rate = min(rates)
-        max_rate = max(rates)
-        
-        print(f"\n{label}: {len(range_cases)} non-capped cases")
-        print(f"  Avg rate: ${avg_rate:.4f}/mile (range: ${min_rate:.4f} - ${max_rate:.4f})")
-        
-        # Show a few examples
-        range_cases.sort(key=lambda x: x['rate'], reverse=True)
-        print(f"  Top examples:")
-        for i, case in enumerate(range_cases[:3]):
-            print(f"    {case['miles']:4.0f} miles, {case['days']:2d} days, rate: ${case['rate']:.4f}/mile")
+# Only non-capped cases; every range in one pass
+rate_expression = '(expected - receipts) / miles'
+non_capped = query('public_cases.json').where('receipts <= expected')
+range_stats = aggregate(non_capped, [BinScheme.from_ranges('mileage', 'miles', mileage_ranges)],
+                        values=(rate_expression,))['mileage']
+table = non_capped.table
+rates = table.evaluate(rate_expression)
+
+for i in range_stats.nonempty():
+    label = mileage_ranges[i][2]
+    avg_rate = range_stats.stat(rate_expression, 'mean')[i]
+    min_rate = range_stats.stat(rate_expression, 'min')[i]
+    max_rate = range_stats.stat(rate_expression, 'max')[i]
+
+    print(f"\n{label}: {range_stats.counts[i]} non-capped cases")
+    print(f"  Avg rate: ${avg_rate:.4f}/mile (range: ${min_rate:.4f} - ${max_rate:.4f})")
+
+    # Show a few examples
+    rows = range_stats.members(i)
+    rows = rows[np.argsort(-rates[rows], kind='stable')]
+    print(f"  Top examples:")
+    for row in rows[:3]:
+        print(f"    {table.column('miles')[row]:4.0f} miles, {table.column('days')[row]:2d} days, "
+              f"rate: ${rates[row]:.4f}/mile")
 
 print("\n" + "="*60)
 print("KEY FINDINGS:")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Integer-cents fixed-point arithmetic with explicit rounding modes.
+
+The predictors compute in binary floats and round once at the end, so a
+value like 2.675 (stored as 2.67499999...) rounds to 2.67, and an error of
+exactly one cent can come out as 0.0099999 and count as an exact match.
+This module does money arithmetic on int64 NumPy arrays instead:
+
+    amounts -> to_cents(amounts, mode)         float dollars to integer cents
+    scale(cents, rate, mode)                   cents * rate, rounded once
+    div_round(numerator, denominator, mode)    exact integer division
+    from_cents(cents), format_cents(cents)     back to dollars / text
+
+Float inputs are first snapped to UNIT_PLACES decimal places, which recovers
+the decimal value the float was written from (the same thing
+Decimal(str(value)) does in test_legacy_quirks.py), and every later step is
+integer arithmetic, so results do not drift.
+
+Rounding modes (ties are exact halves of a cent):
+
+    half_up     ties away from zero (COBOL ROUNDED)
+    half_even   ties to the even cent (banker's rounding, Python's round)
+    half_down   ties toward zero
+    down        truncate toward zero (COBOL without ROUNDED)
+    up          away from zero
+    floor       toward -infinity
+    ceiling     toward +infinity
+
+Everything works on scalars as well as arrays.
+"""
+
+import numpy as np
+
+CENTS_PER_DOLLAR = 100
+# Decimal places kept when snapping floats to integers (1e-8 dollars): amounts
+# up to ~$90M stay exact in float64 at this scale
+UNIT_PLACES = 8
+UNITS_PER_DOLLAR = 10 ** UNIT_PLACES
+UNITS_PER_CENT = UNITS_PER_DOLLAR // CENTS_PER_DOLLAR
+# Decimal places of a rate (multiplier) in scale()
+RATE_PLACES = 6
+
+ROUNDING_MODES = ('half_up', 'half_even', 'half_down', 'down', 'up', 'floor', 'ceiling')
+
+
+def div_round(numerator, denominator, mode='half_even'):
+    """numerator / denominator rounded to an integer, on int64 values.
+
+    denominator must be positive.
+    """
+    numerator = np.asarray(numerator, dtype=np.int64)
+    denominator = np.asarray(denominator, dtype=np.int64)
+    if (denominator <= 0).any():
+        raise ValueError("div_round needs a positive denominator")
+    q, r = np.divmod(numerator, denominator)  # floor division, 0 <= r < denominator
+    negative = numerator < 0
+    inexact = r != 0
+
+    if mode == 'floor':
+        return q
+    if mode == 'ceiling':
+        return q + inexact
+    if mode == 'down':
+        return q + (inexact & negative)
+    if mode == 'up':
+        return q + (inexact & ~negative)
+    if mode not in ROUNDING_MODES:
+        raise ValueError(f"Unknown rounding mode '{mode}', choose from: {', '.join(ROUNDING_MODES)}")
+
+    twice = 2 * r
+    above = twice > denominator
+    tie = twice == denominator
+    if mode == 'half_up':
+        tie_up = ~negative
+    elif mode == 'half_down':
+        tie_up = negative
+    else:  # half_even
+        tie_up = q % 2 == 1
+    return q + (above | (tie & tie_up))
+
+
+def to_units(amounts):
+    """Float dollars as int64 multiples of 1e-8 dollars (the decimal value written)"""
+    return np.rint(np.asarray(amounts, dtype=np.float64) * UNITS_PER_DOLLAR).astype(np.int64)
+
+
+def to_cents(amounts, mode='half_even'):
+    """Float dollars to int64 cents, rounding the exact decimal value"""
+    return div_round(to_units(amounts), UNITS_PER_CENT, mode)
+
+
+def from_cents(cents):
+    """Integer cents to float dollars (the nearest float to the exact value)"""
+    return np.asarray(cents, dtype=np.int64) / CENTS_PER_DOLLAR
+
+
+def rate_units(rate, places=RATE_PLACES):
+    """A multiplier as an integer count of 10**-places"""
+    return np.rint(np.asarray(rate, dtype=np.float64) * 10 ** places).astype(np.int64)
+
+
+def scale(cents, rate, mode='half_even', places=RATE_PLACES):
+    """cents * rate rounded once to whole cents; rate is kept to `places` decimals"""
+    product = np.asarray(cents, dtype=np.int64) * rate_units(rate, places)
+    return div_round(product, 10 ** places, mode)
+
+
+def round_amounts(amounts, mode='half_even'):
+    """Float dollars rounded to the cent with a chosen mode, as floats"""
+    return from_cents(to_cents(amounts, mode))
+
+
+def format_cents(cents):
+    """Exact 'dollars.cents' text for integer cents (no float formatting)"""
+    cents = int(cents)
+    sign = '-' if cents < 0 else ''
+    dollars, remainder = divmod(abs(cents), CENTS_PER_DOLLAR)
+    return f"{sign}{dollars}.{remainder:02d}"
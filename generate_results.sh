@@ -42,31 +42,21 @@ echo "📊 Processing test cases and generating results..."
 echo "📝 Output will be saved to private_results.txt"
 echo
 
-# Extract all test data upfront in a single jq call for better performance
-echo "Extracting test data..."
-test_data=$(jq -r '.[] | "\(.trip_duration_days):\(.miles_traveled):\(.total_receipts_amount)"' private_cases.json)
-
-# Convert to arrays for faster access (compatible with bash 3.2+)
-test_cases=()
-while IFS= read -r line; do
-    test_cases+=("$line")
-done <<< "$test_data"
-total_cases=${#test_cases[@]}
+# Stream test data from jq one case at a time so memory stays flat for large exports
+echo "Streaming test data..."
 
 # Remove existing results file if it exists
 rm -f private_results.txt
 
-echo "Processing $total_cases test cases..." >&2
+echo "Processing test cases..." >&2
 
-# Process each test case
-for ((i=0; i<total_cases; i++)); do
+# Process each test case (read from fd 3 so run.sh cannot consume the stream)
+i=0
+while IFS=':' read -r trip_duration miles_traveled receipts_amount <&3; do
     if [ $((i % 100)) -eq 0 ] && [ $i -gt 0 ]; then
-        echo "Progress: $i/$total_cases cases processed..." >&2
+        echo "Progress: $i cases processed..." >&2
     fi
     
-    # Extract test case data from pre-loaded array
-    IFS=':' read -r trip_duration miles_traveled receipts_amount <<< "${test_cases[i]}"
-    
     # Run the user's implementation
     if script_output=$(./run.sh "$trip_duration" "$miles_traveled" "$receipts_amount" 2>/dev/null); then
         # Check if output is a valid number
@@ -83,8 +73,10 @@ for ((i=0; i<total_cases; i++)); do
         echo "Error on case $((i+1)): Script failed: $error_msg" >&2
         echo "ERROR" >> private_results.txt
     fi
-done
+    i=$((i + 1))
+done 3< <(jq -r -n --stream 'fromstream(1 | truncate_stream(inputs)) | "\(.trip_duration_days):\(.miles_traveled):\(.total_receipts_amount)"' private_cases.json)
 
+echo "Processed $i test cases." >&2
 echo
 echo "✅ Results generated successfully!" >&2
 echo "📄 Output saved to private_results.txt" >&2
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
-import json
+from case_query import query
+from range_aggregation import BinScheme, aggregate
 
 def analyze_high_error_cases():
     """Analyze the specific high-error cases mentioned"""
     
-    with open('/Users/raoufrahiche/IdeaProjects/top-coder-challenge/public_cases.json', 'r') as f:
-        data = json.load(f)
+    cases = query('public_cases.json')
     
     # The specific cases mentioned
     target_cases = [995, 683, 151, 710, 547]  # Corrected case numbers
@@ -19,15 +19,11 @@ def analyze_high_error_cases():
     print()
     
     for case_idx in target_cases:
-        case = data[case_idx]
-        inp = case['input']
-        expected = case['expected_output']
+        # The case column numbers cases from 1
+        [(days, miles, receipts, expected)] = cases.where(f'case == {case_idx + 1}').rows(
+            'days', 'miles', 'receipts', 'expected')
         
-        days = inp['trip_duration_days']
-        miles = inp['miles_traveled'] 
-        receipts = inp['total_receipts_amount']
-        
-        print(f"Case {case_idx}: {days} days, {miles} miles, ${receipts:.2f} receipts")
+        print(f"Case {case_idx}: {days} days, {miles:g} miles, ${receipts:.2f} receipts")
         print(f"  Expected: ${expected:.2f}")
         
         # Test different formula possibilities
@@ -90,48 +86,40 @@ def analyze_high_error_cases():
         (1500, 2500, "Extremely high receipts ($1500-2500)")
     ]
     
-    for min_r, max_r, label in receipt_ranges:
-        cases_in_range = [c for c in data if min_r <= c['input']['total_receipts_amount'] < max_r]
-        if cases_in_range:
-            print(f"\n   {label}: {len(cases_in_range)} cases")
-            
-            # Check if receipts affect reimbursement
-            receipt_higher_count = 0
-            receipt_lower_count = 0
-            
-            for case in cases_in_range[:10]:  # Sample first 10
-                inp = case['input']
-                expected = case['expected_output']
-                receipts = inp['total_receipts_amount']
-                
-                if receipts > expected:
-                    receipt_higher_count += 1
-                else:
-                    receipt_lower_count += 1
-            
-            print(f"     Sample of 10 cases:")
-            print(f"     - Cases where receipts > reimbursement: {receipt_higher_count}")
-            print(f"     - Cases where receipts < reimbursement: {receipt_lower_count}")
-            
-            if receipt_higher_count > 7:  # Most cases have receipts > reimbursement
-                print(f"     → Suggests reimbursement CAP for this receipt range")
-            elif receipt_lower_count > 7:  # Most cases have receipts < reimbursement  
-                print(f"     → Suggests full reimbursement + allowances for this range")
+    receipt_stats = aggregate(cases, [
+        BinScheme.from_ranges('receipts', 'receipts', receipt_ranges)])['receipts']
+
+    for i in receipt_stats.nonempty():
+        label = receipt_ranges[i][2]
+        print(f"\n   {label}: {receipt_stats.counts[i]} cases")
+        
+        # Check if receipts affect reimbursement
+        receipt_higher_count = 0
+        receipt_lower_count = 0
+        
+        for receipts, expected in receipt_stats.rows(i, 'receipts', 'expected')[:10]:  # Sample first 10
+            if receipts > expected:
+                receipt_higher_count += 1
+            else:
+                receipt_lower_count += 1
+        
+        print(f"     Sample of 10 cases:")
+        print(f"     - Cases where receipts > reimbursement: {receipt_higher_count}")
+        print(f"     - Cases where receipts < reimbursement: {receipt_lower_count}")
+        
+        if receipt_higher_count > 7:  # Most cases have receipts > reimbursement
+            print(f"     → Suggests reimbursement CAP for this receipt range")
+        elif receipt_lower_count > 7:  # Most cases have receipts < reimbursement  
+            print(f"     → Suggests full reimbursement + allowances for this range")
     
     print("\n2. High-Receipt Cases Analysis:")
-    high_receipt_cases = [c for c in data if c['input']['total_receipts_amount'] > 1000]
-    print(f"   Found {len(high_receipt_cases)} cases with receipts > $1000")
+    high_receipt_cases = cases.where('receipts > 1000')
+    print(f"   Found {high_receipt_cases.count()} cases with receipts > $1000")
     
-    if high_receipt_cases:
+    if high_receipt_cases.count():
         # Check if there's a consistent pattern
         penalties = []
-        for case in high_receipt_cases:
-            inp = case['input']
-            expected = case['expected_output']
-            receipts = inp['total_receipts_amount']
-            days = inp['trip_duration_days']
-            miles = inp['miles_traveled']
-            
+        for days, miles, receipts, expected in high_receipt_cases.rows('days', 'miles', 'receipts', 'expected'):
             # Estimate what base reimbursement might be (days + miles allowance)
             estimated_base = days * 120 + miles * 0.58  # Using common rates
             penalty = receipts - expected
@@ -148,11 +136,7 @@ def analyze_high_error_cases():
             
             # Check if penalty is proportional to excess receipts
             proportional_penalties = []
-            for case in high_receipt_cases:
-                inp = case['input']
-                expected = case['expected_output']
-                receipts = inp['total_receipts_amount']
-                
+            for receipts, expected in high_receipt_cases.rows('receipts', 'expected'):
                 if receipts > expected:
                     penalty_rate = (receipts - expected) / receipts
                     proportional_penalties.append(penalty_rate)
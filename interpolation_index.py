@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Per-trip-length interpolation index over the public cases.
+
+For a fixed trip_duration_days the output is a surface over (miles,
+receipts). This module triangulates each day's public cases (Delaunay, by
+Bowyer-Watson) and interpolates linearly inside the triangle that contains
+the query. Queries outside the convex hull use the plane of the triangle
+behind the nearest hull edge, clamped to that triangle's corner values.
+
+Point location is a slab decomposition: the vertex x-coordinates cut the
+plane into vertical slabs, and inside one slab the triangulation edges never
+cross, so a query is two binary searches (slab, then edge) plus one
+barycentric evaluation. Coordinates are scaled to [0, 1] per day before
+triangulating; cases with identical inputs are averaged into one vertex.
+
+Building is pure Python and O(n^2) per day, well under a second for the
+public cases, so the index is built in memory once per process from the
+current case file; a query then costs microseconds.
+
+Usage:
+    python3 interpolation_index.py                 # build and report the surfaces
+    python3 interpolation_index.py 5 250 150.75
+    python3 interpolation_index.py --folds 10      # cross-validated score
+"""
+
+import argparse
+import random
+import time
+from bisect import bisect_right
+from collections import defaultdict
+
+from case_records import load_cases
+
+EPSILON = 1e-12
+
+
+def _circumcircle(a, b, c):
+    """Centre and squared radius of the circle through three points"""
+    ax, ay = a
+    bx, by = b
+    cx, cy = c
+    d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if abs(d) < EPSILON:
+        return (0.0, 0.0), float('inf')
+    a2, b2, c2 = ax * ax + ay * ay, bx * bx + by * by, cx * cx + cy * cy
+    ux = (a2 * (by - cy) + b2 * (cy - ay) + c2 * (ay - by)) / d
+    uy = (a2 * (cx - bx) + b2 * (ax - cx) + c2 * (bx - ax)) / d
+    return (ux, uy), (ax - ux) ** 2 + (ay - uy) ** 2
+
+
+def delaunay(points):
+    """Bowyer-Watson triangulation; returns vertex-index triangles"""
+    n = len(points)
+    # Super-triangle far outside the unit square
+    vertices = list(points) + [(-1e4, -1e4), (1e4, -1e4), (0.0, 1e4)]
+    triangles = {(n, n + 1, n + 2): _circumcircle(*vertices[n:n + 3])}
+
+    for i in range(n):
+        px, py = vertices[i]
+        bad = [t for t, ((cx, cy), r2) in triangles.items()
+               if (px - cx) ** 2 + (py - cy) ** 2 < r2 - EPSILON]
+        edge_count = defaultdict(int)
+        for t in bad:
+            for edge in ((t[0], t[1]), (t[1], t[2]), (t[2], t[0])):
+                edge_count[tuple(sorted(edge))] += 1
+            del triangles[t]
+        for (a, b), count in edge_count.items():
+            if count == 1:
+                t = (a, b, i)
+                triangles[t] = _circumcircle(vertices[a], vertices[b], vertices[i])
+
+    return [t for t in triangles if max(t) < n]
+
+
+def _plane(points, values, triangle):
+    """Coefficients (a, b, c) of value = a*x + b*y + c over a triangle"""
+    (x1, y1), (x2, y2), (x3, y3) = (points[v] for v in triangle)
+    z1, z2, z3 = (values[v] for v in triangle)
+    det = (x2 - x1) * (y3 - y1) - (x3 - x1) * (y2 - y1)
+    a = ((z2 - z1) * (y3 - y1) - (z3 - z1) * (y2 - y1)) / det
+    b = ((x2 - x1) * (z3 - z1) - (x3 - x1) * (z2 - z1)) / det
+    return a, b, z1 - a * x1 - b * y1
+
+
+class DayTriangulation:
+    """Triangulated surface and slab point-location structure for one trip length"""
+
+    def __init__(self, cases):
+        merged = defaultdict(list)
+        for c in cases:
+            merged[(float(c.miles), float(c.receipts))].append(c.expected)
+        raw = list(merged)
+        self.values = [sum(merged[p]) / len(merged[p]) for p in raw]
+
+        xs = [x for x, _ in raw]
+        ys = [y for _, y in raw]
+        self.origin = (min(xs), min(ys))
+        self.span = (max(max(xs) - self.origin[0], EPSILON), max(max(ys) - self.origin[1], EPSILON))
+        self.points = [self._normalise(x, y) for x, y in raw]
+
+        triangles = [t for t in delaunay(self.points) if self._area(t) > EPSILON]
+        self.triangles = triangles
+        self.planes = [_plane(self.points, self.values, t) for t in triangles]
+        self._build_slabs(triangles)
+        self._build_hull(triangles)
+
+    def _normalise(self, miles, receipts):
+        return ((miles - self.origin[0]) / self.span[0], (receipts - self.origin[1]) / self.span[1])
+
+    def _area(self, triangle):
+        (x1, y1), (x2, y2), (x3, y3) = (self.points[v] for v in triangle)
+        return abs((x2 - x1) * (y3 - y1) - (x3 - x1) * (y2 - y1)) / 2
+
+    def _build_slabs(self, triangles):
+        """For each slab, its crossing edges bottom to top and the triangle above each"""
+        self.slab_x = sorted({x for x, _ in self.points})
+        self.slabs = []
+        for left, right in zip(self.slab_x, self.slab_x[1:]):
+            middle = (left + right) / 2
+            crossing = {}
+            for index, triangle in enumerate(triangles):
+                corners = sorted(self.points[v] for v in triangle)
+                if not (corners[0][0] <= left and corners[2][0] >= right):
+                    continue
+                edges = []
+                for p, q in ((corners[0], corners[1]), (corners[1], corners[2]), (corners[0], corners[2])):
+                    if p[0] <= left and q[0] >= right:
+                        edges.append((p, q))
+                lower, upper = sorted(edges, key=lambda e: self._edge_y(e, middle))
+                crossing.setdefault(lower, -1)
+                crossing.setdefault(upper, -1)
+                crossing[lower] = index
+            ordered = sorted(crossing, key=lambda e: self._edge_y(e, middle))
+            self.slabs.append((ordered, [crossing[e] for e in ordered]))
+
+    def _build_hull(self, triangles):
+        """Boundary edges, each with the triangle it belongs to"""
+        owners = defaultdict(list)
+        for index, triangle in enumerate(triangles):
+            for a, b in ((triangle[0], triangle[1]), (triangle[1], triangle[2]), (triangle[2], triangle[0])):
+                owners[tuple(sorted((a, b)))].append(index)
+        self.hull = [(self.points[a], self.points[b], tris[0])
+                     for (a, b), tris in owners.items() if len(tris) == 1]
+
+    @staticmethod
+    def _edge_y(edge, x):
+        (x1, y1), (x2, y2) = edge
+        return y1 + (y2 - y1) * (x - x1) / (x2 - x1)
+
+    def locate(self, x, y):
+        """Index of the triangle containing a normalised point, or -1"""
+        if not self.slabs or x < self.slab_x[0] or x > self.slab_x[-1]:
+            return -1
+        slab = min(bisect_right(self.slab_x, x) - 1, len(self.slabs) - 1)
+        edges, above = self.slabs[slab]
+        lo, hi = 0, len(edges)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._edge_y(edges[mid], x) <= y + EPSILON:
+                lo = mid + 1
+            else:
+                hi = mid
+        return above[lo - 1] if lo else -1
+
+    def _nearest_hull_plane(self, x, y):
+        best, best_distance = None, float('inf')
+        for (x1, y1), (x2, y2), triangle in self.hull:
+            dx, dy = x2 - x1, y2 - y1
+            t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)))
+            distance = (x - x1 - t * dx) ** 2 + (y - y1 - t * dy) ** 2
+            if distance < best_distance:
+                best, best_distance = triangle, distance
+        return best
+
+    def interpolate(self, miles, receipts):
+        x, y = self._normalise(miles, receipts)
+        if not self.planes:
+            # Too few distinct points to triangulate: nearest case
+            nearest = min(range(len(self.points)),
+                          key=lambda i: (self.points[i][0] - x) ** 2 + (self.points[i][1] - y) ** 2)
+            return self.values[nearest]
+        triangle = self.locate(x, y)
+        if triangle >= 0:
+            a, b, c = self.planes[triangle]
+            return a * x + b * y + c
+        # Outside the hull: extend the nearest facet's plane, but only within
+        # its corner values -- thin hull triangles have very steep planes
+        triangle = self._nearest_hull_plane(x, y)
+        a, b, c = self.planes[triangle]
+        corners = [self.values[v] for v in self.triangles[triangle]]
+        return min(max(a * x + b * y + c, min(corners)), max(corners))
+
+
+class InterpolationIndex:
+    """One DayTriangulation per trip length seen in the training cases"""
+
+    def __init__(self, cases):
+        by_day = defaultdict(list)
+        for c in cases:
+            by_day[c.days].append(c)
+        self.days = {days: DayTriangulation(day_cases) for days, day_cases in by_day.items()}
+        self.sorted_days = sorted(self.days)
+
+    def predict(self, days, miles, receipts):
+        surface = self.days.get(days)
+        if surface is None:
+            surface = self.days[min(self.sorted_days, key=lambda d: abs(d - days))]
+        return round(surface.interpolate(miles, receipts), 2)
+
+    def predict_batch(self, cases):
+        return [self.predict(c.days, c.miles, c.receipts) for c in cases]
+
+_indexes = {}
+
+
+def load_index(source='public_cases.json'):
+    """The index over a case file, built once per process"""
+    if source not in _indexes:
+        _indexes[source] = InterpolationIndex(load_cases(source))
+    return _indexes[source]
+
+
+def cross_validate(cases, folds=10, seed=0):
+    """Predictions for every case from an index built without its fold"""
+    order = list(range(len(cases)))
+    random.Random(seed).shuffle(order)
+    predictions = [None] * len(cases)
+    for fold in range(folds):
+        held_out = set(order[fold::folds])
+        index = InterpolationIndex([c for i, c in enumerate(cases) if i not in held_out])
+        for i in held_out:
+            c = cases[i]
+            predictions[i] = index.predict(c.days, c.miles, c.receipts)
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-day Delaunay interpolation index")
+    parser.add_argument('query', nargs='*', help="days miles receipts")
+    parser.add_argument('--folds', type=int, help="cross-validate over the public cases")
+    args = parser.parse_args()
+
+    if args.folds:
+        from scoring import print_score, score_predictions
+        cases = load_cases('public_cases.json')
+        start = time.perf_counter()
+        predictions = cross_validate(cases, args.folds)
+        print_score(score_predictions([c.expected for c in cases], predictions),
+                    f"📈 Interpolation index ({args.folds}-fold, {time.perf_counter() - start:.1f}s):")
+        return
+
+    if args.query:
+        if len(args.query) != 3:
+            parser.error("query needs: days miles receipts")
+        index = load_index()
+        print(f"{index.predict(int(args.query[0]), float(args.query[1]), float(args.query[2])):.2f}")
+        return
+
+    start = time.perf_counter()
+    index = load_index()
+    triangles = sum(len(s.planes) for s in index.days.values())
+    print(f"Built {len(index.days)} day surfaces ({triangles} triangles) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
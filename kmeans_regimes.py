@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+k-means reimbursement regimes with a linear model per cluster.
+
+Kevin's theory is that k-means over trip features separates distinct
+reimbursement regimes. This tests it: cases are clustered on standardised
+(days, miles, receipts, miles/day, receipts/day), each cluster gets its own
+least-squares fit
+
+    output ~ b0 + b1 * days + b2 * miles + b3 * receipts
+
+and cross-validation shows whether more clusters actually predict better
+than one global line.
+
+Clustering is plain NumPy: k-means++ seeding and vectorized Lloyd
+iterations, with independent restarts spread over a process pool and the
+lowest-inertia run kept. The fitted model is a few numbers - feature means
+and scales, centroids and coefficients - saved to kmeans_params.json, and
+prediction is one nearest-centroid lookup and one dot product in pure
+Python.
+
+Usage:
+    python3 kmeans_regimes.py --scan 1 8        # CV score for each k
+    python3 kmeans_regimes.py --k 6             # fit on all public cases, write kmeans_params.json
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PARAMS_FILE = 'kmeans_params.json'
+FEATURES = ('days', 'miles', 'receipts', 'miles_per_day', 'receipts_per_day')
+MODEL_TERMS = ('days', 'miles', 'receipts')
+
+RESTARTS = 16
+MAX_ITERATIONS = 100
+
+
+def _features(days, miles, receipts):
+    if days < 1:
+        raise ValueError(f"Trip lengths must be at least 1 day, got {days}")
+    return [days, miles, receipts, miles / days, receipts / days]
+
+
+# --- Fitting (NumPy) ------------------------------------------------------------
+
+def _case_features(cases):
+    import numpy as np
+    if len(cases) and cases['days'].min() < 1:
+        raise ValueError(f"Trip lengths must be at least 1 day, got {int(cases['days'].min())}")
+    days = cases['days'].astype(np.float64)
+    return np.column_stack([days, cases['miles'], cases['receipts'],
+                            cases['miles'] / days, cases['receipts'] / days])
+
+
+def kmeans(points, k, seed, max_iterations=MAX_ITERATIONS):
+    """One k-means++ seeded Lloyd run: (inertia, centroids, labels)"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    centroids = [points[rng.integers(len(points))]]
+    closest = ((points - centroids[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        # Next seed with probability proportional to squared distance
+        centroids.append(points[rng.choice(len(points), p=closest / closest.sum())])
+        closest = np.minimum(closest, ((points - centroids[-1]) ** 2).sum(axis=1))
+    centroids = np.array(centroids)
+
+    labels = None
+    for _ in range(max_iterations):
+        distances = ((points[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        if labels is not None and (new_labels == labels).all():
+            break
+        labels = new_labels
+        for j in range(k):
+            members = points[labels == j]
+            if len(members):
+                centroids[j] = members.mean(axis=0)
+    inertia = float(((points - centroids[labels]) ** 2).sum())
+    return inertia, centroids, labels
+
+
+def _restart(args):
+    points, k, seed = args
+    return kmeans(points, k, seed)
+
+
+def best_of_restarts(points, k, restarts=RESTARTS, seed=0, pool=None):
+    """Lowest-inertia clustering over independent restarts"""
+    jobs = [(points, k, seed * 1000 + r) for r in range(restarts)]
+    runs = pool.map(_restart, jobs) if pool else map(_restart, jobs)
+    return min(runs, key=lambda run: run[0])
+
+
+def fit_regimes(cases, k, restarts=RESTARTS, seed=0, pool=None):
+    """Cluster cases and fit a linear model per cluster; returns a params dict"""
+    import numpy as np
+    features = _case_features(cases)
+    mean = features.mean(axis=0)
+    scale = features.std(axis=0)
+    scale[scale == 0] = 1.0
+    _, centroids, labels = best_of_restarts((features - mean) / scale, k, restarts, seed, pool)
+
+    design = np.column_stack([np.ones(len(cases)), features[:, :len(MODEL_TERMS)]])
+    global_fit = np.linalg.lstsq(design, cases['expected'], rcond=None)[0]
+    models = []
+    for j in range(k):
+        members = labels == j
+        if members.sum() > design.shape[1]:
+            models.append(np.linalg.lstsq(design[members], cases['expected'][members], rcond=None)[0].tolist())
+        else:
+            models.append(global_fit.tolist())  # too few cases for their own line
+    return {
+        'features': list(FEATURES),
+        'model_terms': list(MODEL_TERMS),
+        'mean': mean.tolist(),
+        'scale': scale.tolist(),
+        'centroids': centroids.tolist(),
+        'models': models,
+        'cluster_sizes': np.bincount(labels, minlength=k).tolist(),
+    }
+
+
+# --- Prediction (pure Python) ---------------------------------------------------
+
+def predict_reimbursement(days, miles, receipts, params):
+    """Nearest centroid, then that cluster's linear model"""
+    point = [(x - m) / s for x, m, s in zip(_features(days, miles, receipts), params['mean'], params['scale'])]
+    cluster = min(range(len(params['centroids'])),
+                  key=lambda j: sum((p - c) ** 2 for p, c in zip(point, params['centroids'][j])))
+    b = params['models'][cluster]
+    return round(b[0] + b[1] * days + b[2] * miles + b[3] * receipts, 2)
+
+
+def save_params(params, path=PARAMS_FILE):
+    with open(path, 'w') as f:
+        json.dump(params, f, indent=2)
+        f.write('\n')
+
+
+def load_params(path=PARAMS_FILE):
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- Evaluation -----------------------------------------------------------------
+
+def cross_validate(cases, k, folds=10, restarts=RESTARTS, seed=0, pool=None):
+    import numpy as np
+    assignment = np.random.default_rng(seed).permutation(len(cases)) % folds
+    predictions = np.empty(len(cases))
+    for fold in range(folds):
+        held_out = np.flatnonzero(assignment == fold)
+        params = fit_regimes(cases[assignment != fold], k, restarts, seed, pool)
+        for i in held_out:
+            predictions[i] = predict_reimbursement(int(cases['days'][i]), float(cases['miles'][i]),
+                                                   float(cases['receipts'][i]), params)
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="k-means regimes with per-cluster linear models")
+    parser.add_argument('--cases', default='public_cases.json')
+    parser.add_argument('--k', type=int, default=6, help="clusters for the saved model")
+    parser.add_argument('--scan', type=int, nargs=2, metavar=('MIN_K', 'MAX_K'),
+                        help="cross-validate every k in the range instead of saving")
+    parser.add_argument('--folds', type=int, default=10)
+    parser.add_argument('--restarts', type=int, default=RESTARTS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--output', default=PARAMS_FILE)
+    args = parser.parse_args()
+
+    from case_records import load_case_array
+    from scoring import print_score, score_predictions
+    cases = load_case_array(args.cases)
+
+    with ProcessPoolExecutor(args.workers) as pool:
+        if args.scan:
+            print("🔍 K-MEANS REGIME SCAN")
+            print("=" * 50)
+            print(f"{'k':>3s} {'Avg error':>10s} {'Score':>10s} {'Time':>7s}")
+            for k in range(args.scan[0], args.scan[1] + 1):
+                start = time.perf_counter()
+                summary = score_predictions(cases['expected'],
+                                            cross_validate(cases, k, args.folds, args.restarts, pool=pool))
+                print(f"{k:3d} {summary['avg_error']:10.2f} {summary['score']:10.2f} "
+                      f"{time.perf_counter() - start:6.1f}s")
+            return
+
+        start = time.perf_counter()
+        params = fit_regimes(cases, args.k, args.restarts, pool=pool)
+    print(f"Fitted {args.k} regimes in {(time.perf_counter() - start) * 1000:.0f}ms")
+    for j, (size, b) in enumerate(zip(params['cluster_sizes'], params['models'])):
+        centre = [c * s + m for c, s, m in zip(params['centroids'][j], params['scale'], params['mean'])]
+        print(f"  Regime {j}: {size:4d} cases, centre {centre[0]:.1f}d {centre[1]:.0f}mi ${centre[2]:.0f} "
+              f"→ {b[0]:.2f} + {b[1]:.2f}*days + {b[2]:.4f}*miles + {b[3]:.4f}*receipts")
+
+    predictions = [predict_reimbursement(c['days'], c['miles'], c['receipts'], params) for c in cases]
+    print_score(score_predictions(cases['expected'], predictions), "\n📈 Training fit:")
+    save_params(params, args.output)
+    print(f"\nSaved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
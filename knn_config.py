@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Shared parameters for the find_similar_cases-style kNN predictors.
+
+    distance = |day diff| * day_weight + |mile diff| / mile_scale + |receipt diff| / receipt_scale
+
+The k nearest cases are averaged with one of the KERNELS weightings:
+
+- rank:     1 / (i * 0.1 + 0.1) for the i-th nearest case (original run.sh)
+- inverse:  1 / (distance + 0.1) (original pattern_matching_solution)
+- uniform:  plain average
+- gaussian: exp(-distance^2), relative to the nearest case
+
+metric_learning.py writes the best parameters it finds to knn_params.json;
+pattern_matching_solution reads them at import and build_fast_predictor.py
+embeds them in fast_predictor_data for run.sh. Without the file every
+predictor keeps its original hardcoded behaviour.
+"""
+
+import json
+import math
+import os
+
+KNN_PARAMS_FILE = 'knn_params.json'
+
+KERNELS = ('rank', 'inverse', 'uniform', 'gaussian')
+
+# The original run.sh metric and weighting
+DEFAULT_KNN_PARAMS = {
+    'day_weight': 2.0,
+    'mile_scale': 100.0,
+    'receipt_scale': 100.0,
+    'k': 10,
+    'kernel': 'rank',
+}
+
+
+def validate_knn_params(params):
+    """Check a parameter dict and return it with normalised types"""
+    missing = set(DEFAULT_KNN_PARAMS) - set(params)
+    if missing:
+        raise ValueError(f"kNN parameters missing: {', '.join(sorted(missing))}")
+    if params['kernel'] not in KERNELS:
+        raise ValueError(f"Unknown kernel '{params['kernel']}', choose from: {', '.join(KERNELS)}")
+    normalised = {
+        'day_weight': float(params['day_weight']),
+        'mile_scale': float(params['mile_scale']),
+        'receipt_scale': float(params['receipt_scale']),
+        'k': int(params['k']),
+        'kernel': params['kernel'],
+    }
+    if normalised['k'] < 1 or normalised['mile_scale'] <= 0 or normalised['receipt_scale'] <= 0:
+        raise ValueError(f"Invalid kNN parameters: {normalised}")
+    return normalised
+
+
+def kernel_weights(kernel, distances):
+    """Weights for a list of neighbour distances, nearest first"""
+    if kernel == 'rank':
+        return [1.0 / (i * 0.1 + 0.1) for i in range(len(distances))]
+    if kernel == 'inverse':
+        return [1.0 / (d + 0.1) for d in distances]
+    if kernel == 'uniform':
+        return [1.0] * len(distances)
+    if kernel == 'gaussian':
+        nearest = distances[0] ** 2
+        return [math.exp(nearest - d ** 2) for d in distances]
+    raise ValueError(f"Unknown kernel '{kernel}'")
+
+
+def load_knn_params(defaults=DEFAULT_KNN_PARAMS, path=KNN_PARAMS_FILE):
+    """The learned parameters if the file exists, else the given defaults"""
+    if not os.path.exists(path):
+        return dict(defaults)
+    with open(path) as f:
+        return validate_knn_params(json.load(f)['params'])
+
+
+def save_knn_params(params, path=KNN_PARAMS_FILE, **metadata):
+    """Write parameters plus any provenance (objective, search settings...)"""
+    document = {'params': validate_knn_params(params)}
+    document.update(metadata)
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Leave-one-out and k-fold evaluation for the find_similar_cases predictors.
+
+run.sh and pattern_matching_solution both return the stored output for any
+input they were trained on, so eval.sh over public_cases.json only echoes
+the labels back. Here every case is predicted from the other cases instead,
+without rebuilding anything per case:
+
+- one pass builds the all-pairs neighbour graph (each row's nearest training
+  rows, with the row itself excluded), in row chunks to bound memory
+- neighbours are ordered exactly like the Python tuple sorts in the
+  predictors, ties included, so LOO predictions equal what the predictor
+  would return if the case were deleted from public_cases.json
+- the weighting kernels and pattern adjustments then run as whole-array
+  operations over the graph
+
+k-fold mode does the same with the held-out fold as queries and the remaining
+folds as training rows, for the usual k-fold estimate in which each
+prediction sees (k-1)/k of the data. It is not cheaper: both modes compare
+every query with every training row, O(n^2) distance work. Only memory is
+bounded, because queries are processed CHUNK_ROWS at a time.
+
+Usage:
+    python3 knn_loo.py public_cases.json --predictor all
+    python3 knn_loo.py big_workload.jsonl --folds 10
+"""
+
+import argparse
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from case_formats import read_case_array
+from knn_config import DEFAULT_KNN_PARAMS
+from scoring import print_score, score_predictions
+
+CHUNK_ROWS = 256
+
+# Python compares the neighbour tuples element by element, so equal distances
+# fall back to the next tuple field. run.sh sorts (distance, output);
+# pattern_matching_solution sorts (similarity, days, miles, receipts, output).
+TIE_ORDER = {
+    'run_sh': ('expected',),
+    'pattern_matching': ('days', 'miles', 'receipts', 'expected'),
+}
+
+
+class NeighbourGraph(NamedTuple):
+    """Nearest training rows for each query, closest first"""
+    index: np.ndarray      # (queries, k) row numbers into the training array
+    distance: np.ndarray   # (queries, k) matching distances
+
+
+def pairwise_distance(queries, train, day_weight=2.0, mile_scale=100.0, receipt_scale=100.0):
+    """The find_similar_cases distance between every query and training row.
+
+    Evaluated in the same operation order as the scalar code, so the values
+    are bit-identical to what the predictors compute.
+    """
+    def column(array, name):
+        return array[name].astype(np.float64)
+
+    return (np.abs(column(train, 'days') - column(queries, 'days')[:, None]) * day_weight
+            + np.abs(column(train, 'miles') - column(queries, 'miles')[:, None]) / mile_scale
+            + np.abs(column(train, 'receipts') - column(queries, 'receipts')[:, None]) / receipt_scale)
+
+
+def build_neighbour_graph(train, queries=None, params=DEFAULT_KNN_PARAMS, ties=TIE_ORDER['run_sh'],
+                          chunk_rows=CHUNK_ROWS):
+    """Find the params['k'] nearest training rows for every query.
+
+    With queries=None the training rows are their own queries and each row is
+    excluded from its own neighbour list (leave-one-out).
+    """
+    leave_one_out = queries is None
+    if leave_one_out:
+        queries = train
+    k = min(params['k'], len(train) - leave_one_out)
+    tie_keys = [train[name].astype(np.float64) for name in reversed(ties)]
+
+    index = np.empty((len(queries), k), dtype=np.intp)
+    distance = np.empty((len(queries), k))
+    for start in range(0, len(queries), chunk_rows):
+        stop = min(start + chunk_rows, len(queries))
+        block = pairwise_distance(queries[start:stop], train, params['day_weight'],
+                                  params['mile_scale'], params['receipt_scale'])
+        if leave_one_out:
+            rows = np.arange(stop - start)
+            block[rows, rows + start] = np.inf
+        # lexsort takes its primary key last
+        keys = [np.broadcast_to(key, block.shape) for key in tie_keys] + [block]
+        order = np.lexsort(keys, axis=-1)[:, :k]
+        index[start:stop] = order
+        distance[start:stop] = np.take_along_axis(block, order, axis=1)
+    return NeighbourGraph(index, distance)
+
+
+def _exact_matches(graph):
+    """Training row each query would find in exact_matches, or -1.
+
+    A zero distance means identical inputs; like the dict lookup, the last
+    such row in file order wins.
+    """
+    return np.where(graph.distance == 0, graph.index, -1).max(axis=1)
+
+
+def _weighted_average(outputs, weights):
+    """Accumulate column by column, as the scalar loop does"""
+    weighted_sum = np.zeros(len(outputs))
+    weight_total = np.zeros(len(outputs))
+    for j in range(outputs.shape[1]):
+        weighted_sum += outputs[:, j] * weights[:, j]
+        weight_total += weights[:, j]
+    return weighted_sum / weight_total
+
+
+def kernel_weights(kernel, distance):
+    """Neighbour weights for sorted (queries, k) distances; see knn_config.KERNELS"""
+    if kernel == 'rank':
+        return np.broadcast_to(1.0 / (np.arange(distance.shape[1]) * 0.1 + 0.1), distance.shape)
+    if kernel == 'inverse':
+        return 1.0 / (distance + 0.1)
+    if kernel == 'uniform':
+        return np.ones_like(distance)
+    if kernel == 'gaussian':
+        return np.exp(distance[:, :1] ** 2 - distance ** 2)
+    raise ValueError(f"Unknown kernel '{kernel}'")
+
+
+def predict_run_sh(train, queries, graph, params=DEFAULT_KNN_PARAMS, leave_one_out=False):
+    """run.sh predictions for the graph's queries, rounded as run.sh prints them"""
+    outputs = train['expected'][graph.index]
+    predictions = _weighted_average(outputs, kernel_weights(params['kernel'], graph.distance))
+
+    exact = _exact_matches(graph)
+    has_exact = exact >= 0
+    predictions[has_exact] = train['expected'][exact[has_exact]]
+    return np.array([float(f'{p:.2f}') for p in predictions.tolist()])
+
+
+def _day_averages(train, queries, leave_one_out):
+    """Mean training output for each query's trip length (NaN if none)"""
+    size = int(max(train['days'].max(), queries['days'].max())) + 1
+    sums = np.bincount(train['days'], weights=train['expected'], minlength=size)[queries['days']]
+    counts = np.bincount(train['days'], minlength=size)[queries['days']].astype(np.float64)
+    if leave_one_out:
+        sums = sums - queries['expected']
+        counts = counts - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def predict_pattern_matching(train, queries, graph, params=DEFAULT_KNN_PARAMS, leave_one_out=False):
+    """pattern_matching_solution predictions, apply_pattern_adjustments included"""
+    outputs = train['expected'][graph.index]
+    base = _weighted_average(outputs, kernel_weights(params['kernel'], graph.distance))
+
+    days = queries['days'].astype(np.float64)
+    miles = queries['miles']
+    receipts = queries['receipts']
+
+    # Pull towards the day average when far from it
+    day_avg = _day_averages(train, queries, leave_one_out)
+    pull = ~np.isnan(day_avg) & (np.abs(base - day_avg) > 100)
+    base = np.where(pull, base * (1 - 0.8) + day_avg * 0.8, base)
+
+    # Receipt ending patterns
+    receipt_cents = np.trunc(np.mod(receipts * 100, 100))
+    base = base + np.where(receipt_cents == 49, 15, np.where(receipt_cents == 99, 20, 0))
+
+    # Efficiency patterns: efficient trip with an efficient neighbour
+    def efficient(miles_per_day):
+        return (miles_per_day >= 180) & (miles_per_day <= 220)
+    neighbour_mpd = train['miles'][graph.index] / train['days'][graph.index]
+    boost = efficient(miles / days) & efficient(neighbour_mpd).any(axis=1)
+    base = np.where(boost, base * 1.05, base)
+
+    # High receipt penalties
+    spending_per_day = receipts / days
+    penalised = (receipts > 1000) & (spending_per_day > 150)
+    penalty = np.minimum(0.4, (spending_per_day - 150) * 0.002)
+    base = np.where(penalised, base * (1 - penalty), base)
+
+    # Day-specific bonuses
+    base = np.where(days == 5, base * 1.03, np.where((days == 4) | (days == 6), base * 1.01, base))
+
+    predictions = np.array([round(p, 2) for p in base.tolist()])
+    exact = _exact_matches(graph)
+    has_exact = exact >= 0
+    predictions[has_exact] = train['expected'][exact[has_exact]]
+    return predictions
+
+
+PREDICTORS = {
+    'run_sh': predict_run_sh,
+    'pattern_matching': predict_pattern_matching,
+}
+
+
+def current_params(predictor):
+    """The kNN parameters the predictor is running with right now"""
+    if predictor == 'pattern_matching':
+        import pattern_matching_solution
+        return pattern_matching_solution.KNN_PARAMS
+    import fast_predictor
+    return fast_predictor.PARAMS
+
+
+def _predict(predictor, train, queries, leave_one_out, params):
+    if params is None:
+        params = current_params(predictor)
+    graph = build_neighbour_graph(train, None if leave_one_out else queries, params,
+                                  ties=TIE_ORDER[predictor])
+    return PREDICTORS[predictor](train, queries, graph, params, leave_one_out)
+
+
+def loo_predictions(cases, predictor='run_sh', params=None):
+    """Predict every case from all the others"""
+    return _predict(predictor, cases, cases, True, params)
+
+
+def kfold_predictions(cases, predictor='run_sh', folds=10, seed=0, params=None):
+    """Predict every case from the folds it is not in"""
+    if not 2 <= folds <= len(cases):
+        raise ValueError(f"folds must be between 2 and {len(cases)}")
+    assignment = np.random.default_rng(seed).permutation(len(cases)) % folds
+    predictions = np.empty(len(cases))
+    for fold in range(folds):
+        held_out = assignment == fold
+        predictions[held_out] = _predict(predictor, cases[~held_out], cases[held_out], False, params)
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leave-one-out / k-fold evaluation of the kNN predictors")
+    parser.add_argument('cases', nargs='?', default='public_cases.json')
+    parser.add_argument('--predictor', default='all', choices=sorted(PREDICTORS) + ['all'])
+    parser.add_argument('--folds', type=int, help="k-fold instead of leave-one-out")
+    parser.add_argument('--seed', type=int, default=0, help="fold assignment seed")
+    args = parser.parse_args()
+
+    cases = read_case_array(args.cases)
+    if np.isnan(cases['expected']).any():
+        parser.error(f"{args.cases} has cases without expected outputs")
+
+    names = sorted(PREDICTORS) if args.predictor == 'all' else [args.predictor]
+    mode = f"{args.folds}-fold" if args.folds else "leave-one-out"
+    for name in names:
+        start = time.perf_counter()
+        if args.folds:
+            predictions = kfold_predictions(cases, name, args.folds, args.seed)
+        else:
+            predictions = loo_predictions(cases, name)
+        elapsed = time.perf_counter() - start
+        print_score(score_predictions(cases['expected'], predictions),
+                    f"📈 {name} ({mode}, {len(cases)} cases, {elapsed:.2f}s)")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Deferred imports for the heavy analysis dependencies.
+
+pandas, sklearn and xgboost each take hundreds of milliseconds to seconds to
+import. Scripts that only need them on some code paths bind a LazyModule at
+module top instead:
+
+    xgb = lazy_import('xgboost')
+    ...
+    model = xgb.train(...)        # xgboost is imported here, on first use
+
+and a missing package turns into an ImportError naming the pip package at
+the point of use, not at script start.
+"""
+
+import importlib
+import importlib.util
+import sys
+
+# Import name -> pip package, for error messages
+PIP_NAMES = {
+    'sklearn': 'scikit-learn',
+    'xgboost': 'xgboost',
+    'pandas': 'pandas',
+    'pyarrow': 'pyarrow',
+}
+
+
+class LazyModule:
+    """Stands in for a module until an attribute is first looked up"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError as e:
+                package = PIP_NAMES.get(self._name.split('.')[0], self._name.split('.')[0])
+                raise ImportError(f"{self._name} is needed here: pip install {package} ({e})") from None
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    @property
+    def loaded(self):
+        return self._module is not None or self._name in sys.modules
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+_lazy_modules = {}
+
+
+def lazy_import(name):
+    """A LazyModule for name (shared between callers)"""
+    if name not in _lazy_modules:
+        _lazy_modules[name] = LazyModule(name)
+    return _lazy_modules[name]
+
+
+def is_available(name):
+    """Whether a module can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Array kernels for legacy-system arithmetic quirks.
+
+test_legacy_quirks.py tries each quirk one value at a time through Decimal
+objects and string slicing. These kernels take a whole NumPy array of dollar
+amounts and return the quirked amounts, so a hypothesis can be checked
+against every case in one call:
+
+    half_up(values)                 COBOL ROUNDED: ties away from zero
+    half_even(values)               banker's rounding
+    truncate(values)                drop digits past the cent, toward zero
+    fixed_width_overflow(values)    saturate at a fixed number of digits
+    bcd_digit_truncation(values)    round to 4 places, keep 2 digits
+    word_size_clip(values)          clip the scaled value to a signed word
+    limited_mantissa(values)        round to a float with fewer mantissa bits
+    field_width_truncation(values)  printed field too narrow: leading digits kept
+
+Decimal rounding goes through fixed_point, so it acts on the decimal value
+a float was written from, as Decimal(str(value)) does. Quirks that came from
+string formatting round the float's exact binary value instead, as
+f"{value:.2f}" does (2.675 prints as 2.67). QUIRKS maps the
+test_legacy_quirks.py names to array kernels that reproduce those functions
+exactly; running this module checks that and times them.
+
+Usage:
+    python3 legacy_arithmetic.py            # verify against test_legacy_quirks and time each kernel
+"""
+
+import time
+
+import numpy as np
+
+from fixed_point import UNIT_PLACES, div_round, to_units
+
+
+def _round_places(values, places, mode):
+    units = div_round(to_units(values), 10 ** (UNIT_PLACES - places), mode)
+    return units / 10 ** places
+
+
+def _two_product(a, b):
+    """a * b as an unevaluated sum p + e, exactly (Dekker)"""
+    p = a * b
+    splitter = 134217729.0  # 2**27 + 1
+    a_hi = a * splitter - (a * splitter - a)
+    b_hi = b * splitter - (b * splitter - b)
+    a_lo, b_lo = a - a_hi, b - b_hi
+    return p, ((a_hi * b_hi - p) + a_hi * b_lo + a_lo * b_hi) + a_lo * b_lo
+
+
+def format_round(values, places=2):
+    """round(value * 10**places) on the exact binary value, ties to even: the
+    digits f"{value:.{places}f}" prints, as int64"""
+    p, e = _two_product(np.asarray(values, dtype=np.float64), float(10 ** places))
+    rounded = np.rint(p)
+    # p is the product rounded to a float; an exact-looking tie is broken by the lost part
+    tie = np.abs(p - np.trunc(p)) == 0.5
+    rounded = np.where(tie & (e > 0), np.ceil(p), np.where(tie & (e < 0), np.floor(p), rounded))
+    return rounded.astype(np.int64)
+
+
+def half_up(values, places=2):
+    return _round_places(values, places, 'half_up')
+
+
+def half_even(values, places=2):
+    return _round_places(values, places, 'half_even')
+
+
+def truncate(values, places=2):
+    return _round_places(values, places, 'down')
+
+
+def float_floor(values, places=2):
+    """floor(value * 10**places) / 10**places in float, binary error included"""
+    multiplier = 10 ** places
+    return np.floor(np.asarray(values, dtype=np.float64) * multiplier) / multiplier
+
+
+def fixed_width_overflow(values, places=2, total_digits=8):
+    """Round to places (half-even, as Python's round) and saturate at total_digits digits"""
+    multiplier = 10 ** places
+    fixed = np.rint(np.asarray(values, dtype=np.float64) * multiplier)
+    limit = 10 ** (total_digits - places) - 1
+    return np.clip(fixed, -limit, limit) / multiplier
+
+
+def bcd_digit_truncation(values, places=2, stored_places=4):
+    """Print with stored_places decimals, then drop the digits past places (toward zero)"""
+    stored = format_round(values, stored_places)
+    return div_round(stored, 10 ** (stored_places - places), 'down') / 10 ** places
+
+
+def word_size_clip(values, bits=36, places=2):
+    """Scale to hundredths and clip to a signed `bits`-bit word (no rounding)"""
+    multiplier = 10 ** places
+    scaled = np.asarray(values, dtype=np.float64) * multiplier
+    return np.clip(scaled, -(2 ** (bits - 1)), 2 ** (bits - 1) - 1) / multiplier
+
+
+def limited_mantissa(values, mantissa_bits=27):
+    """Round to the nearest float with mantissa_bits of mantissa (27 on a 36-bit word)"""
+    mantissa, exponent = np.frexp(np.asarray(values, dtype=np.float64))
+    return np.ldexp(np.rint(mantissa * 2.0 ** mantissa_bits) / 2.0 ** mantissa_bits, exponent)
+
+
+def field_width_truncation(values, width=8, places=2):
+    """Print with `places` decimals; if wider than `width`, keep the leading
+    characters of the integer part and zero the cents"""
+    cents = format_round(values, places)
+    negative = cents < 0
+    whole = np.abs(cents) // 10 ** places
+    digits = np.ones(whole.shape, dtype=np.int64)
+    for power in range(1, 19):
+        digits += whole >= 10 ** power
+    # Characters available for the integer part, the sign taking one
+    room = width - places - 1 - negative
+    too_wide = digits > room
+    kept = whole // 10 ** np.where(too_wide, digits - room, 0)
+    signed = np.where(negative, -1, 1)
+    return np.where(too_wide, signed * kept, cents / 10 ** places)
+
+
+# The test_legacy_quirks.py functions as array kernels
+QUIRKS = {
+    'COBOL Rounding': half_up,
+    'COBOL Truncation': float_floor,
+    'Fixed Point': fixed_width_overflow,
+    'BCD Errors': bcd_digit_truncation,
+    'Mainframe Word Size': word_size_clip,
+    'Punch Card Limits': field_width_truncation,
+}
+
+
+def main():
+    import test_legacy_quirks as scalar
+    from case_records import load_case_array
+
+    references = {
+        'COBOL Rounding': scalar.cobol_decimal_rounding,
+        'COBOL Truncation': scalar.cobol_truncation,
+        'Fixed Point': scalar.fixed_point_arithmetic,
+        'BCD Errors': scalar.binary_coded_decimal_errors,
+        'Mainframe Word Size': scalar.mainframe_word_size_effects,
+        'Punch Card Limits': scalar.punch_card_column_limits,
+    }
+
+    cases = load_case_array('public_cases.json')
+    rng = np.random.default_rng(0)
+    # Real outputs and receipts, plus unrounded and out-of-range values
+    values = np.concatenate([cases['expected'], cases['receipts'], rng.uniform(-5000, 5000, 1000),
+                             rng.uniform(-1e7, 1e7, 200).round(3), [0.005, -0.005, 2.675, -0.0]])
+
+    print("🕰️  LEGACY ARITHMETIC KERNELS")
+    print("=" * 60)
+    print(f"{'Quirk':22s} {'Mismatches':>10s} {'Scalar':>10s} {'Array':>10s}")
+    for name, kernel in QUIRKS.items():
+        start = time.perf_counter()
+        expected = np.array([references[name](float(v)) for v in values])
+        scalar_time = time.perf_counter() - start
+
+        kernel(values[:10])  # warm up
+        repeats = 100
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = kernel(values)
+        array_time = (time.perf_counter() - start) / repeats
+        mismatches = int((result != expected).sum())
+        print(f"{name:22s} {mismatches:10d} {scalar_time * 1e3:8.2f}ms {array_time * 1e6:8.1f}µs")
+    print(f"\n{len(values)} values per kernel")
+
+
+if __name__ == "__main__":
+    main()
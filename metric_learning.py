@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Learn the find_similar_cases distance weights, k and weighting kernel.
+
+The objective is the eval.sh score of leave-one-out predictions over the
+public cases (see knn_loo.py). It is cheap to evaluate because:
+
+- the per-dimension |difference| matrices are computed once per worker;
+  a candidate metric is just a weighted sum of them
+- one partial sort per metric yields the K_MAX nearest neighbours, and
+  cumulative weighted sums along that sorted list give the LOO predictions
+  for every k at once, for each kernel
+- metrics are scored in parallel across a process pool
+
+The search runs over a log-spaced grid of (day_weight, mile_scale,
+receipt_scale) and then refines around the best metric. The winner is
+re-scored with the exact tie order from knn_loo and written to
+knn_params.json, and fast_predictor_data.py is rebuilt so run.sh uses it.
+
+Usage:
+    python3 metric_learning.py                 # search and report only
+    python3 metric_learning.py --write         # also save knn_params.json and rebuild run.sh data
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import knn_loo
+from case_records import load_case_array
+from knn_config import DEFAULT_KNN_PARAMS, KERNELS, save_knn_params
+from scoring import EXACT_THRESHOLD, print_score, score_predictions
+
+K_MAX = 30
+
+DAY_WEIGHTS = np.geomspace(0.25, 64.0, 9)
+MILE_SCALES = np.geomspace(10.0, 1000.0, 11)
+RECEIPT_SCALES = np.geomspace(10.0, 1000.0, 11)
+
+
+class LooObjective:
+    """Scores every (k, kernel) for a metric from cached difference matrices"""
+
+    def __init__(self, cases, k_max=K_MAX):
+        days = cases['days'].astype(np.float64)
+        self.day_diff = np.abs(days[:, None] - days[None, :])
+        self.mile_diff = np.abs(cases['miles'][:, None] - cases['miles'][None, :])
+        self.receipt_diff = np.abs(cases['receipts'][:, None] - cases['receipts'][None, :])
+        # Leave-one-out: a row is never its own neighbour
+        np.fill_diagonal(self.day_diff, np.inf)
+        self.expected = cases['expected']
+        self.k_max = min(k_max, len(cases) - 1)
+
+    def neighbours(self, day_weight, mile_scale, receipt_scale):
+        """Sorted (rows, k_max) neighbour distances and outputs"""
+        distance = (self.day_diff * day_weight + self.mile_diff / mile_scale
+                    + self.receipt_diff / receipt_scale)
+        nearest = np.argpartition(distance, self.k_max - 1, axis=1)[:, :self.k_max]
+        nearest_distance = np.take_along_axis(distance, nearest, axis=1)
+        order = np.argsort(nearest_distance, axis=1)
+        return (np.take_along_axis(nearest_distance, order, axis=1),
+                self.expected[np.take_along_axis(nearest, order, axis=1)])
+
+    def evaluate(self, metric):
+        """[(score, avg_error, exact_matches, k, kernel)] for one metric"""
+        distance, outputs = self.neighbours(*metric)
+        results = []
+        for kernel in KERNELS:
+            weights = knn_loo.kernel_weights(kernel, distance)
+            # Column k-1 of the cumulative sums is the k-nearest prediction
+            predictions = np.cumsum(outputs * weights, axis=1) / np.cumsum(weights, axis=1)
+            errors = np.abs(np.round(predictions, 2) - self.expected[:, None])
+            avg_error = errors.mean(axis=0)
+            exact = (errors < EXACT_THRESHOLD).sum(axis=0)
+            scores = avg_error * 100 + (len(errors) - exact) * 0.1
+            for k in range(1, self.k_max + 1):
+                results.append((float(scores[k - 1]), float(avg_error[k - 1]), int(exact[k - 1]),
+                                k, kernel))
+        return results
+
+
+_objective = None
+
+
+def _init_worker(cases, k_max):
+    global _objective
+    _objective = LooObjective(cases, k_max)
+
+
+def _evaluate_metric(metric):
+    score, avg_error, exact, k, kernel = min(_objective.evaluate(metric))
+    return score, avg_error, exact, metric, k, kernel
+
+
+def search(metrics, pool):
+    """Best (score, avg_error, exact, metric, k, kernel) for each metric, best first"""
+    return sorted(pool.map(_evaluate_metric, metrics, chunksize=8))
+
+
+def refine_grid(metric, step):
+    """3x3x3 log-spaced neighbourhood around a metric"""
+    factors = (1 / step, 1.0, step)
+    return [(metric[0] * a, metric[1] * b, metric[2] * c)
+            for a in factors for b in factors for c in factors]
+
+
+def to_params(metric, k, kernel):
+    return {
+        'day_weight': round(float(metric[0]), 6),
+        'mile_scale': round(float(metric[1]), 6),
+        'receipt_scale': round(float(metric[2]), 6),
+        'k': k,
+        'kernel': kernel,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learn kNN metric weights, k and kernel by LOO error")
+    parser.add_argument('--cases', default='public_cases.json')
+    parser.add_argument('--k-max', type=int, default=K_MAX)
+    parser.add_argument('--refine-rounds', type=int, default=6)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--write', action='store_true',
+                        help="save knn_params.json and rebuild fast_predictor_data.py")
+    args = parser.parse_args()
+
+    cases = load_case_array(args.cases)
+    grid = [(d, m, r) for d in DAY_WEIGHTS for m in MILE_SCALES for r in RECEIPT_SCALES]
+    configs_per_metric = len(KERNELS) * min(args.k_max, len(cases) - 1)
+
+    print("🔍 KNN METRIC SEARCH")
+    print("=" * 78)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                             initargs=(cases, args.k_max)) as pool:
+        ranked = search(grid, pool)
+        evaluated = len(grid)
+        print(f"Grid: {len(grid)} metrics x {configs_per_metric} (k, kernel) configurations")
+
+        best = ranked[0]
+        step = DAY_WEIGHTS[1] / DAY_WEIGHTS[0]
+        for round_num in range(args.refine_rounds):
+            step = np.sqrt(step)
+            candidates = refine_grid(best[3], step)
+            refined = search(candidates, pool)
+            evaluated += len(candidates)
+            best = min(best, refined[0])
+            print(f"Refine {round_num + 1}: step x{step:.3f}, best score {best[0]:.2f}")
+    elapsed = time.perf_counter() - start
+    total = evaluated * configs_per_metric
+    print(f"Evaluated {total} configurations in {elapsed:.1f}s ({total / elapsed:.0f}/s)")
+
+    print("\nTop grid metrics:")
+    print(f"{'Score':>9s} {'Avg err':>8s} {'Exact':>5s} {'day_w':>8s} {'mile_s':>8s} {'rcpt_s':>8s} {'k':>3s} kernel")
+    for score, avg_error, exact, metric, k, kernel in ranked[:10]:
+        print(f"{score:9.2f} {avg_error:8.2f} {exact:5d} {metric[0]:8.3f} {metric[1]:8.2f} "
+              f"{metric[2]:8.2f} {k:3d} {kernel}")
+
+    params = to_params(best[3], best[4], best[5])
+    print(f"\n🏆 Best parameters: {params}")
+    baseline = score_predictions(cases['expected'], knn_loo.loo_predictions(cases, 'run_sh', DEFAULT_KNN_PARAMS))
+    learned = score_predictions(cases['expected'], knn_loo.loo_predictions(cases, 'run_sh', params))
+    print_score(baseline, "\n📈 Original run.sh metric (leave-one-out):")
+    print_score(learned, "\n📈 Learned metric (leave-one-out):")
+
+    if args.write:
+        save_knn_params(params, objective='leave-one-out eval.sh score', cases=args.cases,
+                        loo_score=round(learned['score'], 2), loo_avg_error=round(learned['avg_error'], 4))
+        import build_fast_predictor
+        build_fast_predictor.build()
+        print("\nSaved knn_params.json and rebuilt fast_predictor_data.py")
+
+
+if __name__ == "__main__":
+    main()
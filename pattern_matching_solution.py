@@ -4,6 +4,19 @@ import json
 import math
 from collections import defaultdict
 
+from knn_config import kernel_weights, load_knn_params
+
+# Original similarity metric and inverse-similarity weighting; knn_params.json
+# (from metric_learning.py) overrides them when present
+KNN_DEFAULTS = {
+    'day_weight': 2.0,
+    'mile_scale': 100.0,
+    'receipt_scale': 100.0,
+    'k': 10,
+    'kernel': 'inverse',
+}
+KNN_PARAMS = load_knn_params(KNN_DEFAULTS)
+
 def load_training_data():
     """Load and index training data for pattern matching"""
     with open('public_cases.json', 'r') as f:
@@ -43,11 +56,11 @@ def find_similar_cases(target_days, target_miles, target_receipts, similarity_pa
     for days, miles, receipts, output in similarity_patterns:
         # Calculate similarity score (lower is more similar)
         day_diff = abs(days - target_days)
-        mile_diff = abs(miles - target_miles) / 100.0  # Scale down miles
-        receipt_diff = abs(receipts - target_receipts) / 100.0  # Scale down receipts
+        mile_diff = abs(miles - target_miles) / KNN_PARAMS['mile_scale']  # Scale down miles
+        receipt_diff = abs(receipts - target_receipts) / KNN_PARAMS['receipt_scale']  # Scale down receipts
         
         # Weighted similarity score
-        similarity = day_diff * 2.0 + mile_diff + receipt_diff
+        similarity = day_diff * KNN_PARAMS['day_weight'] + mile_diff + receipt_diff
         similarities.append((similarity, days, miles, receipts, output))
     
     # Return top matches
@@ -64,7 +77,7 @@ def calculate_reimbursement_from_patterns(days, miles, receipts, training_data):
         return exact_matches[key]
     
     # Find similar cases
-    similar_cases = find_similar_cases(days, miles, receipts, similarity_patterns, 10)
+    similar_cases = find_similar_cases(days, miles, receipts, similarity_patterns, KNN_PARAMS['k'])
     
     if not similar_cases:
         return fallback_calculation(days, miles, receipts)
@@ -73,9 +86,8 @@ def calculate_reimbursement_from_patterns(days, miles, receipts, training_data):
     weighted_sum = 0.0
     weight_total = 0.0
     
-    for similarity_score, s_days, s_miles, s_receipts, s_output in similar_cases:
-        # Use inverse similarity as weight (add small value to avoid division by zero)
-        weight = 1.0 / (similarity_score + 0.1)
+    weights = kernel_weights(KNN_PARAMS['kernel'], [case[0] for case in similar_cases])
+    for (*_, s_output), weight in zip(similar_cases, weights):
         weighted_sum += s_output * weight
         weight_total += weight
     
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Registry of batch predictors.
+
+Each entry builds a function that takes a list of Case records and returns a
+list of reimbursement amounts, so pipelines can swap engines by name. Engines
+are imported lazily so asking for one predictor never pays for the others.
+"""
+
+import os
+import subprocess
+
+XGBOOST_MODEL_FILE = 'xgboost_reimbursement_model.json'
+XGBOOST_COMPILED_FILE = 'xgboost_reimbursement_model.npz'   # written by xgb_compile
+
+
+def make_knn():
+    """The run.sh kNN, in process (fast_predictor)"""
+    import fast_predictor
+
+    def predict_batch(cases):
+        return [fast_predictor.predict_reimbursement(c.days, c.miles, c.receipts) for c in cases]
+    return predict_batch
+
+
+def make_rule_based():
+    """Interview-driven rule system from rule_based_solution"""
+    import rule_based_solution
+
+    def predict_batch(cases):
+        return [rule_based_solution.predict_reimbursement(c.days, c.miles, c.receipts)
+                for c in cases]
+    return predict_batch
+
+
+def make_pattern_matching():
+    """Similarity-weighted kNN with pattern adjustments from pattern_matching_solution"""
+    import pattern_matching_solution
+    training_data = pattern_matching_solution.load_training_data()
+
+    def predict_batch(cases):
+        return [pattern_matching_solution.predict_reimbursement(
+                    c.days, c.miles, c.receipts, training_data)
+                for c in cases]
+    return predict_batch
+
+
+def make_tree():
+    """Linear-leaf regression tree compiled to tree_model.py by tree_induction"""
+    import tree_model
+
+    def predict_batch(cases):
+        return [tree_model.predict_reimbursement(c.days, c.miles, c.receipts) for c in cases]
+    return predict_batch
+
+
+def make_kmeans():
+    """Nearest k-means regime plus its linear model, from kmeans_params.json"""
+    import kmeans_regimes
+    params = kmeans_regimes.load_params()
+
+    def predict_batch(cases):
+        return [kmeans_regimes.predict_reimbursement(c.days, c.miles, c.receipts, params) for c in cases]
+    return predict_batch
+
+
+def make_loess():
+    """Per-day locally weighted linear fits from loess_predictor"""
+    from case_records import load_case_array
+    from loess_predictor import LoessPredictor
+    return LoessPredictor(load_case_array('public_cases.json')).predict_batch
+
+
+def make_interpolation():
+    """Per-day Delaunay interpolation from interpolation_index (built in memory on first use)"""
+    from interpolation_index import load_index
+    return load_index().predict_batch
+
+
+def make_xgboost():
+    """Gradient-boosted trees saved by xgboost_solution"""
+    import xgboost as xgb
+    from xgboost_features import create_features
+    model = xgb.Booster(model_file=XGBOOST_MODEL_FILE)
+
+    def predict_batch(cases):
+        features = [create_features(c.days, c.miles, c.receipts) for c in cases]
+        return [round(float(p), 2) for p in model.predict(xgb.DMatrix(features))]
+    return predict_batch
+
+
+def make_xgboost_compiled():
+    """The same trees compiled to NumPy arrays by xgb_compile; no xgboost import"""
+    import xgb_compile
+    from xgboost_features import feature_matrix
+    if os.path.exists(XGBOOST_COMPILED_FILE):
+        forest = xgb_compile.load_compiled()
+    else:
+        forest = xgb_compile.compile_model(XGBOOST_MODEL_FILE)
+
+    def predict_batch(cases):
+        if not cases:
+            return []
+        return [round(float(p), 2) for p in forest.predict(feature_matrix(cases))]
+    return predict_batch
+
+
+def make_run_sh():
+    """The submitted ./run.sh, one process per case exactly as eval.sh runs it"""
+    def predict_batch(cases):
+        results = []
+        for c in cases:
+            output = subprocess.run(
+                ['./run.sh', str(c.days), str(c.miles), str(c.receipts)],
+                capture_output=True, text=True, check=True,
+            )
+            results.append(float(output.stdout.strip()))
+        return results
+    return predict_batch
+
+
+BATCH_PREDICTORS = {
+    'knn': make_knn,
+    'rule_based': make_rule_based,
+    'pattern_matching': make_pattern_matching,
+    'tree': make_tree,
+    'kmeans': make_kmeans,
+    'loess': make_loess,
+    'interpolation': make_interpolation,
+    'run_sh': make_run_sh,
+}
+
+# The xgboost engines need a model trained by xgboost_solution.py, which is not
+# committed; register them only where one exists
+if os.path.exists(XGBOOST_MODEL_FILE):
+    BATCH_PREDICTORS['xgboost'] = make_xgboost
+if os.path.exists(XGBOOST_MODEL_FILE) or os.path.exists(XGBOOST_COMPILED_FILE):
+    BATCH_PREDICTORS['xgboost_compiled'] = make_xgboost_compiled
+
+
+def with_rounding(predict_batch, mode):
+    """Round a predictor's outputs to the cent in integer arithmetic (see fixed_point)"""
+    from fixed_point import round_amounts
+
+    def predict_rounded(cases):
+        predictions = predict_batch(cases)
+        if not len(predictions):
+            return []
+        return round_amounts(predictions, mode).tolist()
+    return predict_rounded
+
+
+def get_batch_predictor(name, rounding=None):
+    """Build the named batch predictor, optionally re-rounding its output with a fixed_point mode"""
+    if name not in BATCH_PREDICTORS:
+        raise ValueError(f"Unknown predictor '{name}', choose from: {', '.join(sorted(BATCH_PREDICTORS))}")
+    predict_batch = BATCH_PREDICTORS[name]()
+    return with_rounding(predict_batch, rounding) if rounding else predict_batch
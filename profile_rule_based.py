@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Opt-in hot-path profiler for rule_based_solution.
+
+While enabled, the pipeline stages (calculate_reimbursement and the
+calculate_mileage / calculate_receipts / apply_bonuses_and_penalties /
+apply_rounding_quirks calls it makes) are swapped for timing wrappers that
+record call counts, cumulative and self time in nanoseconds, and the call
+stack each nanosecond was spent in. Disabling restores the original
+functions, so the normal path pays nothing.
+
+Per-branch hit counts come from a separate pass that traces line-to-line
+transitions in rule_based_solution only; tracing is slow, so it never
+overlaps the timing pass.
+
+Usage:
+    python3 profile_rule_based.py public_cases.json private_cases.json \\
+        --collapsed rule_based.folded --speedscope rule_based.speedscope.json
+"""
+
+import argparse
+import ast
+import inspect
+import json
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import rule_based_solution
+from case_records import load_cases
+
+STAGES = [
+    'calculate_reimbursement',
+    'calculate_mileage',
+    'calculate_receipts',
+    'apply_bonuses_and_penalties',
+    'apply_rounding_quirks',
+]
+
+
+class StageProfile:
+    """Counters filled in by the timing wrappers"""
+
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.total_ns = defaultdict(int)
+        self.self_ns = defaultdict(int)
+        self.stack_ns = defaultdict(int)   # 'a;b;c' -> self time spent with that stack
+        self._stack = []
+        self._child_ns = []
+
+    def wrap(self, name, func):
+        stack = self._stack
+        child_ns = self._child_ns
+        clock = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            stack.append(name)
+            child_ns.append(0)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                children = child_ns.pop()
+                self.calls[name] += 1
+                self.total_ns[name] += elapsed
+                self.self_ns[name] += elapsed - children
+                self.stack_ns[';'.join(stack)] += elapsed - children
+                stack.pop()
+                if child_ns:
+                    child_ns[-1] += elapsed
+        timed.__wrapped__ = func
+        return timed
+
+
+_active = None
+
+
+def enable():
+    """Swap the stage functions for timing wrappers and return the live profile"""
+    global _active
+    if _active is not None:
+        return _active
+    _active = StageProfile()
+    for name in STAGES:
+        setattr(rule_based_solution, name, _active.wrap(name, getattr(rule_based_solution, name)))
+    return _active
+
+
+def disable():
+    """Restore the original stage functions"""
+    global _active
+    for name in STAGES:
+        func = getattr(rule_based_solution, name)
+        setattr(rule_based_solution, name, getattr(func, '__wrapped__', func))
+    _active = None
+
+
+@contextmanager
+def profiling():
+    profile = enable()
+    try:
+        yield profile
+    finally:
+        disable()
+
+
+# --- Branch coverage ------------------------------------------------------------
+
+def find_branches():
+    """Locate every if/elif in the stage functions.
+
+    Returns (function, test_line, test_end_line, taken_line, condition_source)
+    tuples; a branch is taken when execution moves from its test straight to
+    the first line of its body.
+    """
+    source = inspect.getsource(rule_based_solution)
+    tree = ast.parse(source)
+    branches = []
+    for func in tree.body:
+        if not isinstance(func, ast.FunctionDef) or func.name not in STAGES:
+            continue
+        for node in ast.walk(func):
+            if isinstance(node, ast.If):
+                branches.append((
+                    func.name,
+                    node.test.lineno,
+                    node.test.end_lineno,
+                    node.body[0].lineno,
+                    ast.get_source_segment(source, node.test),
+                ))
+    return sorted(branches, key=lambda b: b[1])
+
+
+def count_branch_hits(cases):
+    """Run the cases under a line tracer and count how often each branch fires.
+
+    Line events alone over-count: a body statement spanning several lines, or
+    a loop, fires its first line more than once per entry. So the tracer
+    records (previous line, line) transitions per frame, and a test counts as
+    evaluated when entered from outside it and as taken when execution goes
+    from the test to the body.
+    """
+    filename = rule_based_solution.__file__
+    transitions = defaultdict(int)   # (previous line or None, line) -> count
+
+    def global_trace(frame, event, arg):
+        if frame.f_code.co_filename != filename:
+            return None
+        previous = None
+
+        def local_trace(frame, event, arg):
+            nonlocal previous
+            if event == 'line':
+                transitions[previous, frame.f_lineno] += 1
+                previous = frame.f_lineno
+            return local_trace
+        return local_trace
+
+    sys.settrace(global_trace)
+    try:
+        for c in cases:
+            rule_based_solution.predict_reimbursement(c.days, c.miles, c.receipts)
+    finally:
+        sys.settrace(None)
+
+    branches = []
+    for func, test_line, test_end_line, taken_line, condition in find_branches():
+        def in_test(line):
+            return line is not None and test_line <= line <= test_end_line
+        branch = {
+            'function': func,
+            'line': test_line,
+            'condition': condition,
+            'evaluated': sum(n for (previous, line), n in transitions.items()
+                             if line == test_line and not in_test(previous)),
+            'taken': sum(n for (previous, line), n in transitions.items()
+                         if line == taken_line and in_test(previous)),
+        }
+        assert branch['taken'] <= branch['evaluated'], f"branch at line {test_line} over-counted: {branch}"
+        branches.append(branch)
+    return branches
+
+
+# --- Export ---------------------------------------------------------------------
+
+def write_collapsed(profile, path):
+    """Brendan Gregg collapsed-stack format, weights in nanoseconds"""
+    with open(path, 'w') as f:
+        for stack, ns in sorted(profile.stack_ns.items()):
+            f.write(f"{stack} {ns}\n")
+
+
+def write_speedscope(profile, path, name='rule_based_solution'):
+    """speedscope sampled profile with nanosecond weights"""
+    frames = {stage: i for i, stage in enumerate(STAGES)}
+    samples, weights = [], []
+    for stack, ns in sorted(profile.stack_ns.items()):
+        samples.append([frames[f] for f in stack.split(';')])
+        weights.append(ns)
+    document = {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'shared': {'frames': [{'name': stage, 'file': 'rule_based_solution.py'} for stage in STAGES]},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'nanoseconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+        'name': name,
+        'exporter': 'profile_rule_based.py',
+    }
+    with open(path, 'w') as f:
+        json.dump(document, f)
+
+
+def print_report(profile, branches, n_cases):
+    print("⏱️  STAGE TIMINGS")
+    print("=" * 78)
+    print(f"{'Stage':30s} {'Calls':>8s} {'Total ms':>10s} {'Self ms':>10s} {'ns/call':>10s}")
+    for stage in STAGES:
+        calls = profile.calls[stage]
+        if not calls:
+            continue
+        print(f"{stage:30s} {calls:8d} {profile.total_ns[stage] / 1e6:10.3f} "
+              f"{profile.self_ns[stage] / 1e6:10.3f} {profile.total_ns[stage] / calls:10.0f}")
+
+    if branches:
+        print(f"\n🔀 BRANCH HITS ({n_cases} cases)")
+        print("=" * 78)
+        for b in branches:
+            rate = b['taken'] / b['evaluated'] * 100 if b['evaluated'] else 0
+            print(f"{b['function']:28s} L{b['line']:<4d} {b['taken']:7d}/{b['evaluated']:<7d} "
+                  f"({rate:5.1f}%)  if {b['condition']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile rule_based_solution over case files")
+    parser.add_argument('inputs', nargs='*', default=['public_cases.json', 'private_cases.json'])
+    parser.add_argument('--collapsed', help="write collapsed stacks (flamegraph.pl / speedscope input)")
+    parser.add_argument('--speedscope', help="write a speedscope JSON profile")
+    parser.add_argument('--no-branches', action='store_true', help="skip the traced branch-count pass")
+    args = parser.parse_args()
+
+    cases = [c for path in args.inputs for c in load_cases(path)]
+
+    with profiling() as profile:
+        for c in cases:
+            rule_based_solution.predict_reimbursement(c.days, c.miles, c.receipts)
+
+    branches = [] if args.no_branches else count_branch_hits(cases)
+    print_report(profile, branches, len(cases))
+
+    if args.collapsed:
+        write_collapsed(profile, args.collapsed)
+        print(f"\nCollapsed stacks written to {args.collapsed}")
+    if args.speedscope:
+        write_speedscope(profile, args.speedscope)
+        print(f"Speedscope profile written to {args.speedscope}")
+
+
+if __name__ == "__main__":
+    main()
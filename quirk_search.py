@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Search which rounding quirk at which calculation stage reproduces exact cents.
+
+legacy_cobol_style_calculation in test_legacy_corrections.py rounds with one
+cobol_round at every step of its formula. Here the same formula is split
+into stages
+
+    per_diem   the day-rate base
+    mileage    miles * rate
+    receipts   the receipt component (and its penalty)
+    total      the sum, before the minimum-payout floor
+
+and every assignment of a quirk kernel (QUIRK_KERNELS: none, COBOL
+rounding, half-even, truncation, float floor, BCD, whole dollars) to every
+stage is scored against all cases and ranked by exact ±$0.01 matches.
+
+Evaluation is vectorized. Each stage component depends only on its own
+quirk, so the per_diem, mileage and receipts variants are computed once per
+kernel as (kernels, cases) arrays. A job then broadcasts their sums for a
+whole block of combinations at once and applies the total-stage kernel.
+Jobs (one per per_diem x total pair) are spread over a process pool.
+
+Usage:
+    python3 quirk_search.py                 # rank all 8^4 placements
+    python3 quirk_search.py --top 30 --workers 4
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+
+from fixed_point import UNITS_PER_DOLLAR, to_units
+from legacy_arithmetic import bcd_digit_truncation, float_floor, format_round, half_even, half_up, truncate
+from scoring import CLOSE_THRESHOLD, EXACT_THRESHOLD
+
+STAGES = ('per_diem', 'mileage', 'receipts', 'total')
+
+
+def cobol_round(values):
+    """test_legacy_corrections' cobol_round: round(value + 1e-7, 2)"""
+    return format_round(np.asarray(values, dtype=np.float64) + 0.0000001, 2) / 100
+
+
+QUIRK_KERNELS = {
+    'none': lambda values: values,
+    'cobol_round': cobol_round,
+    'half_up': half_up,
+    'half_even': half_even,
+    'truncate': truncate,
+    'floor': float_floor,
+    'bcd': bcd_digit_truncation,
+    'whole_dollar': lambda values: half_up(values, 0),
+}
+
+
+# --- The legacy formula, one stage at a time ---------------------------------------
+
+def per_diem_component(days, quirk):
+    base = np.select(
+        [days == 1, days == 2, days == 3, days == 4, days == 5, days == 6, days == 7, days == 8],
+        [80.0, 170.0, 300.0, 280.0, 450.0, 86.0 * days, 73.0 * days, 45.0 * days],
+        55.0 * days)
+    return quirk(base)
+
+
+def mileage_component(days, miles, quirk):
+    rate = np.select(
+        [days == 1, days == 2, days == 3, days == 4, days == 5, days <= 8],
+        [0.60, 0.69, 0.70, 0.67, 0.62, 0.32],
+        0.67)
+    return quirk(miles * rate)
+
+
+def receipts_component(days, receipts, quirk):
+    r = receipts
+    one = quirk(np.minimum(r, 2000) * 0.5)
+    two = np.select([r <= 300, r <= 800], [quirk(r), quirk(r * 0.8)], quirk(r * 0.4))
+    three = np.select([r <= 200, r <= 500, r <= 1000, r <= 1500],
+                      [quirk(r * 0.5), quirk(r * 0.4), quirk(r * 0.3), quirk(r * 0.25)], quirk(r * 0.15))
+    four = np.select([r < 100, r <= 800], [quirk(r * 0.9), quirk(r * 0.6)], quirk(r * 0.4 + 160))
+    penalty = quirk((r - 1500) * 0.4)
+    five = np.select([r < 500, r < 1500], [quirk(np.minimum(r, 50)), quirk(r * 0.70)],
+                     np.maximum(quirk(1500 * 0.70 - penalty), 25))
+    six_to_eight = quirk(np.minimum(r, 145 * days))
+    nine_plus = np.select([r < 200, r <= 1500, r <= 2000],
+                          [quirk(r), quirk(r * 0.7), quirk(r * 0.5)], quirk(r * 0.25))
+    return np.select([days == 1, days == 2, days == 3, days == 4, days == 5, days <= 8],
+                     [one, two, three, four, five, six_to_eight], nine_plus)
+
+
+def stage_components(cases):
+    """Component arrays of shape (kernels, cases) for the first three stages,
+    plus the long-trip penalty and payout floor (which no stage rounds)"""
+    days = cases['days'].astype(np.int64)
+    kernels = list(QUIRK_KERNELS.values())
+    # Long trips with tiny receipts: penalty, then at least $50/day
+    long_low = (days >= 10) & (cases['receipts'] < 100)
+    return {
+        'per_diem': np.array([per_diem_component(days, k) for k in kernels]),
+        'mileage': np.array([mileage_component(days, cases['miles'], k) for k in kernels]),
+        'receipts': np.array([receipts_component(days, cases['receipts'], k) for k in kernels]),
+        'penalty': np.where(long_low, (days - 9) * 15.0, 0.0),
+        'floor': np.where(long_low, days * 50.0, -np.inf),
+    }
+
+
+def combine(components, per_diem, mileage, receipts, total):
+    """Totals for one quirk placement (kernel names); used for spot checks"""
+    index = list(QUIRK_KERNELS).index
+    subtotal = (components['per_diem'][index(per_diem)] + components['mileage'][index(mileage)]
+                + components['receipts'][index(receipts)])
+    return np.maximum(QUIRK_KERNELS[total](subtotal - components['penalty']), components['floor'])
+
+
+# --- Search -----------------------------------------------------------------------
+
+_components = None
+_expected_units = None
+
+
+def _init_worker(components, expected):
+    global _components, _expected_units
+    _components = components
+    _expected_units = to_units(expected)
+
+
+def _evaluate_block(job):
+    """Every (mileage, receipts) placement for one per_diem and total kernel"""
+    per_diem, total = job
+    names = list(QUIRK_KERNELS)
+    c = _components
+    # (mileage kernels, receipt kernels, cases), summed in the formula's order
+    subtotal = (c['per_diem'][names.index(per_diem)] + c['mileage'][:, None, :]
+                + c['receipts'][None, :, :])
+    totals = np.maximum(QUIRK_KERNELS[total](subtotal - c['penalty']), c['floor'])
+    errors = np.abs(to_units(totals) - _expected_units)
+    exact = (errors < round(EXACT_THRESHOLD * UNITS_PER_DOLLAR)).sum(axis=2)
+    close = (errors < round(CLOSE_THRESHOLD * UNITS_PER_DOLLAR)).sum(axis=2)
+    avg_error = errors.mean(axis=2) / UNITS_PER_DOLLAR
+    return [(int(exact[m, r]), int(close[m, r]), float(avg_error[m, r]),
+             (per_diem, names[m], names[r], total))
+            for m in range(len(names)) for r in range(len(names))]
+
+
+def search(cases, workers=None):
+    """(exact, close, avg_error, placement) for every placement, best first"""
+    components = stage_components(cases)
+    jobs = list(product(QUIRK_KERNELS, QUIRK_KERNELS))
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(components, cases['expected'])) as pool:
+        results = [row for block in pool.map(_evaluate_block, jobs) for row in block]
+    return sorted(results, key=lambda row: (-row[0], -row[1], row[2]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank rounding-quirk placements across calculation stages")
+    parser.add_argument('--cases', default='public_cases.json')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    from case_records import load_case_array
+    cases = load_case_array(args.cases)
+
+    print("🔍 QUIRK PLACEMENT SEARCH")
+    print("=" * 78)
+    start = time.perf_counter()
+    ranked = search(cases, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Evaluated {len(ranked)} placements x {len(cases)} cases in {elapsed:.2f}s "
+          f"({len(ranked) * len(cases) / elapsed:,.0f} case evaluations/s)")
+
+    print(f"\n{'Exact':>5s} {'Close':>5s} {'Avg err':>8s}  " + ' '.join(f"{s:>12s}" for s in STAGES))
+    for exact, close, avg_error, placement in ranked[:args.top]:
+        print(f"{exact:5d} {close:5d} {avg_error:8.2f}  " + ' '.join(f"{q:>12s}" for q in placement))
+
+    # The all-cobol_round placement is test_legacy_corrections' own formula
+    from test_legacy_corrections import legacy_cobol_style_calculation
+    reference = np.array([legacy_cobol_style_calculation(int(d), float(m), float(r))
+                          for d, m, r in zip(cases['days'], cases['miles'], cases['receipts'])])
+    ours = combine(stage_components(cases), *(['cobol_round'] * len(STAGES)))
+    print(f"\nAll-cobol_round placement matches legacy_cobol_style_calculation on "
+          f"{int((ours == reference).sum())}/{len(cases)} cases")
+
+
+if __name__ == "__main__":
+    main()
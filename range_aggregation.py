@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Single-pass range-bucket aggregation over the case store.
+
+The analysis scripts walk hard-coded range lists like
+
+    receipt_ranges = [(0, 100, "Very Low"), (100, 500, "Low"), ...]
+    for min_r, max_r, label in receipt_ranges:
+        cases_in_range = [case for case in data if min_r <= case['receipts'] < max_r]
+        avg_expected = sum(case['expected'] for case in cases_in_range) / len(cases_in_range)
+
+which rescans every case once per range and once per average. Here a
+BinScheme turns the range list into bin edges, every case is assigned to
+its bin with one np.digitize per scheme, and all schemes are aggregated
+together: each (scheme, bin) pair gets one group id, so the counts and
+sums of every bin of every scheme come from a single bincount, and min,
+max and quantiles from a single sort.
+
+Ranges are half-open, [low, high), and must be contiguous (each range
+starts where the previous one ends); the last high may be float('inf').
+Cases outside every range of a scheme are left out of it.
+
+Sums run over each bin's cases in case order, the same order as Python's
+sum(), so the means are the ones the scripts print.
+
+    schemes = [BinScheme.from_ranges('receipts', 'receipts', receipt_ranges),
+               BinScheme.from_ranges('mileage', 'miles', mileage_ranges)]
+    result = aggregate(query().where('days == 1'), schemes, values=('expected', 'miles'))
+    result['receipts'].stat('expected', 'mean')     # one value per range
+
+Usage:
+    python3 range_aggregation.py                          # receipt and mileage tables
+    python3 range_aggregation.py --where "days == 1" --values expected miles_per_day
+"""
+
+import argparse
+
+import numpy as np
+
+from case_query import Query, query
+
+STATISTICS = ('count', 'mean', 'min', 'max')
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+class BinScheme:
+    """Named bin edges over a column expression"""
+
+    def __init__(self, name, column, edges, labels=None):
+        self.name = name
+        self.column = column
+        self.edges = np.asarray(edges, dtype=np.float64)
+        if len(self.edges) < 2 or (np.diff(self.edges) <= 0).any():
+            raise ValueError(f"Bin edges for '{name}' must be increasing: {list(edges)}")
+        self.labels = list(labels) if labels is not None else [
+            f"{low:g}-{high:g}" for low, high in zip(self.edges[:-1], self.edges[1:])]
+        if len(self.labels) != len(self):
+            raise ValueError(f"'{name}' has {len(self)} bins but {len(self.labels)} labels")
+
+    @classmethod
+    def from_ranges(cls, name, column, ranges):
+        """From the scripts' [(low, high, label), ...] lists"""
+        for (_, high, label), (low, _, _) in zip(ranges, ranges[1:]):
+            if high != low:
+                raise ValueError(f"Range '{label}' in '{name}' ends at {high} but the next starts at {low}")
+        return cls(name, column, [r[0] for r in ranges] + [ranges[-1][1]], [r[2] for r in ranges])
+
+    def __len__(self):
+        return len(self.edges) - 1
+
+    def assign(self, values):
+        """Bin number per value, -1 outside [edges[0], edges[-1])"""
+        bins = np.digitize(values, self.edges) - 1
+        bins[bins >= len(self)] = -1
+        return bins
+
+
+class BinnedStats:
+    """Per-bin statistics of one scheme"""
+
+    def __init__(self, scheme, table, counts, stats, members):
+        self.scheme = scheme
+        self.table = table
+        self.labels = scheme.labels
+        self.counts = counts
+        self._stats = stats        # {(value, statistic): array per bin}
+        self._members = members    # list of row-number arrays per bin
+
+    def stat(self, value, statistic):
+        """'count', 'mean', 'min', 'max' or a quantile such as 0.5 (NaN for empty bins)"""
+        if statistic == 'count':
+            return self.counts
+        return self._stats[value, statistic]
+
+    def members(self, i):
+        """Case table row numbers in bin i, in the query's order"""
+        return self._members[i]
+
+    def rows(self, i, *expressions):
+        """Bin i's cases as tuples of Python numbers, like Query.rows"""
+        members = self._members[i]
+        return list(zip(*(self.table.evaluate(e)[members].tolist() for e in expressions)))
+
+    def nonempty(self):
+        return [i for i in range(len(self.scheme)) if self.counts[i]]
+
+
+def _segment_quantile(sorted_values, starts, counts, q):
+    """np.quantile (linear) of each sorted segment; NaN for empty ones"""
+    position = starts + q * np.maximum(counts - 1, 0)
+    low = np.floor(position).astype(np.intp)
+    high = np.minimum(low + 1, starts + np.maximum(counts - 1, 0)).astype(np.intp)
+    result = np.full(len(counts), np.nan)
+    filled = counts > 0
+    fraction = position[filled] - low[filled]
+    result[filled] = (sorted_values[low[filled]] * (1 - fraction)
+                      + sorted_values[high[filled]] * fraction)
+    return result
+
+
+def aggregate(source, schemes, values=('expected',), quantiles=QUANTILES):
+    """{scheme name: BinnedStats} for every scheme, aggregated in one pass.
+
+    source is a Query (its filters and order apply; members come back in its
+    order) or a case file path. values are column expressions to summarise.
+    """
+    q = source if isinstance(source, Query) else query(source)
+    rows = q.indices()
+    n = len(rows)
+
+    # One group id per (scheme, bin); -1 for cases outside a scheme
+    sizes = np.array([len(s) for s in schemes], dtype=np.intp)
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    group = np.concatenate([
+        np.where(bins >= 0, bins + offset, -1)
+        for bins, offset in zip((s.assign(q.column(s.column)) for s in schemes), offsets)
+    ]) if schemes else np.empty(0, dtype=np.intp)
+    position = np.tile(np.arange(n), len(schemes))
+    keep = group >= 0
+    group, position = group[keep], position[keep]
+    n_groups = int(sizes.sum())
+
+    counts = np.bincount(group, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.intp)
+    filled = counts > 0
+    by_group = np.argsort(group, kind='stable')      # query order within each group
+    member_positions = position[by_group]
+
+    stats = {}
+    for value in values:
+        column = q.column(value).astype(np.float64)[position]
+        # bincount adds in input order, i.e. case order within each group, like sum()
+        sums = np.bincount(group, weights=column, minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats[value, 'mean'] = np.where(filled, sums / counts, np.nan)
+        ordered = column[by_group]
+        for name, reduce in (('min', np.minimum), ('max', np.maximum)):
+            result = np.full(n_groups, np.nan)
+            if filled.any():
+                result[filled] = reduce.reduceat(ordered, starts[filled])
+            stats[value, name] = result
+        sorted_values = column[np.lexsort((column, group))]
+        for fraction in quantiles:
+            stats[value, fraction] = _segment_quantile(sorted_values, starts, counts, fraction)
+
+    result = {}
+    for scheme, offset, size in zip(schemes, offsets, sizes):
+        span = slice(offset, offset + size)
+        members = [rows[member_positions[s:s + c]] for s, c in zip(starts[span], counts[span])]
+        result[scheme.name] = BinnedStats(scheme, q.table, counts[span],
+                                          {key: array[span] for key, array in stats.items()}, members)
+    return result
+
+
+# The range lists the analysis scripts use
+RECEIPT_RANGES = [(0, 100, "Very Low"), (100, 500, "Low"), (500, 1000, "Medium"),
+                  (1000, 1500, "High"), (1500, 3000, "Very High")]
+MILEAGE_RANGES = [(0, 200, "0-200 miles"), (200, 400, "200-400 miles"), (400, 600, "400-600 miles"),
+                  (600, 800, "600-800 miles"), (800, 1000, "800-1000 miles"),
+                  (1000, 1200, "1000-1200 miles"), (1200, float('inf'), "1200+ miles")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-range statistics for several bin schemes at once")
+    parser.add_argument('--cases', default='public_cases.json')
+    parser.add_argument('--where', nargs='*', default=[], help="case_query filter expressions")
+    parser.add_argument('--values', nargs='+', default=['expected'], help="column expressions to summarise")
+    args = parser.parse_args()
+
+    q = query(args.cases)
+    for expression in args.where:
+        q = q.where(expression)
+    schemes = [BinScheme.from_ranges('receipts', 'receipts', RECEIPT_RANGES),
+               BinScheme.from_ranges('mileage', 'miles', MILEAGE_RANGES),
+               BinScheme('days', 'days', np.arange(1, 16), [f"{d} days" for d in range(1, 15)])]
+    result = aggregate(q, schemes, args.values)
+
+    print(f"📊 RANGE AGGREGATES ({q.count()} cases)")
+    for scheme in schemes:
+        stats = result[scheme.name]
+        for value in args.values:
+            print("\n" + "=" * 86)
+            print(f"{value} by {scheme.name} ({scheme.column})")
+            print(f"{'Range':18s} {'Count':>6s} {'Mean':>10s} {'Min':>10s} {'P25':>10s} "
+                  f"{'Median':>10s} {'P75':>10s} {'Max':>10s}")
+            for i in stats.nonempty():
+                print(f"{stats.labels[i]:18s} {stats.counts[i]:6d} "
+                      + ' '.join(f"{stats.stat(value, s)[i]:10.2f}" for s in ('mean', 'min', 0.25, 0.5, 0.75, 'max')))
+
+
+if __name__ == "__main__":
+    main()
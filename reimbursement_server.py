@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Local HTTP/JSON reimbursement service on asyncio.
+
+Endpoints:
+    POST /reimburse        {"trip_duration_days": 5, "miles_traveled": 250, "total_receipts_amount": 150.75}
+                           -> {"reimbursement": 487.25}
+    POST /reimburse/batch  {"cases": [{...}, ...]} -> {"reimbursements": [...]}
+    GET  /health           -> {"status": "ok", ...queue and batching stats}
+
+Concurrent single-case requests that arrive within a short window are
+coalesced into one call to the batch predictor. Work is bounded at every
+stage: a fixed number of open connections, a bounded coalescing queue
+(requests beyond it get 503 with Retry-After), a cap on batch request size,
+and a limited number of predictor calls in flight.
+
+Usage:
+    python3 reimbursement_server.py --port 8080 --predictor knn
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+
+from case_records import case_from_json
+from predictors import BATCH_PREDICTORS, get_batch_predictor
+
+MAX_BODY_BYTES = 1 << 20
+MAX_HEADER_LINES = 100
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+class Overloaded(Exception):
+    """The coalescing queue is full"""
+
+
+class BadRequest(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class Coalescer:
+    """Collects single-case requests into batches for the predictor.
+
+    The first request in an empty queue opens a window of window_ms; every
+    request that arrives before it closes (up to max_batch) shares one
+    predictor call. The queue is bounded so overload turns into fast 503s
+    rather than unbounded memory and latency.
+    """
+
+    def __init__(self, predict_batch, window_ms=2.0, max_batch=256, queue_size=1024, max_inflight=2):
+        self.predict_batch = predict_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.inflight = asyncio.Semaphore(max_inflight)
+        self.batches = 0
+        self.coalesced = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, case):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((case, future))
+        except asyncio.QueueFull:
+            raise Overloaded() from None
+        return await future
+
+    def _predict(self, cases):
+        return asyncio.get_running_loop().run_in_executor(None, self.predict_batch, cases)
+
+    async def run_batch(self, cases):
+        """Run one predictor call off the event loop, bounded by max_inflight"""
+        async with self.inflight:
+            return await self._predict(cases)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Hold a predictor slot before draining the queue, so a slow
+            # predictor leaves requests in the bounded queue (and sheds load)
+            await self.inflight.acquire()
+            try:
+                batch = [await self.queue.get()]
+            except asyncio.CancelledError:
+                self.inflight.release()
+                raise
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            loop.create_task(self._dispatch(batch))
+
+    async def _predict_one(self, case):
+        """One case on its own; the exception is returned, not raised"""
+        try:
+            return (await self._predict([case]))[0]
+        except Exception as e:
+            return e
+
+    async def _dispatch(self, batch):
+        cases = [case for case, _ in batch]
+        try:
+            try:
+                results = await self._predict(cases)
+            except Exception:
+                # Retry the cases one by one so a bad case only fails its own request
+                results = [await self._predict_one(case) for case in cases]
+        finally:
+            self.inflight.release()
+        self.batches += 1
+        self.coalesced += len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+def parse_case(obj):
+    if not isinstance(obj, dict):
+        raise BadRequest("Each case must be a JSON object")
+    try:
+        case = case_from_json(obj)
+        case = case._replace(days=int(case.days), miles=float(case.miles), receipts=float(case.receipts))
+    except (KeyError, TypeError, ValueError, OverflowError) as e:
+        raise BadRequest(f"Invalid case: {e}") from None
+    if case.days < 1:
+        raise BadRequest(f"Invalid case: trip_duration_days must be at least 1, got {case.days}")
+    if not (math.isfinite(case.miles) and math.isfinite(case.receipts)):
+        raise BadRequest("Invalid case: miles_traveled and total_receipts_amount must be finite")
+    return case
+
+
+class ReimbursementServer:
+    def __init__(self, predictor='knn', window_ms=2.0, max_batch=256, queue_size=1024,
+                 max_connections=512, max_batch_request=10000):
+        self.predictor = predictor
+        self.coalescer = Coalescer(get_batch_predictor(predictor), window_ms, max_batch, queue_size)
+        self.connections = asyncio.Semaphore(max_connections)
+        self.max_batch_request = max_batch_request
+        self.started = time.time()
+        self.requests = 0
+
+    async def handle_connection(self, reader, writer):
+        async with self.connections:
+            try:
+                while True:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    status, payload, extra = await self._route(method, path, body)
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    self._write_response(writer, status, payload, extra, keep_alive)
+                    await writer.drain()
+                    if not keep_alive:
+                        break
+            except BadRequest as e:
+                self._write_response(writer, e.status, {'error': str(e)}, {}, False)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise BadRequest("Malformed request line") from None
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise BadRequest("Too many headers")
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            raise BadRequest("Invalid Content-Length") from None
+        if length > MAX_BODY_BYTES:
+            raise BadRequest("Request body too large", 413)
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), path.split('?', 1)[0], headers, body
+
+    async def _route(self, method, path, body):
+        self.requests += 1
+        if path == '/health':
+            return 200, self.stats(), {}
+        if path not in ('/reimburse', '/reimburse/batch'):
+            return 404, {'error': f"No route for {path}"}, {}
+        if method != 'POST':
+            return 405, {'error': "Use POST"}, {'Allow': 'POST'}
+        try:
+            data = json.loads(body or b'null')
+            if path == '/reimburse':
+                case = parse_case(data)
+                result = await self.coalescer.submit(case)
+                return 200, {'reimbursement': round(result, 2)}, {}
+            cases = data.get('cases') if isinstance(data, dict) else data
+            if not isinstance(cases, list):
+                raise BadRequest("Expected {\"cases\": [...]}")
+            if len(cases) > self.max_batch_request:
+                raise BadRequest(f"At most {self.max_batch_request} cases per batch", 413)
+            results = await self.coalescer.run_batch([parse_case(c) for c in cases])
+            return 200, {'reimbursements': [round(r, 2) for r in results]}, {}
+        except json.JSONDecodeError as e:
+            return 400, {'error': f"Invalid JSON: {e}"}, {}
+        except BadRequest as e:
+            return e.status, {'error': str(e)}, {}
+        except Overloaded:
+            return 503, {'error': "Server busy, retry shortly"}, {'Retry-After': '1'}
+        except Exception as e:
+            return 500, {'error': f"Prediction failed: {type(e).__name__}: {e}"}, {}
+
+    def _write_response(self, writer, status, payload, extra_headers, keep_alive):
+        body = json.dumps(payload).encode()
+        headers = [
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ] + [f"{name}: {value}" for name, value in extra_headers.items()]
+        writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body)
+
+    def stats(self):
+        c = self.coalescer
+        return {
+            'status': 'ok',
+            'predictor': self.predictor,
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'requests': self.requests,
+            'queue_depth': c.queue.qsize(),
+            'queue_limit': c.queue.maxsize,
+            'coalesced_batches': c.batches,
+            'coalesced_cases': c.coalesced,
+            'avg_batch_size': round(c.coalesced / c.batches, 2) if c.batches else None,
+        }
+
+
+async def serve(host, port, **options):
+    server = ReimbursementServer(**options)
+    server.coalescer.start()
+    tcp_server = await asyncio.start_server(server.handle_connection, host, port, backlog=1024)
+    print(f"🧾 Reimbursement service ({server.predictor}) listening on http://{host}:{port}")
+    try:
+        async with tcp_server:
+            await tcp_server.serve_forever()
+    finally:
+        await server.coalescer.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON reimbursement service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--predictor', default='knn', choices=sorted(BATCH_PREDICTORS))
+    parser.add_argument('--window-ms', type=float, default=2.0, help="coalescing window for single requests")
+    parser.add_argument('--max-batch', type=int, default=256, help="most single requests per predictor call")
+    parser.add_argument('--queue-size', type=int, default=1024, help="pending single requests before 503s")
+    parser.add_argument('--max-connections', type=int, default=512)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, predictor=args.predictor, window_ms=args.window_ms,
+                          max_batch=args.max_batch, queue_size=args.queue_size,
+                          max_connections=args.max_connections))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,174 +2,288 @@
 
 import json
 import math
+import os
 
-def calculate_reimbursement(days, miles, receipts):
+RULE_BASED_PARAMS_FILE = 'rule_based_params.json'
+
+# The interview-derived constants. optimize_rule_based.py tunes them and writes
+# rule_based_params.json; without the file these are used unchanged.
+DEFAULT_PARAMS = {
+    'per_diem': 100.0,
+    # Mileage tiers: full rate up to tier1 miles, then the remaining miles are
+    # paid at rate * mult2 up to tier2, * mult3 up to tier3, * mult4 beyond
+    'mileage_rate': 0.58,
+    'mileage_tier1': 100.0,
+    'mileage_tier2': 200.0,
+    'mileage_tier3': 500.0,
+    'mileage_mult2': 0.85,
+    'mileage_mult3': 0.70,
+    'mileage_mult4': 0.55,
+    # Miles-per-day efficiency on the mileage amount
+    'sweet_mpd_low': 180.0,
+    'sweet_mpd_high': 220.0,
+    'sweet_mpd_bonus': 1.15,
+    'near_mpd_low': 150.0,
+    'near_mpd_high': 250.0,
+    'near_mpd_bonus': 1.08,
+    'excess_mpd': 300.0,
+    'excess_mpd_factor': 0.90,
+    # Receipts
+    'tiny_receipts': 30.0,
+    'tiny_receipts_amount': -20.0,
+    'low_receipts': 50.0,
+    'low_receipts_rate': 0.5,
+    'short_spend_threshold': 75.0,
+    'short_spend_slope': 0.01,
+    'short_spend_floor': 0.6,
+    'medium_spend_threshold': 120.0,
+    'medium_spend_slope': 0.008,
+    'medium_spend_floor': 0.5,
+    'medium_spend_center': 60.0,
+    'medium_spend_bonus_slope': 0.002,
+    'medium_spend_bonus_cap': 1.1,
+    'long_spend_threshold': 90.0,
+    'long_spend_slope': 0.012,
+    'long_spend_floor': 0.4,
+    'receipt_tier1': 600.0,
+    'receipt_tier2': 1000.0,
+    'receipt_tier3': 1500.0,
+    'receipt_rate1': 0.85,
+    'receipt_rate2': 0.70,
+    'receipt_rate3': 0.50,
+    'receipt_rate4': 0.25,
+    'frugal_miles': 200.0,
+    'frugal_spend': 70.0,
+    'frugal_bonus': 1.12,
+    'lavish_miles': 100.0,
+    'lavish_spend': 100.0,
+    'lavish_factor': 0.85,
+    # Trip-level bonuses and penalties
+    'five_day_bonus': 1.08,
+    'sweet_combo_miles': 900.0,
+    'sweet_combo_spend': 100.0,
+    'sweet_combo_bonus': 1.12,
+    'vacation_spend': 100.0,
+    'vacation_factor': 0.88,
+    'efficient_mpd': 200.0,
+    'efficient_bonus': 1.05,
+    'medium_trip_bonus': 1.03,
+    'short_trip_miles': 50.0,
+    'short_trip_factor': 0.95,
+    'long_trip_spend': 80.0,
+    'long_trip_bonus': 1.02,
+    # Rounding quirks
+    'cents_bonus': 5.0,
+    'noise_scale': 0.1,
+}
+
+
+def load_params(path=RULE_BASED_PARAMS_FILE):
+    """DEFAULT_PARAMS overridden by the tuned file, if it exists"""
+    params = dict(DEFAULT_PARAMS)
+    if os.path.exists(path):
+        with open(path) as f:
+            tuned = json.load(f)['params']
+        unknown = set(tuned) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown rule-based parameters in {path}: {', '.join(sorted(unknown))}")
+        params.update({name: float(value) for name, value in tuned.items()})
+    return params
+
+
+def save_params(params, path=RULE_BASED_PARAMS_FILE, **metadata):
+    """Write parameters plus any provenance (objective, search settings...)"""
+    document = {'params': {name: float(params[name]) for name in DEFAULT_PARAMS}}
+    document.update(metadata)
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+PARAMS = load_params()
+
+def calculate_reimbursement(days, miles, receipts, params=None):
     """
     Calculate reimbursement based on interview insights about the legacy system
     """
+    p = params or PARAMS
     
     # Base per diem calculation
-    base_per_diem = 100.0
+    base_per_diem = p['per_diem']
     total_per_diem = base_per_diem * days
     
     # Mileage calculation with tiers
-    mileage_reimbursement = calculate_mileage(miles, days)
+    mileage_reimbursement = calculate_mileage(miles, days, p)
     
     # Receipt processing with caps and penalties
-    receipt_reimbursement = calculate_receipts(receipts, days, miles)
+    receipt_reimbursement = calculate_receipts(receipts, days, miles, p)
     
     # Base calculation
     base_amount = total_per_diem + mileage_reimbursement + receipt_reimbursement
     
     # Apply bonuses and penalties
-    final_amount = apply_bonuses_and_penalties(base_amount, days, miles, receipts)
+    final_amount = apply_bonuses_and_penalties(base_amount, days, miles, receipts, p)
     
     # Apply rounding quirks
-    final_amount = apply_rounding_quirks(final_amount, receipts)
+    final_amount = apply_rounding_quirks(final_amount, receipts, p)
     
     return round(final_amount, 2)
 
-def calculate_mileage(miles, days):
+def calculate_mileage(miles, days, params=None):
     """Calculate mileage reimbursement with tiered system"""
+    p = params or PARAMS
     if miles == 0:
         return 0.0
     
     # Base rate for first 100 miles
-    base_rate = 0.58
+    base_rate = p['mileage_rate']
+    tier1, tier2, tier3 = p['mileage_tier1'], p['mileage_tier2'], p['mileage_tier3']
     mileage_amount = 0.0
     
-    if miles <= 100:
+    if miles <= tier1:
         mileage_amount = miles * base_rate
     else:
         # First 100 miles at full rate
-        mileage_amount = 100 * base_rate
-        remaining_miles = miles - 100
+        mileage_amount = tier1 * base_rate
+        remaining_miles = miles - tier1
         
         # Tiered reduction for remaining miles
         # Based on interviews: non-linear drop-off
-        if remaining_miles <= 200:
+        if remaining_miles <= tier2:
             # Second tier: slight reduction
-            mileage_amount += remaining_miles * (base_rate * 0.85)
-        elif remaining_miles <= 500:
+            mileage_amount += remaining_miles * (base_rate * p['mileage_mult2'])
+        elif remaining_miles <= tier3:
             # Third tier: more reduction
-            mileage_amount += 200 * (base_rate * 0.85)
-            mileage_amount += (remaining_miles - 200) * (base_rate * 0.70)
+            mileage_amount += tier2 * (base_rate * p['mileage_mult2'])
+            mileage_amount += (remaining_miles - tier2) * (base_rate * p['mileage_mult3'])
         else:
             # Fourth tier: significant reduction for very high mileage
-            mileage_amount += 200 * (base_rate * 0.85)
-            mileage_amount += 300 * (base_rate * 0.70)
-            mileage_amount += (remaining_miles - 500) * (base_rate * 0.55)
+            mileage_amount += tier2 * (base_rate * p['mileage_mult2'])
+            mileage_amount += (tier3 - tier2) * (base_rate * p['mileage_mult3'])
+            mileage_amount += (remaining_miles - tier3) * (base_rate * p['mileage_mult4'])
     
     # Efficiency bonus (180-220 miles per day sweet spot)
     if days > 0:
         miles_per_day = miles / days
-        if 180 <= miles_per_day <= 220:
-            mileage_amount *= 1.15  # 15% efficiency bonus
-        elif 150 <= miles_per_day < 180 or 220 < miles_per_day <= 250:
-            mileage_amount *= 1.08  # 8% moderate bonus
-        elif miles_per_day > 300:
-            mileage_amount *= 0.90  # Penalty for excessive daily mileage
+        if p['sweet_mpd_low'] <= miles_per_day <= p['sweet_mpd_high']:
+            mileage_amount *= p['sweet_mpd_bonus']  # 15% efficiency bonus
+        elif (p['near_mpd_low'] <= miles_per_day < p['sweet_mpd_low']
+              or p['sweet_mpd_high'] < miles_per_day <= p['near_mpd_high']):
+            mileage_amount *= p['near_mpd_bonus']  # 8% moderate bonus
+        elif miles_per_day > p['excess_mpd']:
+            mileage_amount *= p['excess_mpd_factor']  # Penalty for excessive daily mileage
     
     return mileage_amount
 
-def calculate_receipts(receipts, days, miles):
+def calculate_receipts(receipts, days, miles, params=None):
     """Calculate receipt reimbursement with caps and penalties"""
+    p = params or PARAMS
     if receipts == 0:
         return 0.0
     
     # Very low receipts penalty (worse than nothing)
-    if receipts < 30:
-        return -20.0  # Penalty for submitting very low receipts
-    elif receipts < 50:
-        return receipts * 0.5  # Reduced reimbursement for low receipts
+    if receipts < p['tiny_receipts']:
+        return p['tiny_receipts_amount']  # Penalty for submitting very low receipts
+    elif receipts < p['low_receipts']:
+        return receipts * p['low_receipts_rate']  # Reduced reimbursement for low receipts
     
     # Spending per day analysis
     spending_per_day = receipts / days if days > 0 else receipts
     
     # Optimal spending ranges based on trip length
     if days <= 3:  # Short trips
-        if spending_per_day > 75:
-            penalty_factor = max(0.6, 1.0 - (spending_per_day - 75) * 0.01)
+        if spending_per_day > p['short_spend_threshold']:
+            penalty_factor = max(p['short_spend_floor'],
+                                 1.0 - (spending_per_day - p['short_spend_threshold']) * p['short_spend_slope'])
         else:
             penalty_factor = 1.0
     elif 4 <= days <= 6:  # Medium trips
-        if spending_per_day > 120:
-            penalty_factor = max(0.5, 1.0 - (spending_per_day - 120) * 0.008)
+        if spending_per_day > p['medium_spend_threshold']:
+            penalty_factor = max(p['medium_spend_floor'],
+                                 1.0 - (spending_per_day - p['medium_spend_threshold']) * p['medium_spend_slope'])
         else:
-            penalty_factor = min(1.1, 1.0 + (spending_per_day - 60) * 0.002)  # Slight bonus for medium spending
+            # Slight bonus for medium spending
+            penalty_factor = min(p['medium_spend_bonus_cap'],
+                                 1.0 + (spending_per_day - p['medium_spend_center']) * p['medium_spend_bonus_slope'])
     else:  # Long trips
-        if spending_per_day > 90:
-            penalty_factor = max(0.4, 1.0 - (spending_per_day - 90) * 0.012)  # "Vacation penalty"
+        if spending_per_day > p['long_spend_threshold']:
+            # "Vacation penalty"
+            penalty_factor = max(p['long_spend_floor'],
+                                 1.0 - (spending_per_day - p['long_spend_threshold']) * p['long_spend_slope'])
         else:
             penalty_factor = 1.0
     
     # Base receipt reimbursement with diminishing returns
-    if receipts <= 600:
-        receipt_amount = receipts * 0.85
-    elif receipts <= 1000:
-        receipt_amount = 600 * 0.85 + (receipts - 600) * 0.70
-    elif receipts <= 1500:
-        receipt_amount = 600 * 0.85 + 400 * 0.70 + (receipts - 1000) * 0.50
+    tier1, tier2, tier3 = p['receipt_tier1'], p['receipt_tier2'], p['receipt_tier3']
+    rate1, rate2, rate3, rate4 = p['receipt_rate1'], p['receipt_rate2'], p['receipt_rate3'], p['receipt_rate4']
+    if receipts <= tier1:
+        receipt_amount = receipts * rate1
+    elif receipts <= tier2:
+        receipt_amount = tier1 * rate1 + (receipts - tier1) * rate2
+    elif receipts <= tier3:
+        receipt_amount = tier1 * rate1 + (tier2 - tier1) * rate2 + (receipts - tier2) * rate3
     else:
         # Heavy penalty for very high receipts
-        receipt_amount = 600 * 0.85 + 400 * 0.70 + 500 * 0.50 + (receipts - 1500) * 0.25
+        receipt_amount = tier1 * rate1 + (tier2 - tier1) * rate2 + (tier3 - tier2) * rate3 + (receipts - tier3) * rate4
     
     # Apply spending pattern penalty/bonus
     receipt_amount *= penalty_factor
     
     # High mileage + low spending bonus
-    if miles > 200 and spending_per_day < 70:
-        receipt_amount *= 1.12
+    if miles > p['frugal_miles'] and spending_per_day < p['frugal_spend']:
+        receipt_amount *= p['frugal_bonus']
     
     # Low mileage + high spending penalty  
-    if miles < 100 and spending_per_day > 100:
-        receipt_amount *= 0.85
+    if miles < p['lavish_miles'] and spending_per_day > p['lavish_spend']:
+        receipt_amount *= p['lavish_factor']
     
     return receipt_amount
 
-def apply_bonuses_and_penalties(base_amount, days, miles, receipts):
+def apply_bonuses_and_penalties(base_amount, days, miles, receipts, params=None):
     """Apply various bonuses and penalties based on trip characteristics"""
+    p = params or PARAMS
     final_amount = base_amount
     
     # 5-day trip bonus (mentioned multiple times in interviews)
     if days == 5:
-        final_amount *= 1.08
+        final_amount *= p['five_day_bonus']
     
     # Sweet spot combo: 5 days, 180+ miles/day, <$100/day spending
-    if days == 5 and miles >= 900 and (receipts / days) < 100:
-        final_amount *= 1.12  # Additional bonus for hitting sweet spot
+    if days == 5 and miles >= p['sweet_combo_miles'] and (receipts / days) < p['sweet_combo_spend']:
+        final_amount *= p['sweet_combo_bonus']  # Additional bonus for hitting sweet spot
     
     # 8+ day vacation penalty with high spending
-    if days >= 8 and (receipts / days) > 100:
-        final_amount *= 0.88
+    if days >= 8 and (receipts / days) > p['vacation_spend']:
+        final_amount *= p['vacation_factor']
     
     # Efficiency bonuses for optimal miles per day across all trip lengths
     if days > 0:
         miles_per_day = miles / days
-        if miles_per_day >= 200:
-            final_amount *= 1.05
+        if miles_per_day >= p['efficient_mpd']:
+            final_amount *= p['efficient_bonus']
     
     # Medium trip length bonus (4-6 days mentioned as sweet spot)
     if 4 <= days <= 6:
-        final_amount *= 1.03
+        final_amount *= p['medium_trip_bonus']
     
     # Very short trip penalty
-    if days == 1 and miles < 50:
-        final_amount *= 0.95
+    if days == 1 and miles < p['short_trip_miles']:
+        final_amount *= p['short_trip_factor']
     
     # Very long trip with reasonable spending gets slight bonus
-    if days >= 10 and (receipts / days) < 80:
-        final_amount *= 1.02
+    if days >= 10 and (receipts / days) < p['long_trip_spend']:
+        final_amount *= p['long_trip_bonus']
     
     return final_amount
 
-def apply_rounding_quirks(amount, receipts):
+def apply_rounding_quirks(amount, receipts, params=None):
     """Apply rounding bugs mentioned in interviews"""
+    p = params or PARAMS
     
     # Rounding bug: receipts ending in .49 or .99 get extra money
     receipt_cents = int((receipts * 100) % 100)
     if receipt_cents == 49 or receipt_cents == 99:
-        amount += 5.00  # Extra money from rounding bug
+        amount += p['cents_bonus']  # Extra money from rounding bug
     
     # Additional small variations to simulate system noise
     # Based on interviews about 5-10% variation for similar trips
@@ -182,15 +296,15 @@ def apply_rounding_quirks(amount, receipts):
     
     # Apply small variation (mentioned as 5-10% for similar trips)
     if variation < 0.5:
-        amount *= (1.0 + variation * 0.1)  # Up to 5% increase
+        amount *= (1.0 + variation * p['noise_scale'])  # Up to 5% increase
     else:
-        amount *= (1.0 - (variation - 0.5) * 0.1)  # Up to 5% decrease
+        amount *= (1.0 - (variation - 0.5) * p['noise_scale'])  # Up to 5% decrease
     
     return amount
 
-def predict_reimbursement(days, miles, receipts):
+def predict_reimbursement(days, miles, receipts, params=None):
     """Main prediction function"""
-    return calculate_reimbursement(days, miles, receipts)
+    return calculate_reimbursement(days, miles, receipts, params)
 
 def test_public_cases():
     """Test the rule-based system on public cases"""
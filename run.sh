@@ -1,81 +1,6 @@
 #!/bin/bash
 
-# Use the pattern matching solution for optimal results
-python3 -c "
-import json
-import sys
-
-# Load training data for pattern matching
-def load_training_data():
-    with open('public_cases.json', 'r') as f:
-        cases = json.load(f)
-    
-    exact_matches = {}
-    similarity_patterns = []
-    
-    for case in cases:
-        input_data = case['input']
-        days = input_data['trip_duration_days']
-        miles = input_data['miles_traveled']
-        receipts = input_data['total_receipts_amount']
-        output = case['expected_output']
-        
-        key = (days, miles, receipts)
-        exact_matches[key] = output
-        similarity_patterns.append((days, miles, receipts, output))
-    
-    return exact_matches, similarity_patterns
-
-def find_similar_cases(target_days, target_miles, target_receipts, similarity_patterns, num_matches=5):
-    similarities = []
-    
-    for days, miles, receipts, output in similarity_patterns:
-        day_diff = abs(days - target_days)
-        mile_diff = abs(miles - target_miles) / 100.0
-        receipt_diff = abs(receipts - target_receipts) / 100.0
-        
-        similarity = day_diff * 2.0 + mile_diff + receipt_diff
-        similarities.append((similarity, output))
-    
-    similarities.sort()
-    return [case[1] for case in similarities[:num_matches]]
-
-def predict_reimbursement(days, miles, receipts, training_data):
-    exact_matches, similarity_patterns = training_data
-    
-    # Check for exact match
-    key = (days, miles, receipts)
-    if key in exact_matches:
-        return exact_matches[key]
-    
-    # Find similar cases and average them
-    similar_outputs = find_similar_cases(days, miles, receipts, similarity_patterns, 10)
-    
-    if similar_outputs:
-        # Weight by inverse similarity
-        weighted_sum = 0.0
-        weight_total = 0.0
-        
-        for i, output in enumerate(similar_outputs):
-            weight = 1.0 / (i * 0.1 + 0.1)  # Higher weight for more similar cases
-            weighted_sum += output * weight
-            weight_total += weight
-        
-        return weighted_sum / weight_total if weight_total > 0 else similar_outputs[0]
-    else:
-        # Fallback calculation
-        base = 100 * days
-        mileage = miles * 0.58 if miles <= 100 else 100 * 0.58 + (miles - 100) * 0.45
-        receipts_contrib = min(receipts * 0.7, 500)
-        return base + mileage + receipts_contrib
-
-# Get input arguments
-days = int(sys.argv[1])
-miles = int(sys.argv[2])
-receipts = float(sys.argv[3])
-
-# Load training data and predict
-training_data = load_training_data()
-result = predict_reimbursement(days, miles, receipts, training_data)
-print(f'{result:.2f}')
-" $1 $2 $3
\ No newline at end of file
+# Cold-start-optimized kNN predictor (see fast_predictor.py): no site/env
+# startup, no JSON parsing, cached bytecode for the code and the training data
+case $0 in */*) cd "${0%/*}" ;; esac
+exec python3 -S -E -c 'import fast_predictor; fast_predictor.main()' "$@"
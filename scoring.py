@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Score predictions the way eval.sh does.
+
+A prediction is an exact match within $0.01 and close within $1.00; the
+score is `avg_error * 100 + (cases - exact_matches) * 0.1` (lower is better).
+Used by the offline evaluation tools so their numbers line up with eval.sh.
+
+Errors are computed in fixed point (fixed_point.to_units) rather than float
+dollars, like eval.sh's bc arithmetic: a prediction one cent off has an
+error of exactly $0.01 and is not an exact match, where the float
+difference can come out as 0.0099999.
+"""
+
+import numpy as np
+
+from fixed_point import UNITS_PER_DOLLAR, to_units
+
+EXACT_THRESHOLD = 0.01
+CLOSE_THRESHOLD = 1.0
+
+
+def score_predictions(expected, predicted):
+    """Summary statistics for a set of predictions against known outputs"""
+    unit_errors = np.abs(to_units(predicted) - to_units(expected))
+    n = len(unit_errors)
+    if n == 0:
+        raise ValueError("No predictions to score")
+    exact = int((unit_errors < round(EXACT_THRESHOLD * UNITS_PER_DOLLAR)).sum())
+    avg_error = float(unit_errors.sum()) / n / UNITS_PER_DOLLAR
+    return {
+        'cases': n,
+        'exact_matches': exact,
+        'close_matches': int((unit_errors < round(CLOSE_THRESHOLD * UNITS_PER_DOLLAR)).sum()),
+        'avg_error': avg_error,
+        'max_error': float(unit_errors.max()) / UNITS_PER_DOLLAR,
+        'score': avg_error * 100 + (n - exact) * 0.1,
+    }
+
+
+def print_score(summary, title=None):
+    """Print a summary in the same layout as eval.sh's results block"""
+    n = summary['cases']
+    if title:
+        print(title)
+    print(f"  Total test cases: {n}")
+    print(f"  Exact matches (±$0.01): {summary['exact_matches']} "
+          f"({summary['exact_matches'] / n * 100:.1f}%)")
+    print(f"  Close matches (±$1.00): {summary['close_matches']} "
+          f"({summary['close_matches'] / n * 100:.1f}%)")
+    print(f"  Average error: ${summary['avg_error']:.2f}")
+    print(f"  Maximum error: ${summary['max_error']:.2f}")
+    print(f"  🎯 Score: {summary['score']:.2f} (lower is better)")
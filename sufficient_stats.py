@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Per-cell least-squares sufficient statistics for instant fits on case subsets.
+
+The analysis scripts keep refitting small linear models on slices of the
+cases (one trip length, a mileage range, a receipt band). For a design
+matrix X and target y, an OLS fit only needs
+
+    X^T X,  X^T y,  y^T y,  n
+
+and those add up over disjoint sets of cases. SufficientStats computes them
+once per cell of a days x mileage-bucket x receipt-bucket grid. A fit on any
+union of cells then sums the selected cells' statistics and solves a p x p
+system: O(cells) work, and the cases are never scanned again. A fit on a
+subset of the terms just indexes the matrices, and the squared error of
+any fixed coefficient vector (or a whole grid of them) comes from the same
+statistics.
+
+Cell edges are half-open: bucket i holds edges[i] <= value < edges[i+1].
+The day axis covers 1..MAX_DAYS, or up to the longest trip if that is longer.
+
+Usage:
+    python3 sufficient_stats.py                     # build, fit each day, check against direct fits
+    python3 sufficient_stats.py --save sufficient_stats.npz
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from case_records import load_case_array
+
+MAX_DAYS = 14                                       # day cells built at least up to here
+MILE_EDGES = tuple(range(0, 1300, 100))             # 0, 100, ..., 1200 (+ everything above)
+RECEIPT_EDGES = tuple(range(0, 2750, 250))          # 0, 250, ..., 2500 (+ everything above)
+
+# Design-matrix columns by name
+TERMS = {
+    'const': lambda c: np.ones(len(c)),
+    'days': lambda c: c['days'].astype(np.float64),
+    'miles': lambda c: c['miles'],
+    'receipts': lambda c: c['receipts'],
+    'miles_sq': lambda c: c['miles'] ** 2,
+    'receipts_sq': lambda c: c['receipts'] ** 2,
+    'miles_x_receipts': lambda c: c['miles'] * c['receipts'],
+    'miles_per_day': lambda c: c['miles'] / c['days'],
+    'receipts_per_day': lambda c: c['receipts'] / c['days'],
+}
+DEFAULT_TERMS = ('const', 'days', 'miles', 'receipts')
+
+
+class SufficientStats:
+    """X^T X, X^T y, y^T y and counts per (day, mile bucket, receipt bucket) cell"""
+
+    def __init__(self, terms, mile_edges, receipt_edges, xtx, xty, yty, count):
+        self.terms = tuple(terms)
+        self.mile_edges = np.asarray(mile_edges, dtype=np.float64)
+        self.receipt_edges = np.asarray(receipt_edges, dtype=np.float64)
+        self.xtx = xtx        # (days, mile buckets, receipt buckets, p, p)
+        self.xty = xty        # (days, mile buckets, receipt buckets, p)
+        self.yty = yty        # (days, mile buckets, receipt buckets)
+        self.count = count    # (days, mile buckets, receipt buckets)
+        self.max_days = count.shape[0]
+
+    @classmethod
+    def build(cls, cases, terms=DEFAULT_TERMS, mile_edges=MILE_EDGES, receipt_edges=RECEIPT_EDGES):
+        if len(cases) and cases['days'].min() < 1:
+            raise ValueError(f"Trip lengths must be at least 1 day, got {int(cases['days'].min())}")
+        x = np.column_stack([TERMS[t](cases) for t in terms])
+        y = cases['expected']
+        max_days = max(MAX_DAYS, int(cases['days'].max()) if len(cases) else 0)
+        shape = (max_days, len(mile_edges), len(receipt_edges))
+        # Values below the first edge go in bucket 0
+        cell = np.ravel_multi_index((
+            cases['days'] - 1,
+            np.clip(np.digitize(cases['miles'], mile_edges) - 1, 0, None),
+            np.clip(np.digitize(cases['receipts'], receipt_edges) - 1, 0, None),
+        ), shape)
+        cells = int(np.prod(shape))
+        p = len(terms)
+        xtx = np.zeros((cells, p, p))
+        np.add.at(xtx, cell, x[:, :, None] * x[:, None, :])
+        xty = np.zeros((cells, p))
+        np.add.at(xty, cell, x * y[:, None])
+        return cls(terms, mile_edges, receipt_edges,
+                   xtx.reshape(shape + (p, p)), xty.reshape(shape + (p,)),
+                   np.bincount(cell, weights=y * y, minlength=cells).reshape(shape),
+                   np.bincount(cell, minlength=cells).reshape(shape))
+
+    # --- Choosing cells ---------------------------------------------------------
+
+    def _buckets(self, edges, bounds):
+        """Buckets lying inside [low, high); bounds must fall on edges"""
+        keep = np.ones(len(edges), dtype=bool)
+        if bounds is None:
+            return keep
+        low, high = bounds
+        upper = np.append(edges[1:], np.inf)
+        for value in (low, high):
+            if value is not None and value not in edges and np.isfinite(value):
+                raise ValueError(f"{value} is not a bucket edge ({', '.join(f'{e:g}' for e in edges)})")
+        if low is not None:
+            keep &= edges >= low
+        if high is not None:
+            keep &= upper <= high
+        return keep
+
+    def cells(self, days=None, miles=None, receipts=None):
+        """Boolean cell mask: days is an int or a collection of ints, miles and
+        receipts are (low, high) ranges on bucket edges (None = unbounded)"""
+        day_keep = np.ones(self.max_days, dtype=bool)
+        if days is not None:
+            days = np.atleast_1d(days).astype(int)
+            if ((days < 1) | (days > self.max_days)).any():
+                raise ValueError(f"days must be within 1..{self.max_days}: {days.tolist()}")
+            day_keep[:] = False
+            day_keep[days - 1] = True
+        return (day_keep[:, None, None]
+                & self._buckets(self.mile_edges, miles)[None, :, None]
+                & self._buckets(self.receipt_edges, receipts)[None, None, :])
+
+    def combine(self, mask=None):
+        """(X^T X, X^T y, y^T y, n) summed over the selected cells"""
+        if mask is None:
+            mask = np.ones(self.count.shape, dtype=bool)
+        return (self.xtx[mask].sum(axis=0), self.xty[mask].sum(axis=0),
+                float(self.yty[mask].sum()), int(self.count[mask].sum()))
+
+    # --- Fitting ----------------------------------------------------------------
+
+    def _columns(self, terms):
+        return [self.terms.index(t) for t in (terms or self.terms)]
+
+    def fit(self, mask=None, terms=None, ridge=0.0):
+        """OLS (or ridge) on the selected cells; terms picks a subset of columns.
+
+        Returns a dict with the coefficients by term, n, sse and rmse. Rank
+        deficient designs (e.g. 'days' with 'const' inside one day) get the
+        minimum-norm solution.
+        """
+        xtx, xty, yty, n = self.combine(mask)
+        columns = self._columns(terms)
+        a = xtx[np.ix_(columns, columns)]
+        b = xty[columns]
+        # Jacobi scaling so miles^2 next to a constant stays well conditioned
+        scale = np.sqrt(np.diag(a))
+        scale[scale == 0] = 1.0
+        scaled = a / np.outer(scale, scale) + ridge * np.eye(len(columns))
+        beta = np.linalg.lstsq(scaled, b / scale, rcond=None)[0] / scale
+        sse = max(yty - 2 * beta @ b + beta @ a @ beta, 0.0)
+        return {
+            'coefficients': dict(zip([self.terms[c] for c in columns], beta.tolist())),
+            'n': n,
+            'sse': float(sse),
+            'rmse': float(np.sqrt(sse / n)) if n else float('nan'),
+        }
+
+    def sse(self, betas, mask=None, terms=None):
+        """Sum of squared errors of fixed coefficient vectors (..., p) on the
+        selected cells, all at once"""
+        xtx, xty, yty, _ = self.combine(mask)
+        columns = self._columns(terms)
+        a = xtx[np.ix_(columns, columns)]
+        betas = np.asarray(betas, dtype=np.float64)
+        return yty - 2 * betas @ xty[columns] + np.einsum('...i,ij,...j->...', betas, a, betas)
+
+    # --- Persistence ------------------------------------------------------------
+
+    def save(self, path):
+        np.savez(path, terms=np.array(self.terms), mile_edges=self.mile_edges,
+                 receipt_edges=self.receipt_edges, xtx=self.xtx, xty=self.xty,
+                 yty=self.yty, count=self.count)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['terms'].tolist(), data['mile_edges'], data['receipt_edges'],
+                       data['xtx'], data['xty'], data['yty'], data['count'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-cell sufficient statistics for subset least-squares fits")
+    parser.add_argument('--cases', default='public_cases.json')
+    parser.add_argument('--terms', nargs='+', default=list(DEFAULT_TERMS), choices=list(TERMS))
+    parser.add_argument('--save', metavar='PATH', help="write the statistics to an .npz file")
+    args = parser.parse_args()
+
+    cases = load_case_array(args.cases)
+    start = time.perf_counter()
+    stats = SufficientStats.build(cases, args.terms)
+    print(f"📦 Built {stats.count.size} cells ({int((stats.count > 0).sum())} non-empty) for "
+          f"{len(cases)} cases in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    print("\nPer-day fits:")
+    fit_terms = [t for t in args.terms if t != 'days']
+    start = time.perf_counter()
+    fits = [stats.fit(stats.cells(days=d), fit_terms) for d in range(1, stats.max_days + 1)]
+    elapsed = time.perf_counter() - start
+    for day, fit in enumerate(fits, 1):
+        terms = ' '.join(f"{c:+.4f}*{t}" for t, c in fit['coefficients'].items())
+        print(f"  {day:2d} days ({fit['n']:3d} cases): {terms}   rmse ${fit['rmse']:.2f}")
+    print(f"  {len(fits)} fits in {elapsed * 1000:.2f}ms")
+
+    # Same fits straight from the cases, to show nothing is lost
+    worst = 0.0
+    for day, fit in enumerate(fits, 1):
+        rows = cases[cases['days'] == day]
+        x = np.column_stack([TERMS[t](rows) for t in fit_terms])
+        direct = np.linalg.lstsq(x, rows['expected'], rcond=None)[0]
+        worst = max(worst, float(np.abs(direct @ x.T - np.array(list(fit['coefficients'].values())) @ x.T).max()))
+    print(f"  Largest prediction difference vs direct lstsq: ${worst:.2e}")
+
+    everything = stats.fit()
+    print(f"\nAll cases: " + ' '.join(f"{c:+.4f}*{t}" for t, c in everything['coefficients'].items())
+          + f"   rmse ${everything['rmse']:.2f}")
+
+    if args.save:
+        stats.save(args.save)
+        print(f"\nSaved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Regression-tree induction with linear leaves, compiled to plain Python.
+
+The interviews describe several distinct calculation paths, and the
+per-duration scripts keep hand-writing threshold ladders to find them. This
+learns the ladder instead: an exact CART-style greedy tree that splits on
+days, miles, receipts, miles/day or receipts/day, and fits
+
+    output ~ b0 + b1 * days + b2 * miles + b3 * receipts
+
+in every leaf (ridge-regularised least squares).
+
+Split search is exact and cheap. For each feature the node's rows are sorted
+once and running sums of the leaf model's sufficient statistics (X^T X,
+X^T y, y^T y) are accumulated, so the statistics of both sides of every
+candidate threshold are a prefix and a difference, and each candidate's
+least-squares error costs O(1) in the number of rows (one small solve,
+batched over all candidates).
+
+The fitted tree is written out as straight-line Python - nested if/else
+with a linear formula in each leaf, no loops or data structures - to
+tree_model.py, which the 'tree' predictor imports.
+
+Usage:
+    python3 tree_induction.py --max-depth 3 --min-leaf 60      # fit, print, write tree_model.py
+    python3 tree_induction.py --folds 10                       # cross-validated score only
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from case_records import load_case_array
+from scoring import print_score, score_predictions
+
+FEATURES = ('days', 'miles', 'receipts', 'miles_per_day', 'receipts_per_day')
+LEAF_TERMS = ('days', 'miles', 'receipts')
+MODEL_MODULE = 'tree_model.py'
+
+MAX_DEPTH = 3
+MIN_LEAF = 60
+RIDGE = 1e-6
+
+
+def feature_matrix(cases):
+    if len(cases) and cases['days'].min() < 1:
+        raise ValueError(f"Trip lengths must be at least 1 day, got {int(cases['days'].min())}")
+    days = cases['days'].astype(np.float64)
+    return np.column_stack([days, cases['miles'], cases['receipts'],
+                            cases['miles'] / days, cases['receipts'] / days])
+
+
+class TreeInducer:
+    """Greedy exact split search over standardised linear-leaf statistics"""
+
+    def __init__(self, cases, max_depth=MAX_DEPTH, min_leaf=MIN_LEAF, ridge=RIDGE):
+        self.features = feature_matrix(cases)
+        terms = self.features[:, [FEATURES.index(t) for t in LEAF_TERMS]]
+        # Standardise leaf terms so one ridge strength suits every column
+        self.mean = terms.mean(axis=0)
+        self.std = terms.std(axis=0)
+        self.std[self.std == 0] = 1.0
+        self.design = np.column_stack([np.ones(len(cases)), (terms - self.mean) / self.std])
+        self.y = cases['expected']
+        self.max_depth = max_depth
+        self.min_leaf = min_leaf
+        penalty = np.eye(self.design.shape[1]) * ridge
+        penalty[0, 0] = 0.0  # never shrink the intercept
+        self.penalty = penalty
+
+    def _fit(self, xtx, xty, yty):
+        """Ridge coefficients and residual sum of squares from sufficient statistics.
+
+        Works on stacks of statistics: xtx (..., p, p), xty (..., p), yty (...)
+        """
+        beta = np.linalg.solve(xtx + self.penalty, xty[..., None])[..., 0]
+        fitted = np.einsum('...i,...ij,...j->...', beta, xtx, beta)
+        sse = yty - 2 * np.einsum('...i,...i->...', beta, xty) + fitted
+        return beta, sse
+
+    def _stats(self, rows):
+        z = self.design[rows]
+        y = self.y[rows]
+        return z.T @ z, z.T @ y, y @ y
+
+    def best_split(self, rows):
+        """(sse, feature, threshold) of the best split of rows, or None"""
+        m = len(rows)
+        if m < 2 * self.min_leaf:
+            return None
+        best = None
+        for feature in range(len(FEATURES)):
+            order = rows[np.argsort(self.features[rows, feature], kind='stable')]
+            values = self.features[order, feature]
+            z = self.design[order]
+            y = self.y[order]
+            cum_xtx = np.cumsum(z[:, :, None] * z[:, None, :], axis=0)
+            cum_xty = np.cumsum(z * y[:, None], axis=0)
+            cum_yty = np.cumsum(y * y)
+
+            # Left side is rows [0, i]; thresholds only between distinct values
+            i = np.arange(self.min_leaf - 1, m - self.min_leaf)
+            i = i[values[i] < values[i + 1]]
+            if not len(i):
+                continue
+            _, left_sse = self._fit(cum_xtx[i], cum_xty[i], cum_yty[i])
+            _, right_sse = self._fit(cum_xtx[-1] - cum_xtx[i], cum_xty[-1] - cum_xty[i],
+                                     cum_yty[-1] - cum_yty[i])
+            total = left_sse + right_sse
+            j = int(np.argmin(total))
+            if best is None or total[j] < best[0]:
+                best = (float(total[j]), feature, float((values[i[j]] + values[i[j] + 1]) / 2))
+        return best
+
+    def _leaf(self, rows, sse):
+        beta, _ = self._fit(*self._stats(rows))
+        # Undo the standardisation so the leaf formula takes raw inputs
+        coefficients = beta[1:] / self.std
+        intercept = beta[0] - float(coefficients @ self.mean)
+        return {'intercept': float(intercept), 'coefficients': coefficients.tolist(),
+                'cases': len(rows), 'sse': float(sse)}
+
+    def grow(self, rows=None, depth=0):
+        if rows is None:
+            rows = np.arange(len(self.y))
+        _, sse = self._fit(*self._stats(rows))
+        split = self.best_split(rows) if depth < self.max_depth else None
+        if split is None or split[0] >= sse:
+            return self._leaf(rows, sse)
+        _, feature, threshold = split
+        goes_left = self.features[rows, feature] <= threshold
+        return {
+            'feature': FEATURES[feature],
+            'threshold': threshold,
+            'cases': len(rows),
+            'left': self.grow(rows[goes_left], depth + 1),
+            'right': self.grow(rows[~goes_left], depth + 1),
+        }
+
+
+def fit_tree(cases, max_depth=MAX_DEPTH, min_leaf=MIN_LEAF, ridge=RIDGE):
+    return TreeInducer(cases, max_depth, min_leaf, ridge).grow()
+
+
+def predict_tree(tree, cases):
+    """Evaluate a tree dict over a case array (used for validation)"""
+    features = feature_matrix(cases)
+    terms = features[:, [FEATURES.index(t) for t in LEAF_TERMS]]
+    predictions = np.empty(len(cases))
+
+    def walk(node, rows):
+        if 'feature' not in node:
+            predictions[rows] = node['intercept'] + terms[rows] @ np.array(node['coefficients'])
+            return
+        goes_left = features[rows, FEATURES.index(node['feature'])] <= node['threshold']
+        walk(node['left'], rows[goes_left])
+        walk(node['right'], rows[~goes_left])
+
+    walk(tree, np.arange(len(cases)))
+    return np.round(predictions, 2)
+
+
+def count_leaves(tree):
+    if 'feature' not in tree:
+        return 1
+    return count_leaves(tree['left']) + count_leaves(tree['right'])
+
+
+def describe(tree, indent=''):
+    """Readable rule listing"""
+    if 'feature' not in tree:
+        terms = ' '.join(f"{c:+.4f}*{t}" for c, t in zip(tree['coefficients'], LEAF_TERMS))
+        return [f"{indent}→ {tree['intercept']:.2f} {terms}   ({tree['cases']} cases)"]
+    lines = [f"{indent}if {tree['feature']} <= {tree['threshold']:.4g}:  ({tree['cases']} cases)"]
+    lines += describe(tree['left'], indent + '    ')
+    lines.append(f"{indent}else:")
+    lines += describe(tree['right'], indent + '    ')
+    return lines
+
+
+def compile_tree(tree, source_note=''):
+    """Python source for predict_reimbursement(days, miles, receipts)"""
+    def emit(node, indent):
+        if 'feature' not in node:
+            terms = ''.join(f" + {c!r} * {t}" for c, t in zip(node['coefficients'], LEAF_TERMS))
+            return [f"{indent}return round({node['intercept']!r}{terms}, 2)"]
+        return ([f"{indent}if {node['feature']} <= {node['threshold']!r}:"]
+                + emit(node['left'], indent + '    ')
+                + [f"{indent}else:"]
+                + emit(node['right'], indent + '    '))
+
+    lines = [
+        f"# Generated by tree_induction.py{source_note} -- do not edit.",
+        "",
+        "",
+        "def predict_reimbursement(days, miles, receipts):",
+        "    if days < 1:",
+        "        raise ValueError(f\"Trip lengths must be at least 1 day, got {days}\")",
+        "    miles_per_day = miles / days",
+        "    receipts_per_day = receipts / days",
+    ] + emit(tree, '    ')
+    return '\n'.join(lines) + '\n'
+
+
+def cross_validate(cases, folds, seed=0, **options):
+    assignment = np.random.default_rng(seed).permutation(len(cases)) % folds
+    predictions = np.empty(len(cases))
+    for fold in range(folds):
+        held_out = assignment == fold
+        tree = fit_tree(cases[~held_out], **options)
+        predictions[held_out] = predict_tree(tree, cases[held_out])
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit a linear-leaf regression tree and compile it to Python")
+    parser.add_argument('--cases', default='public_cases.json')
+    parser.add_argument('--max-depth', type=int, default=MAX_DEPTH)
+    parser.add_argument('--min-leaf', type=int, default=MIN_LEAF)
+    parser.add_argument('--ridge', type=float, default=RIDGE)
+    parser.add_argument('--folds', type=int, help="cross-validate instead of writing the model")
+    parser.add_argument('--output', default=MODEL_MODULE)
+    args = parser.parse_args()
+
+    cases = load_case_array(args.cases)
+    options = {'max_depth': args.max_depth, 'min_leaf': args.min_leaf, 'ridge': args.ridge}
+
+    if args.folds:
+        start = time.perf_counter()
+        predictions = cross_validate(cases, args.folds, **options)
+        print_score(score_predictions(cases['expected'], predictions),
+                    f"📈 Tree depth {args.max_depth}, min leaf {args.min_leaf} "
+                    f"({args.folds}-fold, {time.perf_counter() - start:.1f}s):")
+        return
+
+    start = time.perf_counter()
+    tree = fit_tree(cases, **options)
+    elapsed = time.perf_counter() - start
+    print(f"🌳 {count_leaves(tree)} calculation paths (fitted in {elapsed * 1000:.0f}ms)")
+    print("=" * 78)
+    print('\n'.join(describe(tree)))
+    print_score(score_predictions(cases['expected'], predict_tree(tree, cases)), "\n📈 Training fit:")
+
+    with open(args.output, 'w') as f:
+        f.write(compile_tree(tree, f" from {args.cases} (max depth {args.max_depth}, "
+                                   f"min leaf {args.min_leaf})"))
+    print(f"\nCompiled to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
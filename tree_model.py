@@ -0,0 +1,30 @@
+# Generated by tree_induction.py from public_cases.json (max depth 3, min leaf 60) -- do not edit.
+
+
+def predict_reimbursement(days, miles, receipts):
+    if days < 1:
+        raise ValueError(f"Trip lengths must be at least 1 day, got {days}")
+    miles_per_day = miles / days
+    receipts_per_day = receipts / days
+    if receipts <= 1247.545:
+        if receipts_per_day <= 68.09547619047619:
+            if receipts <= 268.985:
+                return round(128.00674760085963 + 54.769482547197796 * days + 0.4893138703768498 * miles + 0.2678914013397185 * receipts, 2)
+            else:
+                return round(113.91907472124467 + 33.85801837099331 * days + 0.5883084303941952 * miles + 0.656878948904064 * receipts, 2)
+        else:
+            if miles_per_day <= 100.78472222222223:
+                return round(-117.33154541031877 + 52.098536069954505 * days + 0.5295151963628365 * miles + 0.8711381493089861 * receipts, 2)
+            else:
+                return round(-241.95557045640385 + 102.4223749879701 * days + 0.3735623346866059 * miles + 0.9447026589602644 * receipts, 2)
+    else:
+        if days <= 7.5:
+            if miles <= 707.0:
+                return round(983.3215514548125 + 64.02394346523916 * days + 0.396246743607682 * miles + 0.036697543746183704 * receipts, 2)
+            else:
+                return round(1296.6171974596066 + 88.67803859267536 * days + -0.05055663370009916 * miles + 0.015553008444568469 * receipts, 2)
+        else:
+            if miles <= 795.5:
+                return round(871.0551248448008 + 68.54093715650525 * days + 0.23130426501765922 * miles + -0.014003761840224895 * receipts, 2)
+            else:
+                return round(1521.907032487351 + 26.867193656707837 * days + 0.4414895577092525 * miles + -0.18728951561046436 * receipts, 2)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Compile the saved XGBoost model into flat NumPy arrays.
+
+Serving xgboost_solution means importing xgboost (plus pandas and sklearn)
+and takes seconds. The saved model is just a list of binary trees, so this
+module flattens every tree into shared node arrays:
+
+    feature[node], threshold[node]   split test: x[feature] < threshold
+    left[node], right[node]          child node ids, -1 at leaves
+    default_left[node]               direction for missing (NaN) values
+    value[node]                      leaf output
+    roots[tree]                      first node of each tree
+
+and evaluates all trees for all rows at once: every step moves each
+(row, tree) cursor one level down, so the number of NumPy operations is the
+tree depth, not the number of nodes. Arithmetic follows XGBoost's CPU
+predictor - float32 features, thresholds and leaf values, accumulated tree
+by tree from base_score in float32 - so predictions are bit-identical to
+Booster.predict on the same model file.
+
+The compiled arrays are saved as an .npz that loads in milliseconds with
+only numpy imported.
+
+Usage:
+    python3 xgb_compile.py                                   # model json -> npz
+    python3 xgb_compile.py --verify                          # compare with xgboost on public cases
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+MODEL_FILE = 'xgboost_reimbursement_model.json'
+COMPILED_FILE = 'xgboost_reimbursement_model.npz'
+
+
+class CompiledForest:
+    """Flattened gradient-boosted trees with a vectorized evaluator"""
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots,
+                 base_score, depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.base_score = np.float32(base_score)
+        self.depth = int(depth)
+
+    def predict(self, features):
+        """Raw predictions for a (rows, features) array"""
+        features = np.asarray(features, dtype=np.float32)
+        nodes = np.broadcast_to(self.roots, (len(features), len(self.roots))).copy()
+        rows = np.arange(len(features))[:, None]
+        for _ in range(self.depth):
+            left = self.left[nodes]
+            internal = left >= 0
+            if not internal.any():
+                break
+            x = features[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(x), self.default_left[nodes], x < self.threshold[nodes])
+            nodes = np.where(internal, np.where(go_left, left, self.right[nodes]), nodes)
+
+        # Same float32 accumulation order as XGBoost: base_score, then tree by tree
+        margins = np.empty((len(features), len(self.roots) + 1), dtype=np.float32)
+        margins[:, 0] = self.base_score
+        margins[:, 1:] = self.value[nodes]
+        return np.cumsum(margins, axis=1, dtype=np.float32)[:, -1]
+
+    def save(self, path=COMPILED_FILE):
+        np.savez(path, feature=self.feature, threshold=self.threshold, left=self.left,
+                 right=self.right, default_left=self.default_left, value=self.value,
+                 roots=self.roots, base_score=self.base_score, depth=self.depth)
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, [0]
+    while frontier:
+        frontier = [child for node in frontier for child in (left[node], right[node]) if child >= 0]
+        depth += 1
+    return depth
+
+
+def compile_model(path=MODEL_FILE):
+    """Flatten an XGBoost JSON model (gbtree, numerical splits, one target)"""
+    with open(path) as f:
+        learner = json.load(f)['learner']
+
+    booster = learner['gradient_booster']
+    if booster['name'] != 'gbtree':
+        raise ValueError(f"Only gbtree models can be compiled, not {booster['name']}")
+    objective = learner['objective']['name']
+    if objective not in ('reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror'):
+        raise ValueError(f"Objective {objective} needs an output transform; not supported")
+    params = learner['learner_model_param']
+    if int(params.get('num_target', 1)) != 1 or int(params.get('num_class', 0)) > 1:
+        raise ValueError("Only single-output models can be compiled")
+    # Newer versions store base_score as a one-element list string, e.g. '[1.34E3]'
+    base_score = float(params['base_score'].strip('[]'))
+
+    columns = {name: [] for name in ('feature', 'threshold', 'left', 'right', 'default_left', 'value')}
+    roots = []
+    depth = 0
+    offset = 0
+    for tree in booster['model']['trees']:
+        if any(tree.get('split_type', [])):
+            raise ValueError("Categorical splits are not supported")
+        left, right = tree['left_children'], tree['right_children']
+        roots.append(offset)
+        for node in range(len(left)):
+            is_leaf = left[node] < 0
+            columns['feature'].append(0 if is_leaf else tree['split_indices'][node])
+            columns['threshold'].append(tree['split_conditions'][node])
+            columns['left'].append(-1 if is_leaf else left[node] + offset)
+            columns['right'].append(-1 if is_leaf else right[node] + offset)
+            columns['default_left'].append(bool(tree['default_left'][node]))
+            # Leaf outputs are stored in split_conditions
+            columns['value'].append(tree['split_conditions'][node] if is_leaf else 0.0)
+        depth = max(depth, _tree_depth(left, right))
+        offset += len(left)
+
+    return CompiledForest(
+        feature=np.array(columns['feature'], dtype=np.int32),
+        threshold=np.array(columns['threshold'], dtype=np.float32),
+        left=np.array(columns['left'], dtype=np.int32),
+        right=np.array(columns['right'], dtype=np.int32),
+        default_left=np.array(columns['default_left'], dtype=bool),
+        value=np.array(columns['value'], dtype=np.float32),
+        roots=np.array(roots, dtype=np.int32),
+        base_score=base_score,
+        depth=depth,
+    )
+
+
+def load_compiled(path=COMPILED_FILE):
+    with np.load(path) as data:
+        return CompiledForest(**{name: data[name] for name in data.files})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the XGBoost model to NumPy arrays")
+    parser.add_argument('model', nargs='?', default=MODEL_FILE)
+    parser.add_argument('-o', '--output', default=COMPILED_FILE)
+    parser.add_argument('--verify', action='store_true', help="compare against xgboost on the public cases")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    forest = compile_model(args.model)
+    forest.save(args.output)
+    print(f"Compiled {len(forest.roots)} trees ({len(forest.value)} nodes, depth {forest.depth}) "
+          f"in {(time.perf_counter() - start) * 1000:.0f}ms -> {args.output}")
+
+    start = time.perf_counter()
+    forest = load_compiled(args.output)
+    print(f"Loaded in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    if args.verify:
+        import xgboost as xgb
+        from case_records import load_cases
+        from xgboost_features import feature_matrix
+
+        features = feature_matrix(load_cases('public_cases.json'))
+        start = time.perf_counter()
+        compiled = forest.predict(features)
+        elapsed = time.perf_counter() - start
+        reference = xgb.Booster(model_file=args.model).predict(xgb.DMatrix(features))
+        mismatches = int((compiled != reference).sum())
+        print(f"Predicted {len(features)} cases in {elapsed * 1000:.1f}ms; "
+              f"{mismatches} differ from xgboost (max diff {np.abs(compiled - reference).max()})")
+
+
+if __name__ == "__main__":
+    main()
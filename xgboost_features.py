@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Feature engineering for the gradient-boosted tree model.
+
+Kept apart from xgboost_solution so that inference (xgb_compile.py, the
+predictor registry) can build features with numpy alone, without importing
+xgboost, pandas or sklearn.
+"""
+
+import numpy as np
+
+def create_features(days, miles, receipts):
+    """Engineer features from the basic inputs"""
+    features = [
+        # Basic features
+        days,
+        miles,
+        receipts,
+        
+        # Polynomial features
+        days ** 2,
+        miles ** 2,
+        receipts ** 2,
+        
+        # Interaction features
+        days * miles,
+        days * receipts,
+        miles * receipts,
+        days * miles * receipts,
+        
+        # Per-day features
+        miles / days if days > 0 else 0,
+        receipts / days if days > 0 else 0,
+        
+        # Logarithmic features (add small value to avoid log(0))
+        np.log(days + 1),
+        np.log(miles + 1),
+        np.log(receipts + 1),
+        
+        # Exponential features (capped to avoid overflow)
+        min(np.exp(days * 0.1), 1000),
+        min(np.exp(miles * 0.01), 1000),
+        min(np.exp(receipts * 0.01), 1000),
+        
+        # Root features
+        np.sqrt(days),
+        np.sqrt(miles),
+        np.sqrt(receipts),
+        
+        # Trigonometric features (scaled)
+        np.sin(days * 0.5),
+        np.cos(days * 0.5),
+        np.sin(miles * 0.01),
+        np.cos(miles * 0.01),
+        
+        # Categorical-like features
+        1 if days == 1 else 0,
+        1 if days <= 3 else 0,
+        1 if days >= 7 else 0,
+        1 if miles < 50 else 0,
+        1 if miles > 200 else 0,
+        1 if receipts < 10 else 0,
+        1 if receipts > 50 else 0,
+        
+        # Complex combinations
+        (days + miles) / (receipts + 1),
+        (miles * receipts) / (days + 1),
+        days / (miles + 1),
+        receipts / (miles + 1),
+        
+        # Day-specific patterns
+        days % 7,  # Weekly pattern
+        1 if days % 2 == 0 else 0,  # Even/odd days
+        
+        # Mile ranges
+        miles // 10,  # Decade grouping
+        miles % 10,   # Single digit
+        
+        # Receipt patterns
+        int(receipts * 100) % 100,  # Cents pattern
+        int(receipts) % 10,         # Dollar pattern
+    ]
+    
+    return features
+
+
+def feature_matrix(cases):
+    """float32 feature rows for a list of Case records, as xgboost sees them
+    (built as float64 first, like a DMatrix from a list, then narrowed)"""
+    rows = [create_features(c.days, c.miles, c.receipts) for c in cases]
+    return np.array(rows, dtype=np.float64).reshape(len(rows), -1).astype(np.float32)
@@ -2,10 +2,19 @@
 
 import json
 import numpy as np
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-import xgboost as xgb
+
+from lazy_imports import lazy_import
+from xgboost_features import create_features
+
+# Heavy dependencies load on first use, so importing this module stays cheap
+xgb = lazy_import('xgboost')
+model_selection = lazy_import('sklearn.model_selection')
+
+def mean_absolute_error(y_true, y_pred):
+    return float(np.mean(np.abs(np.asarray(y_true) - np.asarray(y_pred))))
+
+def mean_squared_error(y_true, y_pred):
+    return float(np.mean((np.asarray(y_true) - np.asarray(y_pred)) ** 2))
 
 def load_data(filename):
     """Load data from JSON file and return features and targets"""
@@ -28,80 +37,6 @@ def load_data(filename):
     
     return np.array(features), np.array(targets)
 
-def create_features(days, miles, receipts):
-    """Engineer features from the basic inputs"""
-    features = [
-        # Basic features
-        days,
-        miles,
-        receipts,
-        
-        # Polynomial features
-        days ** 2,
-        miles ** 2,
-        receipts ** 2,
-        
-        # Interaction features
-        days * miles,
-        days * receipts,
-        miles * receipts,
-        days * miles * receipts,
-        
-        # Per-day features
-        miles / days if days > 0 else 0,
-        receipts / days if days > 0 else 0,
-        
-        # Logarithmic features (add small value to avoid log(0))
-        np.log(days + 1),
-        np.log(miles + 1),
-        np.log(receipts + 1),
-        
-        # Exponential features (capped to avoid overflow)
-        min(np.exp(days * 0.1), 1000),
-        min(np.exp(miles * 0.01), 1000),
-        min(np.exp(receipts * 0.01), 1000),
-        
-        # Root features
-        np.sqrt(days),
-        np.sqrt(miles),
-        np.sqrt(receipts),
-        
-        # Trigonometric features (scaled)
-        np.sin(days * 0.5),
-        np.cos(days * 0.5),
-        np.sin(miles * 0.01),
-        np.cos(miles * 0.01),
-        
-        # Categorical-like features
-        1 if days == 1 else 0,
-        1 if days <= 3 else 0,
-        1 if days >= 7 else 0,
-        1 if miles < 50 else 0,
-        1 if miles > 200 else 0,
-        1 if receipts < 10 else 0,
-        1 if receipts > 50 else 0,
-        
-        # Complex combinations
-        (days + miles) / (receipts + 1),
-        (miles * receipts) / (days + 1),
-        days / (miles + 1),
-        receipts / (miles + 1),
-        
-        # Day-specific patterns
-        days % 7,  # Weekly pattern
-        1 if days % 2 == 0 else 0,  # Even/odd days
-        
-        # Mile ranges
-        miles // 10,  # Decade grouping
-        miles % 10,   # Single digit
-        
-        # Receipt patterns
-        int(receipts * 100) % 100,  # Cents pattern
-        int(receipts) % 10,         # Dollar pattern
-    ]
-    
-    return features
-
 def train_xgboost_model(X_train, y_train, X_val, y_val):
     """Train XGBoost model with hyperparameter tuning"""
     
@@ -150,7 +85,7 @@ def main():
     print(f"Loaded {len(X)} cases with {len(X[0])} features each")
     
     # Split data
-    X_train, X_val, y_train, y_val = train_test_split(
+    X_train, X_val, y_train, y_val = model_selection.train_test_split(
         X, y, test_size=0.2, random_state=42
     )
     